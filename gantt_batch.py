@@ -0,0 +1,216 @@
+"""
+FasttGantt: render Gantt Charts from project files without the GUI
+
+Draws each plan off-screen (no Tk) and saves it in every requested format,
+spreading the plans over a pool of worker processes, e.g.
+
+    python gantt_batch.py plans/*.ods --format png svg --out-dir reports --jobs 4
+
+With --rows-per-page (and/or --days-per-page) each plan is split into pages:
+one multi-page file for pdf, numbered tiles for other formats.
+
+Charts are named after their plan files.  Plans with the same file name
+(e.g. big.ods and big.fgantt, or plan.ods in two folders) get the
+extension and then parent folders added to keep them apart, e.g.
+big_ods.png and big_fgantt.png.
+
+Charts that haven't changed since they were last exported are copied from
+the export cache (see gantt_export) rather than drawn again.
+"""
+import argparse
+import datetime as dt
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from gantt_chart import assign_team_colors
+from gantt_export import EXPORT_PRESETS, ExportCache, export_chart, export_pages
+from gantt_io import load_plan
+
+def output_names(files):
+    """
+    A distinct output name for each project file: its file name without the
+    extension, or if another file has the same name, with the extension and
+    as many of its parent folders as it takes to tell them apart
+
+    Parameters:
+    files (list): the project files, each only once
+
+    Returns:
+    dict: file path -> output name
+
+    Raises:
+    ValueError: if two files would still write the same charts
+    """
+    groups = {}
+    for file_path in files:
+        groups.setdefault(os.path.splitext(os.path.basename(file_path))[0], []).append(file_path)
+    names = {}
+    for stem, paths in groups.items():
+        if len(paths) == 1:
+            names[paths[0]] = stem
+            continue
+        parts = {path: os.path.abspath(path).split(os.sep) for path in paths}
+        for depth in range(max(map(len, parts.values()))):
+            tried = {path: '_'.join(parts[path][-1 - depth:-1] +
+                                    [os.path.basename(path).replace('.', '_')])
+                     for path in paths}
+            if len(set(tried.values())) == len(paths):
+                break
+        names.update(tried)
+    clashes = len(names) - len(set(names.values()))
+    if clashes:
+        raise ValueError(f"{clashes} of the project files would write charts with the same "
+                         "names, rename them or render them separately")
+    return names
+
+def render_plan(file_path, out_dir, formats, title=None, today_date=None, size=(16, 9),
+                dpi=100, cache=True, rows_per_page=None, days_per_page=None, name=None):
+    """
+    Draw one project file and save the chart in each of the formats
+
+    Parameters:
+    file_path (string): the project (.ods or .fgantt) file
+    out_dir (string): folder to write the charts to, as <file name>.<format>
+    formats (list): output formats, e.g. ['png', 'svg']
+    title (string): chart title, defaults to the file name
+    today_date (date): where to draw the red "today" line, defaults to today
+    size (tuple): figure (width, height) in inches
+    dpi (float): resolution of bitmap formats
+    cache (bool): use the export cache
+    rows_per_page (int): split the chart into pages of this many tasks
+    days_per_page (float): split the chart into pages of this many days
+    name (string): output file name (without the format), defaults to the
+                   file name, see output_names
+
+    Returns:
+    list: the files written
+    """
+    tasks = load_plan(file_path)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    name = name or stem
+    colors = assign_team_colors(list(tasks.teams))
+    if rows_per_page or days_per_page:
+        written = []
+        for fmt in formats:
+            written += export_pages(tasks, colors, title or stem, today_date or dt.date.today(),
+                                    os.path.join(out_dir, f"{name}.{fmt}"),
+                                    rows_per_page or max(len(tasks), 1), days_per_page,
+                                    size, dpi)
+        return written
+    outputs = [(os.path.join(out_dir, f"{name}.{fmt}"), fmt) for fmt in formats]
+    export_chart(tasks, colors, title or stem,
+                 today_date or dt.date.today(), outputs, size, dpi,
+                 cache=ExportCache() if cache else None)
+    return [out_path for out_path, _ in outputs]
+
+def render_job(file_path, options):
+    """
+    Worker process entry point: render one file and time it.  Errors are
+    returned rather than raised so that one bad plan doesn't stop the batch.
+
+    Parameters:
+    file_path (string): the project (.ods or .fgantt) file
+    options (dict): keyword arguments for render_plan
+
+    Returns:
+    tuple: (file_path, files written, seconds taken, error message or None)
+    """
+    start = time.perf_counter()
+    try:
+        outputs = render_plan(file_path, **options)
+    except Exception as e: # pylint: disable=broad-exception-caught
+        return file_path, [], time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    return file_path, outputs, time.perf_counter() - start, None
+
+def render_all(files, options, jobs=None):
+    """
+    Render many project files, in parallel when jobs > 1.  Each file gets
+    its own output name (see output_names), so no two overwrite each other.
+
+    Parameters:
+    files (list): the project files (a file given twice is rendered once)
+    options (dict): keyword arguments for render_plan
+    jobs (int): number of worker processes, defaults to the number of CPUs
+
+    Yields:
+    tuple: the result of render_job for each file, as they finish
+
+    Raises:
+    ValueError: if the files' charts can't be given distinct names
+    """
+    seen = set()
+    files = [path for path in files
+             if os.path.abspath(path) not in seen and not seen.add(os.path.abspath(path))]
+    names = output_names(files)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(files) == 1:
+        for file_path in files:
+            yield render_job(file_path, dict(options, name=names[file_path]))
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(files))) as pool:
+        futures = [pool.submit(render_job, file_path, dict(options, name=names[file_path]))
+                   for file_path in files]
+        for future in as_completed(futures):
+            yield future.result()
+
+def parse_date(text):
+    """
+    argparse type for YYYY-MM-DD dates
+    """
+    return dt.datetime.strptime(text, '%Y-%m-%d').date()
+
+def main(argv=None):
+    """
+    Command line entry point
+
+    Returns:
+    int: exit status, 1 if any plan failed to render
+    """
+    parser = argparse.ArgumentParser(description="Render Gantt Charts from project files")
+    parser.add_argument('files', nargs='+', help="project files (.ods or .fgantt)")
+    parser.add_argument('-f', '--format', dest='formats', nargs='+', default=['png'],
+                        help="output formats, e.g. png svg pdf (default: png)")
+    parser.add_argument('-o', '--out-dir', default='.', help="folder for the charts")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--title', help="chart title (default: the file name)")
+    parser.add_argument('--today', type=parse_date, help='date of the "today" line, YYYY-MM-DD')
+    parser.add_argument('--size', type=float, nargs=2, default=(16, 9),
+                        metavar=('WIDTH', 'HEIGHT'), help="figure size in inches")
+    parser.add_argument('--dpi', type=float, default=100, help="resolution of bitmap formats")
+    parser.add_argument('--preset', choices=[name for name, preset in EXPORT_PRESETS.items()
+                                             if preset is not None],
+                        help="a standard size and dpi, instead of --size and --dpi")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always draw the charts, don't use the export cache")
+    parser.add_argument('--rows-per-page', type=int, help="split each chart into pages of "
+                        "this many tasks (a multi-page pdf, or numbered tiles)")
+    parser.add_argument('--days-per-page', type=float,
+                        help="split each chart into pages of this many days")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    size, dpi = EXPORT_PRESETS[args.preset] if args.preset else (tuple(args.size), args.dpi)
+    options = {'out_dir': args.out_dir, 'formats': args.formats, 'title': args.title,
+               'today_date': args.today, 'size': size, 'dpi': dpi, 'cache': not args.no_cache,
+               'rows_per_page': args.rows_per_page, 'days_per_page': args.days_per_page}
+    done = failed = 0
+    start = time.perf_counter()
+    try:
+        # (a name clash is found before any plan is rendered)
+        for file_path, outputs, seconds, error in render_all(args.files, options, args.jobs):
+            if error is None:
+                done += 1
+                print(f"{file_path}: {seconds:.2f}s -> {', '.join(outputs)}")
+            else:
+                failed += 1
+                print(f"{file_path}: FAILED after {seconds:.2f}s: {error}", file=sys.stderr)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"rendered {done}/{done + failed} plans "
+          f"in {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,370 @@
+"""
+FasttGantt: benchmarks of the slow paths, on synthetic plans of any size
+
+Generates random (but realistic: dependencies only on earlier tasks, so no
+cycles) plans, times loading, recalculating, adding and editing tasks,
+drawing, saving and exporting them at several sizes, and writes the results
+to JSON so runs can be compared over time, e.g.
+
+    python gantt_bench.py generate big.ods --tasks 5000 --deps 1.5
+    python gantt_bench.py run --sizes 100 1000 10000 --out before.json
+    python gantt_bench.py run --sizes 100 1000 10000 --out after.json
+    python gantt_bench.py compare before.json after.json
+
+Runs headless with matplotlib's Agg canvas, timing the operations behind each
+of the app's methods.  With --tk (which needs a display, e.g. under xvfb-run)
+the app itself is built and its methods are timed, widgets and all.
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+from gantt_io import load_plan, save_plan
+from gantt_store import TaskStore
+
+SIZES = [100, 1000, 10000]
+REPEAT = 3
+# the ODS writer is slow, don't save or load plans bigger than this as ODS
+MAX_ODS_TASKS = 20000
+
+def synthetic_plan(num_tasks, dependency_density=1.0, num_teams=8, span_days=365,
+                   seed=0, start='2024-01-01'):
+    """
+    A random plan.  Tasks are in start date order and only depend on
+    earlier tasks (mostly nearby ones), so the dependencies never form a cycle.
+
+    Parameters:
+    num_tasks (int): number of tasks
+    dependency_density (float): average number of dependencies per task
+    num_teams (int): number of teams
+    span_days (int): days from the first start to the last
+    seed (int): random seed, the same seed gives the same plan
+    start (string): date the plan starts
+
+    Returns:
+    TaskStore: the plan (.to_dataframe() for a DataFrame, save_plan for a file)
+    """
+    rng = np.random.default_rng(seed)
+    span_days = max(span_days, 2)
+    durations = rng.integers(1, max(span_days // 20, 2), num_tasks, endpoint=True)
+    starts = np.sort(rng.integers(0, span_days, num_tasks))
+    origin = np.datetime64(start, 'D')
+    names = np.array([f"Task {i}" for i in range(num_tasks)], dtype=object)
+    counts = rng.poisson(dependency_density, num_tasks)
+    counts[0] = 0
+    dependencies = []
+    for row, count in enumerate(counts):
+        # up to `count` distinct tasks from the (up to) 50 before this one
+        earlier = rng.integers(max(row - 50, 0), row, count) if row else []
+        dependencies.append([names[dep] for dep in sorted(set(earlier))])
+    return TaskStore.from_columns(names, [f"Team {k}" for k in range(num_teams)],
+                                  rng.integers(0, num_teams, num_tasks),
+                                  origin + starts.astype('timedelta64[D]'),
+                                  origin + (starts + durations - 1).astype('timedelta64[D]'),
+                                  rng.random(num_tasks).round(2), dependencies)
+
+def time_call(func, repeat=REPEAT, setup=None):
+    """
+    Time a function
+
+    Parameters:
+    func (function): the function to time, called with no arguments
+    repeat (int): how many times to call it
+    setup (function): called (untimed) before each call
+
+    Returns:
+    list: seconds taken by each call
+    """
+    seconds = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+class AggBench:
+    """
+    The operations behind the app's methods, on an off-screen Agg canvas
+    (the same chart code as the app, without the Tk widgets)
+    """
+    def __init__(self):
+        # pylint: disable=import-outside-toplevel
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from gantt_chart import GanttChart, assign_team_colors
+        self.assign_team_colors = assign_team_colors
+        self.figure = Figure(figsize=(16, 9))
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.chart = GanttChart(self.figure, self.figure.add_subplot())
+        self.chart.attach(self.canvas)
+        self.tasks = None
+        self.team_colors = {}
+
+    def set_plan(self, tasks):
+        """
+        Make a plan the one being worked on
+        """
+        self.tasks = tasks
+        self.team_colors = self.assign_team_colors(list(tasks.teams))
+
+    def draw_gantt_chart(self):
+        """
+        Draw the whole chart
+        """
+        self.chart.rebuild(self.tasks, self.team_colors, "Benchmark", dt.date(2024, 7, 1))
+        self.canvas.draw()
+
+    def add_task(self, name, team, start, end):
+        """
+        Add a task and redraw the chart, as the app's add_task does
+        """
+        self.tasks.append(name, team, start, end, 0.2, [])
+        self.draw_gantt_chart()
+
+    def edit_task(self, row, start, end):
+        """
+        Move a task and update the chart, as the app's edit_task does
+        """
+        self.tasks.set_task(row, start=start, end=end)
+        if not self.chart.update_tasks(self.tasks, [row], self.team_colors):
+            self.draw_gantt_chart()
+
+class TkBench:
+    """
+    The app itself, its methods called as if the buttons had been clicked
+    (needs a display)
+    """
+    def __init__(self):
+        # pylint: disable=import-outside-toplevel
+        import tkinter as tk
+        from gantt_generator import GanttChartApp
+        self.root = tk.Tk()
+        # the app loads ./default_plan.ods on startup
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        self.app = GanttChartApp(self.root)
+        self.root.update()  # runs init_chart
+
+    def set_plan(self, tasks):
+        """
+        Make a plan the one being worked on
+        """
+        self.app.show_plan(tasks)
+        self.app.team_colors = self.app.assign_colors_for_team()
+        self.root.update()
+
+    def draw_gantt_chart(self):
+        """
+        Draw the whole chart
+        """
+        self.app.draw_gantt_chart()
+        self.root.update_idletasks()
+
+    def update_treeview(self):
+        """
+        Fill the task list from scratch
+        """
+        app = self.app
+        app.tree.delete(*app.tree.get_children())
+        app.tree_items.clear()
+        app.tree_values.clear()
+        app.tree_order.clear()
+        app.update_treeview()
+        self.root.update_idletasks()
+
+    def fill_entries(self, name, team, start, end):
+        """
+        Type a task into the entry boxes
+        """
+        app = self.app
+        days = int((end - start) / np.timedelta64(1, 'D'))
+        for entry, text in ((app.task_name, name), (app.task_start, str(start)),
+                            (app.task_duration, str(days))):
+            entry.delete(0, 'end')
+            entry.insert(0, text)
+        app.team_var.set(team)
+
+    def add_task(self, name, team, start, end):
+        """
+        Click "Add Task"
+        """
+        self.fill_entries(name, team, start, end)
+        self.app.add_task()
+        self.root.update_idletasks()
+
+    def edit_task(self, row, start, end):
+        """
+        Select a task, change its dates and click "Edit Task"
+        """
+        tasks = self.app.tasks
+        self.app.pre_edit_name = tasks.get(row, 'task')
+        self.fill_entries(tasks.get(row, 'task'), tasks.get(row, 'team'), start, end)
+        self.app.edit_task()
+        self.root.update_idletasks()
+
+    @property
+    def tasks(self):
+        """
+        The app's tasks
+        """
+        return self.app.tasks
+
+    @property
+    def team_colors(self):
+        """
+        The app's team colors
+        """
+        return self.app.team_colors
+
+def run_benchmarks(bench, sizes=SIZES, repeat=REPEAT, dependency_density=1.0, num_teams=8,
+                   span_days=365, formats=('png', 'svg'), work_dir=None):
+    """
+    Time each operation on plans of each size
+
+    Parameters:
+    bench (AggBench or TkBench): what to run the operations on
+    sizes (list): numbers of tasks
+    repeat (int): times to run each operation
+    dependency_density, num_teams, span_days: passed on to synthetic_plan
+    formats (list): export formats to time
+    work_dir (string): folder for the files saved and loaded, a temporary one if None
+
+    Yields:
+    dict: one result, {'tasks', 'benchmark', 'seconds' (each run), 'best', 'median'}
+    """
+    # pylint: disable=import-outside-toplevel
+    from gantt_export import export_chart
+    from gantt_schedule import schedule
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = work_dir or temp_dir
+        for num_tasks in sizes:
+            def result(name, seconds, num_tasks=num_tasks):
+                return {'tasks': num_tasks, 'benchmark': name, 'seconds': seconds,
+                        'best': min(seconds), 'median': statistics.median(seconds)}
+            plan = synthetic_plan(num_tasks, dependency_density, num_teams, span_days)
+            extensions = ['.fgantt'] + (['.ods'] if num_tasks <= MAX_ODS_TASKS else [])
+            for ext in extensions:
+                path = os.path.join(work_dir, f"bench{num_tasks}{ext}")
+                yield result(f"save_file ({ext[1:]})", time_call(lambda: save_plan(plan, path),
+                                                                 repeat))
+                yield result(f"load_file ({ext[1:]})", time_call(lambda: load_plan(path),
+                                                                 repeat))
+            bench.set_plan(plan.copy())
+            yield result("recalculate_task_attributes", time_call(bench.tasks.recalculate,
+                                                                  repeat))
+            yield result("draw_gantt_chart", time_call(bench.draw_gantt_chart, repeat))
+            if isinstance(bench, TkBench):
+                yield result("update_treeview", time_call(bench.update_treeview, repeat))
+            one_day = np.timedelta64(1, 'D')
+            middle = len(bench.tasks) // 2
+            start = bench.tasks.get(middle, 'start')
+            end = bench.tasks.get(middle, 'end')
+            added = iter(range(repeat))
+            yield result("add_task", time_call(
+                lambda: bench.add_task(f"Bench task {next(added)}", plan.teams[0], start, end),
+                repeat))
+            moves = iter(range(1, repeat + 1))
+            def edit():
+                days = next(moves) % 2 * one_day  # there and back
+                bench.edit_task(middle, start + days, end + days)
+            yield result("edit_task", time_call(edit, repeat))
+            yield result("critical_path", time_call(lambda: schedule(bench.tasks), repeat))
+            colors = dict(bench.team_colors)
+            for fmt in formats:
+                path = os.path.join(work_dir, f"bench{num_tasks}.{fmt}")
+                yield result(f"export ({fmt})", time_call(
+                    lambda: export_chart(bench.tasks, colors, "Benchmark", dt.date(2024, 7, 1),
+                                         [(path, fmt)]), repeat))
+
+def environment():
+    """
+    What the benchmarks ran on, to go with the results
+    """
+    # pylint: disable=import-outside-toplevel
+    import matplotlib
+    return {'date': dt.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__, 'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine()}
+
+def compare(old, new):
+    """
+    Print how long each benchmark took in two runs (best times) and the speedup
+
+    Parameters:
+    old, new (dict): results as saved by main's run command
+    """
+    before = {(r['tasks'], r['benchmark']): r['best'] for r in old['results']}
+    print(f"{'benchmark':32} {'tasks':>7} {'before':>9} {'after':>9} {'speedup':>8}")
+    for r in new['results']:
+        key = (r['tasks'], r['benchmark'])
+        if key in before:
+            print(f"{r['benchmark']:32} {r['tasks']:>7} {before[key]:>8.4f}s {r['best']:>8.4f}s "
+                  f"{before[key] / max(r['best'], 1e-9):>7.2f}x")
+
+def main(argv=None):
+    """
+    Command line entry point
+    """
+    parser = argparse.ArgumentParser(description="FasttGantt benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+    plan_options = argparse.ArgumentParser(add_help=False)
+    plan_options.add_argument('--deps', type=float, default=1.0,
+                              help="average dependencies per task (default: 1)")
+    plan_options.add_argument('--teams', type=int, default=8, help="number of teams")
+    plan_options.add_argument('--days', type=int, default=365, help="days the plan spans")
+    generate = commands.add_parser('generate', parents=[plan_options],
+                                   help="write a synthetic plan (.ods or .fgantt)")
+    generate.add_argument('file')
+    generate.add_argument('--tasks', type=int, default=1000, help="number of tasks")
+    generate.add_argument('--seed', type=int, default=0)
+    run = commands.add_parser('run', parents=[plan_options], help="run the benchmarks")
+    run.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                     help="numbers of tasks to benchmark")
+    run.add_argument('--repeat', type=int, default=REPEAT, help="runs of each benchmark")
+    run.add_argument('--formats', nargs='+', default=['png', 'svg'], help="export formats")
+    run.add_argument('--out', help="JSON file for the results")
+    run.add_argument('--tk', action='store_true',
+                     help="time the app itself, with its widgets (needs a display)")
+    comparison = commands.add_parser('compare', help="compare two JSON result files")
+    comparison.add_argument('before')
+    comparison.add_argument('after')
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        tasks = synthetic_plan(args.tasks, args.deps, args.teams, args.days, args.seed)
+        save_plan(tasks, args.file)
+        print(f"{args.file}: {len(tasks)} tasks")
+        return 0
+    if args.command == 'compare':
+        with open(args.before, encoding='utf-8') as old, \
+             open(args.after, encoding='utf-8') as new:
+            compare(json.load(old), json.load(new))
+        return 0
+    if not args.tk:
+        import matplotlib # pylint: disable=import-outside-toplevel
+        matplotlib.use('Agg')
+    bench = TkBench() if args.tk else AggBench()
+    report = {'environment': environment(), 'mode': 'tk' if args.tk else 'agg',
+              'options': {'deps': args.deps, 'teams': args.teams, 'days': args.days,
+                          'repeat': args.repeat},
+              'results': []}
+    for result in run_benchmarks(bench, args.sizes, args.repeat, args.deps, args.teams,
+                                 args.days, args.formats):
+        print(f"{result['benchmark']:32} {result['tasks']:>7} tasks  "
+              f"best {result['best']:.4f}s  median {result['median']:.4f}s", flush=True)
+        report['results'].append(result)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=1)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
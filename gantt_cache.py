@@ -0,0 +1,173 @@
+"""
+FasttGantt: on-disk cache of parsed project files
+
+Parsing a large .ods plan is slow, so the parsed task table is kept in a
+local cache (in the native .fgantt format, which loads quickly) and reused
+when the same file is opened again.  Entries are keyed by the file's
+content hash; the path, mtime and size of each file seen are remembered so
+that an unchanged file isn't even re-hashed.  The cache is limited in size,
+the least recently used entries are evicted first.
+"""
+import hashlib
+import json
+import os
+import time
+from gantt_io import NATIVE_VERSION, is_native, load_native, load_plan, save_native
+from gantt_timing import timings
+
+CACHE_VERSION = 1
+CACHE_BYTES = 64 * 1024 * 1024
+
+def default_cache_dir():
+    """
+    The folder for the cache, under $XDG_CACHE_HOME (or ~/.cache)
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'fasttgantt')
+
+def file_hash(file_path):
+    """
+    sha256 of the contents of a file, as hex
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class PlanCache:
+    """
+    A size limited LRU cache of parsed plans, stored in a folder as
+    <content hash>.fgantt files plus an index.json of:
+      files: absolute path -> [mtime_ns, size, content hash]
+      entries: content hash -> [bytes, last used time]
+    The cache is only an optimization: if it can't be read or written the
+    plan is just parsed as normal.
+    """
+    def __init__(self, directory=None, max_bytes=CACHE_BYTES):
+        """
+        Parameters:
+        directory (string): cache folder, defaults to default_cache_dir()
+        max_bytes (int): total size of the cached plans to keep
+        """
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.directory, 'index.json')
+        self.files = {}
+        self.entries = {}
+        self.read_index()
+
+    def read_index(self):
+        """
+        Load index.json, starting afresh if it's missing, corrupt or out of date
+        """
+        try:
+            with open(self.index_path, encoding='utf-8') as file:
+                index = json.load(file)
+            if index.get('version') != [CACHE_VERSION, NATIVE_VERSION]:
+                return
+            self.files = index['files']
+            self.entries = index['entries']
+        except (OSError, ValueError, KeyError):
+            self.files = {}
+            self.entries = {}
+
+    def write_index(self):
+        """
+        Save index.json (via a temporary file so a crash can't leave half an index)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.index_path + f'.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'version': [CACHE_VERSION, NATIVE_VERSION],
+                       'files': self.files, 'entries': self.entries}, file)
+        os.replace(temp_path, self.index_path)
+
+    def entry_path(self, key):
+        """
+        File holding the cached plan for a content hash
+        """
+        return os.path.join(self.directory, key + '.fgantt')
+
+    def key(self, file_path):
+        """
+        The content hash of a file, re-hashing it only if its path, mtime or
+        size don't match what was seen before
+
+        Returns:
+        string: the hash
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        seen = self.files.get(path)
+        if seen is not None and seen[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return seen[2]
+        key = file_hash(path)
+        self.files[path] = [stat.st_mtime_ns, stat.st_size, key]
+        return key
+
+    def load(self, file_path, progress=None):
+        """
+        Load a plan, from the cache if the file hasn't changed since it was
+        last parsed (native .fgantt files are fast already and aren't cached)
+
+        Parameters:
+        file_path (string): the project file
+        progress (function): passed on to load_plan if the file has to be parsed
+
+        Returns:
+        TaskStore: the tasks in the file
+        """
+        if is_native(file_path):
+            return load_plan(file_path)
+        key = None
+        try:
+            key = self.key(file_path)
+            if key in self.entries:
+                with timings.phase('load'):
+                    tasks = load_native(self.entry_path(key))
+                self.entries[key][1] = time.time()
+                self.write_index()
+                return tasks
+        except (OSError, ValueError, KeyError):
+            # a missing or broken entry, parse the file again below
+            self.entries.pop(key, None)
+        tasks = load_plan(file_path, progress)
+        self.store(file_path, tasks)
+        return tasks
+
+    def store(self, file_path, tasks):
+        """
+        Cache the parsed tasks of a project file, e.g. after it's been saved
+
+        Parameters:
+        file_path (string): the project file, as it is on disk now
+        tasks (TaskStore): the tasks in it
+        """
+        if is_native(file_path):
+            return
+        try:
+            key = self.key(file_path)
+            os.makedirs(self.directory, exist_ok=True)
+            save_native(tasks, self.entry_path(key))
+            self.entries[key] = [os.path.getsize(self.entry_path(key)), time.time()]
+            self.evict()
+            self.write_index()
+        except OSError:
+            pass
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in max_bytes
+        """
+        total = sum(size for size, _ in self.entries.values())
+        for key in sorted(self.entries, key=lambda k: self.entries[k][1]):
+            if total <= self.max_bytes:
+                break
+            total -= self.entries.pop(key)[0]
+            try:
+                os.remove(self.entry_path(key))
+            except OSError:
+                pass
+        live = set(self.entries)
+        self.files = {path: seen for path, seen in self.files.items() if seen[2] in live}
@@ -0,0 +1,925 @@
+"""
+FasttGantt: the Gantt Chart drawing, kept as a retained set of artists
+"""
+from functools import lru_cache
+import matplotlib.patches as matplotptchs
+from matplotlib import colormaps
+from matplotlib.collections import LineCollection, PathCollection, PolyCollection
+from matplotlib.colors import to_rgba, to_rgba_array
+from matplotlib.figure import Figure
+from matplotlib.gridspec import GridSpec
+from matplotlib.ticker import MaxNLocator
+from matplotlib.lines import Line2D
+from matplotlib.path import Path
+from matplotlib.transforms import IdentityTransform
+import numpy as np
+from gantt_load import team_load
+from gantt_timing import timings
+
+#style:
+BAR_HEIGHT = 0.65  # Adjust this value as needed
+# the background used to be two overlapping bars at alpha=0.4,
+# a single layer at the combined alpha looks the same
+BACKGROUND_ALPHA = 1 - (1 - 0.4)**2
+ARROW_STYLE = {"linewidths":2, "colors":'black', "alpha":0.65}
+# arrow heads are open chevrons in points (so they don't stretch with the axes)
+ARROW_HEAD_SIZE = 6
+ARROW_HEADS = {True: Path([(-0.5, 1.0), (0.0, 0.0), (0.5, 1.0)]),    # pointing down
+               False: Path([(-0.5, -1.0), (0.0, 0.0), (0.5, -1.0)])} # pointing up
+# critical path highlighting: critical tasks get a red outline and the slack
+# of the others is a dotted line from the end of the bar to its latest finish
+CRITICAL_STYLE = {"linewidths":3, "edgecolors":'red'}
+SLACK_STYLE = {"linewidths":2.5, "colors":'grey', "linestyles":'dotted'}
+# level of detail: below DENSITY_ROW_PX pixels a row the tasks are drawn as
+# team density bands (in DENSITY_BIN_PX wide steps), and the row labels
+# (LABEL_FILL of the row height, at most 18pt) are hidden below MIN_LABEL_SIZE
+DENSITY_ROW_PX = 3
+DENSITY_BIN_PX = 4
+LABEL_FILL = 0.8
+MIN_LABEL_SIZE = 6
+# team load panel: its height relative to the chart's, and the over-allocated
+# part of a team's load (above its capacity) is filled in red
+LOAD_PANEL_RATIO = (4, 1)
+LOAD_HEADROOM = 1.15
+OVER_STYLE = {"facecolors":'red', "alpha":0.5}
+CAPACITY_STYLE = {"color":'red', "linestyle":'dashed', "linewidth":1}
+# with more tasks than this the legend goes in a fixed corner
+MAX_BEST_LEGEND = 200
+# days shown on the time axis of a plan with no tasks
+EMPTY_DAYS = 30
+# viewport scrolling and zooming
+SCROLL_STEP = 0.1   # of the view per mouse wheel step
+ZOOM_STEP = 0.8     # view size multiplier per wheel step (control + wheel)
+MIN_VIEW_ROWS = 3
+MIN_VIEW_DAYS = 7
+# time axis ticks, finest first: (unit, about how many days apart), and the
+# closest the tick labels may be in pixels
+TICK_UNITS = [('day', 1), ('week', 7), ('month', 30.44), ('quarter', 91.31)]
+MIN_TICK_PX = 45
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+def tick_unit(days, width_px):
+    """
+    Pick the time axis tick spacing for the span in view
+
+    Parameters:
+    days (float): number of days in view
+    width_px (float): width of the axes in pixels
+
+    Returns:
+    tuple: (unit, stride), e.g. ('quarter', 2) for every other quarter
+    """
+    px_per_day = width_px / max(days, 1)
+    for unit, unit_days in TICK_UNITS:
+        if unit_days * px_per_day >= MIN_TICK_PX:
+            return unit, 1
+    unit, unit_days = TICK_UNITS[-1]
+    return unit, int(np.ceil(MIN_TICK_PX / (unit_days * px_per_day)))
+
+@lru_cache(maxsize=256)
+def time_ticks(unit, stride, origin, first, last):
+    """
+    The tick dates and labels between two dates.  Weeks are counted from
+    the start of the project, months and quarters start on the 1st.  The
+    results are memoized, so redrawing, scrolling back or zooming back
+    reuses the labels.
+
+    Parameters:
+    unit (string): 'day', 'week', 'month' or 'quarter'
+    stride (int): label every stride-th unit
+    origin (datetime64[D]): start of the project
+    first, last (datetime64[D]): the dates in view
+
+    Returns:
+    tuple: (days from origin of each tick (array), labels (tuple))
+    """
+    if unit in ('day', 'week'):
+        step = stride * (7 if unit == 'week' else 1)
+        offsets = np.arange(-(-(first - origin).astype(int) // step) * step,
+                            (last - origin).astype(int) + 1, step)
+        dates = origin + offsets.astype('timedelta64[D]')
+        text = np.datetime_as_string(dates)
+        labels = tuple(f"{day[8:10]}/{day[5:7]}" for day in text)
+    else:
+        months = np.arange(first.astype('datetime64[M]'), last.astype('datetime64[M]') + 1)
+        months = months[months.astype('datetime64[D]') >= first]
+        number = months.astype(int)  # months since 1970
+        if unit == 'quarter':
+            months = months[number % (3 * stride) == 0]
+            number = months.astype(int)
+            labels = tuple(f"Q{m % 12 // 3 + 1} {1970 + m // 12}" for m in number)
+        else:
+            months = months[number % stride == 0]
+            labels = tuple(f"{MONTHS[m % 12]} {1970 + m // 12}" for m in months.astype(int))
+        offsets = (months.astype('datetime64[D]') - origin).astype(int)
+    offsets.flags.writeable = False
+    return offsets, labels
+
+def bar_vertices(lefts, widths, y_positions, height=BAR_HEIGHT):
+    """
+    Build the corners of a set of horizontal bars
+
+    Parameters:
+    lefts (ndarray): x position of the left edge of each bar
+    widths (ndarray): width of each bar
+    y_positions (ndarray): y position of the centre of each bar
+    height (float): height of the bars
+
+    Returns:
+    ndarray: (N, 4, 2) array of vertices for a PolyCollection
+    """
+    rights = lefts + widths
+    tops = y_positions - height / 2
+    bottoms = y_positions + height / 2
+    return np.stack([np.column_stack([lefts, tops]),
+                     np.column_stack([rights, tops]),
+                     np.column_stack([rights, bottoms]),
+                     np.column_stack([lefts, bottoms])], axis=1)
+
+def team_rgba(tasks, team_colors):
+    """
+    Look up the team color of every task in one pass
+
+    Parameters:
+    tasks (TaskStore): the tasks
+    team_colors (dict): team name -> matplotlib color
+
+    Returns:
+    ndarray: (N, 4) array of RGBA colors, one row per task
+    """
+    # (teams no longer in the team list can't be assigned to a task)
+    palette = to_rgba_array([team_colors.get(tm, 'none') for tm in tasks.teams])
+    return palette[tasks.team_codes]
+
+def assign_team_colors(team):
+    """
+    Sets a color for each member of the team
+
+    Parameters:
+    team (list): names of the teams/people on the project
+
+    Returns:
+    dict: team name -> color
+    """
+    #qualitative_colors = cm.Dark2.colors + cm.Set3.colors
+    qualitative_colors = colormaps['Dark2'].colors + colormaps['Set3'].colors
+    num_cols = len(qualitative_colors)
+    if len(team) >  num_cols:
+        print("warning: more team members than colors! Some will repeat")
+    offset = 0
+    team_colors = {}
+    for i, tm in enumerate(team):
+        team_colors[tm] = qualitative_colors[(i+offset)%num_cols]
+    return team_colors
+
+def draw_figure(tasks, team_colors, title, today_date, size=(16, 9), dpi=100, schedule=None):
+    """
+    Draw a Gantt Chart on a new off-screen figure (safe to use off the Tk thread)
+
+    Parameters:
+    tasks (TaskStore): the tasks
+    team_colors (dict): team name -> color
+    title (string): chart title
+    today_date (date): where to draw the red "today" line
+    size (tuple): figure (width, height) in inches
+    dpi (float): resolution of bitmap formats
+    schedule (Schedule): highlight the critical path from this schedule, if given
+
+    Returns:
+    Figure: the chart, ready for savefig
+    """
+    figure = Figure(figsize=size, dpi=dpi)
+    chart = GanttChart(figure, figure.add_subplot())
+    chart.rebuild(tasks, team_colors, title, today_date, schedule)
+    return figure
+
+class GanttChart:
+    """
+    Retained-mode model of the Gantt Chart drawn on a matplotlib Axes.
+
+    Slot i of each bar layer (one PolyCollection per layer) holds the task in
+    row i of the table, and each dependency arrow is kept by its
+    (dependency, task) edge.  Editing a task moves only its own slot and
+    arrows, then blits them over a cached copy of the rest of the chart
+    instead of clearing and rebuilding the Axes.
+    """
+    def __init__(self, figure, ax):
+        """
+        Parameters:
+        figure (Figure): the figure holding the chart
+        ax (Axes): the axes to draw the chart on
+        """
+        self.figure = figure
+        self.ax = ax
+        self.canvas = None
+        self.layers = {}
+        self.names = []   # task name in each slot
+        self.rows = {}    # task name -> slot
+        self.lefts = np.empty(0)   # left end of the bar in each slot
+        self.rights = np.empty(0)  # right end of the bar in each slot
+        self.arrow_keys = []  # (dependency, task) edge drawn by each arrow
+        self.arrow_index = {} # (dependency, task) -> position in arrow_keys
+        self.edges = {}       # task name -> the arrow keys touching it
+        self.span = None  # (first start, last end) the axes were laid out for
+        self.team_colors = {}
+        self.background = None
+        self.scheduled = False  # showing the critical path
+        self.args = None     # what the chart was last rebuilt from
+        self.tasks = None
+        self.schedule = None
+        self.view = None     # (first row, last row, first x, last x) in view, None for all
+        self.dense = False   # drawing team density bands rather than tasks
+        self.shown = np.empty(0, dtype=int)  # rows of the tasks drawn
+        self.row_px = 0.0    # height of a row in pixels
+        self.label_size = 0  # font size of the row labels, 0 if hidden
+        self.bottom_row = 0
+        self.today_text = None
+        self.load_ax = None        # axes of the team load panel, None if hidden
+        self.load_capacity = None  # see gantt_load.team_load
+        self.load_layers = {}
+        self.load_background = None
+
+    def attach(self, canvas):
+        """
+        Blit task updates onto canvas.  The background is re-cached every time
+        the canvas does a full draw (e.g. on resize), and the time axis is
+        re-ticked to fit the new width on resize.  The mouse wheel scrolls
+        and zooms the view.
+
+        Parameters:
+        canvas (FigureCanvasAgg): canvas showing self.figure
+        """
+        self.canvas = canvas
+        canvas.mpl_connect('draw_event', self.on_draw)
+        canvas.mpl_connect('scroll_event', self.on_scroll)
+        canvas.mpl_connect('resize_event', self.on_resize)
+
+    def on_resize(self, event):
+        """
+        Pick the time axis ticks again for the new width (the canvas redraws
+        after a resize)
+        """
+        if self.tasks is not None:
+            self.set_time_ticks()
+
+    def on_draw(self, event):
+        """
+        Cache everything except the tasks, then draw the tasks on top
+        """
+        if self.canvas.is_saving():
+            return  # savefig draws the (animated) tasks itself
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        if self.load_ax is not None:
+            self.load_background = self.canvas.copy_from_bbox(self.load_ax.bbox)
+        self.draw_tasks()
+
+    def draw_tasks(self):
+        """
+        Draw the (animated) bar and arrow layers
+        """
+        for layer in self.layers.values():
+            self.ax.draw_artist(layer)
+        for layer in self.load_layers.values():
+            self.load_ax.draw_artist(layer)
+
+    def refresh(self):
+        """
+        Show the current task artists, blitting over the cached background
+        """
+        if self.canvas is None:
+            return
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        if self.load_ax is not None:
+            self.canvas.restore_region(self.load_background)
+        self.draw_tasks()
+        self.canvas.blit(self.ax.bbox)
+        if self.load_ax is not None:
+            self.canvas.blit(self.load_ax.bbox)
+
+    def rebuild(self, tasks, team_colors, title, today_date, schedule=None):
+        """
+        Clear the axes and draw the whole chart from the task table
+
+        Parameters:
+        tasks (TaskStore): the tasks
+        team_colors (dict): team name -> matplotlib color
+        title (string): chart title
+        today_date (date): where to draw the red "today" line
+        schedule (Schedule): highlight the critical tasks and show the slack, if given
+        """
+        self.args = (tasks, team_colors, title, today_date, schedule)
+        self.tasks = tasks
+        self.schedule = schedule
+        patches = []
+        for member, c in team_colors.items():
+            patches.append(matplotptchs.Patch(color=c))
+        labels = list(team_colors.keys())
+        self.ax.clear()
+        self.layers = {}
+        self.background = None
+        if not len(tasks):
+            self.draw_empty(title)
+            return
+        if self.load_ax is not None:
+            with timings.phase('draw/load'):
+                self.draw_load()
+        self.team_colors = dict(team_colors)
+        self.names = tasks['task'].tolist()
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self.span = (tasks.origin, tasks['end'].max())
+        if self.view is not None:
+            self.view = self.clamp_view(*self.view)
+        with timings.phase('draw/artists'):
+            self.draw_view()
+        self.ax.set_title(title, fontsize=18)
+        # 3
+        #TODO: sort earliest date to include the today date
+        if self.view is not None:
+            self.ax.set_xlim(self.view[2], self.view[3])
+        # 6
+        self.ax.xaxis.grid(True, alpha=0.5)
+        if self.scheduled:
+            patches.append(matplotptchs.Patch(facecolor='none',
+                                              edgecolor=CRITICAL_STYLE['edgecolors'],
+                                              linewidth=CRITICAL_STYLE['linewidths']))
+            patches.append(Line2D([], [], color=SLACK_STYLE['colors'],
+                                  linewidth=SLACK_STYLE['linewidths'],
+                                  linestyle=SLACK_STYLE['linestyles']))
+            labels += ['critical path', 'slack']
+        # Adding a legend (a fixed corner, 'best' has to look at every bar)
+        self.ax.legend(handles=patches, labels=labels, fontsize=11,
+                       loc='best' if len(tasks) <= MAX_BEST_LEGEND else 'upper right')
+        # Marking the current date on the chart
+        horizontal_position = (np.datetime64(today_date, 'D') - tasks.origin).astype(int)
+        self.ax.axvline(x=horizontal_position, color='r', linestyle='dashed')
+        # (clipped, it may be out of view)
+        self.today_text = self.ax.text(x=horizontal_position + 0.5, y=self.bottom_row + 0.5,
+                                       s=today_date, color='r', clip_on=True)
+        # Adjust the subplot parameters to reduce the space on the RHS
+        self.figure.subplots_adjust(left=0.1, right=0.85, top=0.9, bottom=0.1)
+        # (once everything that can widen the dates in view, e.g. today, is drawn)
+        with timings.phase('draw/ticks'):
+            self.set_time_ticks()
+
+        # Adjust the layout to have the graph area around the categories
+        self.ax.spines['left'].set_visible(False)  # Hide the left spine
+        self.ax.spines['right'].set_visible(False)  # Hide the right spine
+        self.ax.spines['top'].set_visible(False)  # Hide the top spine
+        self.ax.yaxis.tick_left()  # Move the y-ticks to the left side
+        # 'magic' command to make everything fit properly
+        with timings.phase('draw/layout'):
+            self.figure.tight_layout()
+
+    def draw_empty(self, title):
+        """
+        Draw a plan with no tasks (e.g. once they've all been deleted): just
+        the title and an empty time axis, no bars, today line or legend
+        """
+        self.team_colors = {}
+        self.names = []
+        self.rows = {}
+        self.lefts = np.empty(0)
+        self.rights = np.empty(0)
+        self.span = None
+        self.view = None
+        self.dense = False
+        self.scheduled = False
+        self.shown = np.empty(0, dtype=int)
+        self.arrow_keys = []
+        self.arrow_index = {}
+        self.edges = {}
+        self.today_text = None
+        if self.load_ax is not None:
+            self.load_ax.clear()
+            self.load_layers = {}
+            self.load_background = None
+        self.ax.set_title(title, fontsize=18)
+        self.ax.set_xlim(0, EMPTY_DAYS)
+        self.ax.set_ylim(1, 0)
+        self.ax.set_xticks([])
+        self.ax.set_yticks([])
+        self.ax.text(0.5, 0.5, "No tasks", transform=self.ax.transAxes,
+                     ha='center', va='center', color='grey', fontsize=14)
+        self.figure.tight_layout()
+
+    def draw_view(self):
+        """
+        (Re)create the task artists for the part of the plan in view.  Only
+        the tasks in the rows and dates in view get bars and arrows; if the
+        rows would be too thin to see, each team is drawn instead as a band
+        shaded by how many of its tasks are on at each date.
+        """
+        tasks = self.tasks
+        for layer in self.layers.values():
+            layer.remove()
+        self.layers = {}
+        num_tasks = len(tasks)
+        lefts = tasks['days_to_start'] + 1.0
+        widths = tasks['task_duration'].astype(float)
+        self.lefts = lefts
+        self.rights = lefts + widths
+        if self.view is None:
+            first, last = 0, num_tasks
+        else:
+            first, last = int(np.floor(self.view[0])), int(np.ceil(self.view[1]))
+        in_view = np.arange(max(first, 0), min(last, num_tasks))
+        self.bottom_row = last - 1
+        row_px = self.ax.bbox.height / max(last - first, 1)
+        self.row_px = row_px
+        self.dense = row_px < DENSITY_ROW_PX
+        if self.dense:
+            self.draw_density(in_view)
+            return
+        animated = self.canvas is not None
+        if self.view is None:
+            shown = in_view
+        else:
+            shown = in_view[(self.rights[in_view] > self.view[2]) &
+                            (lefts[in_view] < self.view[3])]
+        self.shown = shown
+        done = tasks['completion_days'][shown]
+        colors = team_rgba(tasks, self.team_colors)[shown]
+        background = colors.copy()
+        background[:, 3] = BACKGROUND_ALPHA
+        bar_verts = bar_vertices(lefts[shown], widths[shown], shown)
+        self.layers = {
+            'background': PolyCollection(bar_verts, facecolors=background, edgecolors='none'),
+            'outline': PolyCollection(bar_verts, facecolors='none', edgecolors=colors,
+                                      linewidths=1.75),
+            'progress': PolyCollection(bar_vertices(lefts[shown], done, shown),
+                                       facecolors=colors, edgecolors='none'),
+            'arrows': LineCollection([], **ARROW_STYLE),
+            'heads': PathCollection([], sizes=[ARROW_HEAD_SIZE**2], offsets=np.empty((0, 2)),
+                                    offset_transform=self.ax.transData,
+                                    facecolors='none', edgecolors=ARROW_STYLE['colors'],
+                                    linewidths=ARROW_STYLE['linewidths'],
+                                    alpha=ARROW_STYLE['alpha']),
+        }
+        self.layers['heads'].set_transform(IdentityTransform())
+        schedule = self.schedule
+        self.scheduled = schedule is not None
+        if self.scheduled:
+            slack = shown[schedule.slack[shown] > 0]
+            finish = schedule.latest_finish[slack] + 1.0
+            self.layers['slack'] = LineCollection(
+                np.stack([np.column_stack([self.rights[slack], slack]),
+                          np.column_stack([finish, slack])], axis=1), **SLACK_STYLE)
+            self.layers['critical'] = PolyCollection(bar_verts[schedule.critical[shown]],
+                                                     facecolors='none', **CRITICAL_STYLE)
+        # like barh, don't pad the axis to the left of the first bar
+        if len(shown):
+            self.layers['background'].sticky_edges.x.append(lefts[shown].min())
+        for name, layer in self.layers.items():
+            layer.set_animated(animated)
+            # the arrows always lie between the bars, so leave the limits alone
+            self.ax.add_collection(layer, autolim=name not in ('arrows', 'heads', 'slack'))
+        if self.view is None:
+            self.ax.autoscale_view()
+            # 2
+            if not self.ax.yaxis_inverted():
+                self.ax.invert_yaxis()
+        else:
+            self.ax.set_ylim(self.view[1] - 0.5, self.view[0] - 0.5)
+            self.ax.set_xlim(self.view[2], self.view[3])
+        # 5
+        self.set_row_labels(in_view, [self.names[row] for row in in_view], row_px)
+        # Add the dependency arrows (into the tasks in view)
+        self.set_arrows([(dependency, self.names[row]) for row in in_view
+                         for dependency in tasks.get(row, 'dependencies')
+                         if dependency in self.rows])
+
+    def draw_density(self, in_view):
+        """
+        Level-of-detail drawing for when the rows are too thin: one swimlane
+        per team, shaded by the number of the team's tasks (in the rows in
+        view) that are on at each date
+
+        Parameters:
+        in_view (array): rows of the tasks in view
+        """
+        tasks = self.tasks
+        self.shown = np.empty(0, dtype=int)
+        self.scheduled = False
+        teams = tasks.teams
+        if self.view is None:
+            x0 = self.lefts.min(initial=0)
+            x1 = self.rights.max(initial=1)
+        else:
+            x0, x1 = self.view[2], self.view[3]
+        bins = max(int(self.ax.bbox.width / DENSITY_BIN_PX), 1)
+        edges = np.linspace(x0, x1, bins + 1)
+        codes = tasks.team_codes[in_view]
+        # +1 where a task starts, -1 after it ends, then a running total
+        first = np.clip(np.searchsorted(edges, self.lefts[in_view], 'right') - 1, 0, bins)
+        after = np.clip(np.searchsorted(edges, self.rights[in_view], 'left'), 0, bins)
+        counts = np.zeros((len(teams), bins + 1))
+        np.add.at(counts, (codes, first), 1)
+        np.add.at(counts, (codes, after), -1)
+        counts = np.cumsum(counts, axis=1)[:, :bins]
+        image = np.zeros((len(teams), bins, 4))
+        image[:] = to_rgba_array([self.team_colors.get(tm, 'none') for tm in teams])[:, None]
+        image[..., 3] *= counts / max(counts.max(), 1)
+        self.layers = {'density': self.ax.imshow(image, extent=(x0, x1, len(teams) - 0.5, -0.5),
+                                                 aspect='auto', interpolation='nearest',
+                                                 animated=self.canvas is not None)}
+        self.ax.set_xlim(x0, x1)
+        self.ax.set_ylim(len(teams) - 0.5, -0.5)
+        self.bottom_row = len(teams) - 1
+        self.set_row_labels(np.arange(len(teams)), teams, self.ax.bbox.height / max(len(teams), 1))
+        self.arrow_keys = []
+        self.arrow_index = {}
+        self.edges = {}
+
+    def set_time_ticks(self):
+        """
+        Tick the time axis by day, week, month or quarter, whichever fits the
+        dates in view, creating only the ticks in view
+        """
+        origin = self.tasks.origin
+        if origin is None:
+            return
+        x0, x1 = self.ax.get_xlim()
+        # a date's left edge is at x = days from origin + 1
+        first = origin + np.timedelta64(int(np.ceil(x0 - 1)), 'D')
+        last = origin + np.timedelta64(int(np.floor(x1 - 1)), 'D')
+        unit, stride = tick_unit(x1 - x0, self.ax.bbox.width)
+        offsets, labels = time_ticks(unit, stride, origin, first, last)
+        self.ax.set_xticks(offsets + 1, labels)
+
+    def set_row_labels(self, positions, labels, row_px):
+        """
+        Label the rows, at a size that fits the rows (and not at all if
+        that would be too small to read)
+
+        Parameters:
+        positions (array): y position of each row
+        labels (list): label of each row
+        row_px (float): height of a row in pixels
+        """
+        size = min(18, LABEL_FILL * row_px * 72 / self.figure.dpi)
+        if size < MIN_LABEL_SIZE:
+            self.label_size = 0
+            self.ax.set_yticks([])
+            return
+        self.label_size = size
+        self.ax.set_yticks(positions)
+        self.ax.set_yticklabels(labels)
+        # Increase the font size of the y-labels
+        self.ax.tick_params(axis='y', labelsize=size)  # Set the font size as desired
+
+    def full_view(self):
+        """
+        Returns:
+        tuple: (first row, last row, first x, last x) of the whole plan
+        """
+        return (0, len(self.names), self.lefts.min(initial=0), self.rights.max(initial=1))
+
+    def clamp_view(self, first, last, left, right):
+        """
+        Keep a view inside the plan, None if that's the whole plan
+
+        Returns:
+        tuple: (first row, last row, first x, last x), or None
+        """
+        full_first, full_last, full_left, full_right = self.full_view()
+        rows = min(last - first, full_last - full_first)
+        first = min(max(first, full_first), full_last - rows)
+        days = min(right - left, full_right - full_left)
+        left = min(max(left, full_left), full_right - days)
+        if rows >= full_last - full_first and days >= full_right - full_left:
+            return None
+        return (first, first + rows, left, left + days)
+
+    def set_view(self, view, clamp=True):
+        """
+        Show part of the plan
+
+        Parameters:
+        view (tuple): (first row, last row, first x, last x), or None for everything
+        clamp (bool): keep the view inside the plan, False e.g. for the last
+                      page of an export to be part empty like any other
+        """
+        if not self.layers and not self.names:
+            return
+        if view is not None and clamp:
+            view = self.clamp_view(*view)
+        if view is None:
+            if self.view is not None:
+                self.view = None
+                self.rebuild(*self.args)
+                if self.canvas is not None:
+                    self.canvas.draw_idle()
+            return
+        self.view = view
+        self.background = None
+        layout = (self.dense, self.label_size)
+        with timings.phase('view'):
+            self.draw_view()
+            self.set_time_ticks()
+        self.today_text.set_y(self.bottom_row + 0.5)
+        if (self.dense, self.label_size) != layout:
+            self.figure.tight_layout()  # make room for the new row labels
+        if self.canvas is not None:
+            self.canvas.draw_idle()
+
+    def on_scroll(self, event):
+        """
+        Mouse wheel: scroll through the tasks, with shift scroll through
+        time, with control zoom in or out around the mouse pointer
+        """
+        if event.inaxes is not self.ax or not self.names:
+            return
+        first, last, left, right = self.view or self.full_view()
+        key = event.key or ''
+        if 'control' in key or 'ctrl' in key:
+            scale = ZOOM_STEP ** event.step
+            x = event.xdata
+            # in the density view y is the teams, so zoom the rows about the middle
+            y = (first + last) / 2 if self.dense else event.ydata + 0.5
+            rows = max((last - first) * scale, MIN_VIEW_ROWS)
+            days = max((right - left) * scale, MIN_VIEW_DAYS)
+            first = y - (y - first) * rows / (last - first)
+            left = x - (x - left) * days / (right - left)
+            last, right = first + rows, left + days
+        elif 'shift' in key:
+            shift = -event.step * SCROLL_STEP * (right - left)
+            left, right = left + shift, right + shift
+        else:
+            shift = -event.step * max(1, round(SCROLL_STEP * (last - first)))
+            first, last = first + shift, last + shift
+        self.set_view((first, last, left, right))
+
+    def set_title(self, title):
+        """
+        Change the chart title without touching the tasks
+        """
+        self.ax.set_title(title, fontsize=18)
+        if self.canvas is not None:
+            self.canvas.draw_idle()
+
+    def arrow_geometry(self, keys):
+        """
+        Route the arrows of a set of edges from the current bar positions.
+        An arrow runs along the middle of the dependency's bar row from its end,
+        then straight down (or up) to the top left corner of the task's bar.
+
+        Parameters:
+        keys (list): (dependency, task) edges
+
+        Returns:
+        tuple: (E, 3, 2) array of arrow lines, (E, 2) array of arrow tips and
+               a boolean array, True where the arrow points down the chart
+        """
+        src = np.array([self.rows[dependency] for dependency, task in keys], dtype=int)
+        dst = np.array([self.rows[task] for dependency, task in keys], dtype=int)
+        starts = np.column_stack([self.rights[src], src])
+        tips = np.column_stack([self.lefts[dst], dst - BAR_HEIGHT / 2])
+        corners = np.column_stack([tips[:, 0], starts[:, 1]])
+        return np.stack([starts, corners, tips], axis=1), tips, tips[:, 1] > starts[:, 1]
+
+    def set_arrows(self, keys):
+        """
+        Draw the arrows of all the dependency edges in one pass
+
+        Parameters:
+        keys (list): (dependency, task) edges
+        """
+        self.arrow_keys = list(keys)
+        self.arrow_index = {key: k for k, key in enumerate(self.arrow_keys)}
+        self.edges = {}
+        for key in self.arrow_keys:
+            self.edges.setdefault(key[0], set()).add(key)
+            self.edges.setdefault(key[1], set()).add(key)
+        lines, tips, down = self.arrow_geometry(self.arrow_keys)
+        self.layers['arrows'].set_segments(lines)
+        self.layers['heads'].set_offsets(tips)
+        self.layers['heads'].set_paths([ARROW_HEADS[d] for d in down])
+
+    def move_arrows(self, keys):
+        """
+        Re-route the arrows of some edges after their bars moved
+
+        Parameters:
+        keys (iterable): (dependency, task) edges that are already drawn
+        """
+        keys = list(keys)
+        if not keys:
+            return
+        lines, tips, down = self.arrow_geometry(keys)
+        arrow_paths = self.layers['arrows'].get_paths()
+        head_paths = self.layers['heads'].get_paths()
+        offsets = np.array(self.layers['heads'].get_offsets())
+        for key, line, tip, d in zip(keys, lines, tips, down):
+            k = self.arrow_index[key]
+            arrow_paths[k].vertices = line
+            head_paths[k] = ARROW_HEADS[d]
+            offsets[k] = tip
+        self.layers['arrows'].stale = True
+        self.layers['heads'].set_paths(head_paths)
+        self.layers['heads'].set_offsets(offsets)
+
+    def set_bar(self, slot, row, color):
+        """
+        Move and recolour the bars in a slot
+
+        Parameters:
+        slot (int): position of the task in the chart
+        row (TaskRow): the task's row of the table
+        color (tuple): RGBA color of the task's team
+        """
+        left = row['days_to_start'] + 1
+        verts = bar_vertices(np.array([left, left], dtype=float),
+                             np.array([row['task_duration'], row['completion_days']],
+                                      dtype=float),
+                             np.array([slot, slot], dtype=float))
+        for name, corners in (('background', verts[0]), ('outline', verts[0]),
+                              ('progress', verts[1])):
+            path = self.layers[name].get_paths()[slot]
+            path.vertices = np.vstack([corners, corners[:1]])
+        self.lefts[slot] = left
+        self.rights[slot] = left + row['task_duration']
+        background = self.layers['background'].get_facecolor().copy()
+        background[slot] = color
+        background[slot, 3] = BACKGROUND_ALPHA
+        self.layers['background'].set_facecolor(background)
+        outline = self.layers['outline'].get_edgecolor().copy()
+        outline[slot] = color
+        self.layers['outline'].set_edgecolor(outline)
+        progress = self.layers['progress'].get_facecolor().copy()
+        progress[slot] = color
+        self.layers['progress'].set_facecolor(progress)
+
+    def update_tasks(self, tasks, positions, team_colors):
+        """
+        Update only the bars and arrows of the tasks in the given rows.
+
+        Parameters:
+        tasks (TaskStore): the tasks, after the edit
+        positions (list): row positions of the tasks that changed
+        team_colors (dict): team name -> matplotlib color
+
+        Returns:
+        bool: False if the edit changed the layout (number of tasks, project
+              dates, teams or a task name) and the chart needs a rebuild.
+              Always False when showing the critical path (an edit can
+              change the slack of any task) or only part of the plan.
+        """
+        if not self.layers or self.scheduled or self.view is not None or self.dense or \
+           len(tasks) != len(self.names) or \
+           team_colors != self.team_colors or \
+           (tasks.origin, tasks['end'].max()) != self.span:
+            return False
+        new_names = {slot: tasks.get(slot, 'task') for slot in positions}
+        if set(new_names.values()) != {self.names[slot] for slot in positions}:
+            # a rename, other tasks may still refer to the old name
+            return False
+        relabel = False
+        for slot, name in new_names.items():
+            if self.names[slot] != name:
+                relabel = True
+                self.names[slot] = name
+                self.rows[name] = slot
+        for slot, name in new_names.items():
+            row = tasks.row(slot)
+            self.set_bar(slot, row, to_rgba(team_colors[row['team']]))
+        rewired = False
+        for slot, name in new_names.items():
+            wanted = {(dependency, name) for dependency in tasks.get(slot, 'dependencies')
+                      if dependency in self.rows}
+            drawn = {key for key in self.edges.get(name, ()) if key[1] == name}
+            rewired = rewired or wanted != drawn
+        if rewired:
+            self.set_arrows([(dependency, task)
+                             for task, dependencies in zip(self.names, tasks['dependencies'])
+                             for dependency in dependencies if dependency in self.rows])
+        else:
+            self.move_arrows(set().union(*(self.edges.get(name, ())
+                                           for name in new_names.values())))
+        redraw = False
+        if relabel:
+            self.set_row_labels(np.arange(len(self.names)), self.names, self.row_px)
+            redraw = True
+        if self.load_ax is not None and not self.update_load():
+            redraw = True  # the load panel needs rescaling
+        if redraw:
+            if self.canvas is not None:
+                self.canvas.draw_idle()
+            return True
+        self.refresh()
+        return True
+
+    def show_load(self, capacity):
+        """
+        Show or hide the team load panel under the chart: how many tasks
+        each team has on at each date, over-allocated days in red
+
+        Parameters:
+        capacity (int or dict): tasks a team can have on at once, see
+                                gantt_load.team_load, or None to hide the panel
+        """
+        if capacity is None and self.load_ax is None:
+            return
+        self.load_capacity = capacity
+        if capacity is None:
+            self.figure.delaxes(self.load_ax)
+            self.load_ax = None
+            self.load_layers = {}
+            self.load_background = None
+            self.ax.set_subplotspec(GridSpec(1, 1, figure=self.figure)[0])
+        elif self.load_ax is None:
+            grid = GridSpec(2, 1, figure=self.figure, height_ratios=LOAD_PANEL_RATIO)
+            self.ax.set_subplotspec(grid[0])
+            self.load_ax = self.figure.add_subplot(grid[1], sharex=self.ax)
+        if self.args is not None:
+            self.rebuild(*self.args)
+            if self.canvas is not None:
+                self.canvas.draw_idle()
+
+    def load_artists(self, load):
+        """
+        Geometry of the load panel: a step line per team and a red box over
+        each over-allocated day, from the team's capacity up to its load
+
+        Parameters:
+        load (TeamLoad): the load
+
+        Returns:
+        tuple: (line vertices (teams, points, 2), box vertices (boxes, 4, 2))
+        """
+        # a day's left edge is at x = days from origin + 1
+        edges = np.arange(load.load.shape[1] + 1) + load.first_day + 1.0
+        steps = np.empty(load.load.shape + (2, 2))
+        steps[..., 0, 0] = edges[:-1]
+        steps[..., 1, 0] = edges[1:]
+        steps[..., 1] = load.load[..., None]
+        team, day = np.nonzero(load.over)
+        left = edges[day]
+        bottom = load.capacity[team].astype(float)
+        top = load.load[team, day].astype(float)
+        boxes = np.stack([np.column_stack([left, bottom]), np.column_stack([left, top]),
+                          np.column_stack([left + 1, top]), np.column_stack([left + 1, bottom])],
+                         axis=1)
+        return steps.reshape(len(load.teams), -1, 2), boxes
+
+    def load_top(self, load):
+        """
+        Top of the load panel's y axis for a load
+        """
+        return max(load.load.max(initial=0), load.capacity.max(initial=0)) * LOAD_HEADROOM + 0.5
+
+    def draw_load(self):
+        """
+        (Re)draw the team load panel from scratch
+        """
+        ax = self.load_ax
+        ax.clear()  # (also shares the time axis with the chart again)
+        load = team_load(self.tasks, self.load_capacity)
+        lines, boxes = self.load_artists(load)
+        animated = self.canvas is not None
+        colors = [self.team_colors.get(tm, 'none') for tm in load.teams]
+        self.load_layers = {
+            'load': LineCollection(lines, colors=colors, linewidths=1.5, animated=animated),
+            'over': PolyCollection(boxes, animated=animated, **OVER_STYLE),
+            'label': ax.text(0.005, 0.95, '', transform=ax.transAxes, va='top', color='red',
+                             animated=animated),
+        }
+        # (not autolim: the chart's bars set the time axis)
+        ax.add_collection(self.load_layers['load'], autolim=False)
+        ax.add_collection(self.load_layers['over'], autolim=False)
+        self.set_load_label(load)
+        for capacity in np.unique(load.capacity):
+            ax.axhline(capacity, **CAPACITY_STYLE)
+        ax.set_ylim(0, self.load_top(load))
+        ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+        ax.set_ylabel('tasks on')
+        ax.xaxis.grid(True, alpha=0.5)
+        ax.spines['right'].set_visible(False)
+        ax.spines['top'].set_visible(False)
+
+    def set_load_label(self, load):
+        """
+        Say how many days are over-allocated
+        """
+        over = len(load.over_allocated_days())
+        self.load_layers['label'].set_text(f"over-allocated on {over} days" if over else '')
+
+    def update_load(self):
+        """
+        Recalculate the team load after an edit and update the panel in place
+
+        Returns:
+        bool: False if the panel needs redrawing (its scale changed)
+        """
+        load = team_load(self.tasks, self.load_capacity)
+        lines, boxes = self.load_artists(load)
+        if len(lines) != len(self.load_layers['load'].get_segments()) or \
+           self.load_ax.get_ylim()[1] != self.load_top(load):
+            self.draw_load()
+            return False
+        self.load_layers['load'].set_segments(lines)
+        self.load_layers['over'].set_verts(boxes)
+        self.set_load_label(load)
+        return True
@@ -0,0 +1,273 @@
+"""
+FasttGantt: exporting the chart to image and vector files
+
+Exports are drawn off-screen on their own figure (never the one on screen),
+at a size and resolution from EXPORT_PRESETS.  The chart is laid out once
+and then written in every format asked for.  Each file written is also kept
+in a cache keyed by a hash of everything that affects the picture (the
+tasks, title, team colours, today line, critical path option, size and dpi),
+so exporting a plan that hasn't changed again is just a file copy.
+
+Plans too big for one page can be exported a page at a time instead (see
+export_pages), as a multi-page PDF or as a set of PNG tiles.
+"""
+import hashlib
+import os
+import shutil
+import numpy as np
+from gantt_cache import default_cache_dir
+from gantt_timing import timings
+
+# name -> ((width, height) in inches, dpi); None for the size of the chart on screen
+EXPORT_PRESETS = {
+    'Screen': None,
+    'HD 1920x1080': ((19.2, 10.8), 100),
+    'Slide 16:9': ((13.33, 7.5), 150),
+    'A4 landscape': ((11.69, 8.27), 200),
+    'A3 landscape': ((16.54, 11.69), 200),
+    'Poster 300dpi': ((33.11, 23.39), 300),
+}
+EXPORT_CACHE_BYTES = 256 * 1024 * 1024
+ROWS_PER_PAGE = 40
+
+def export_format(file_path, file_format=None):
+    """
+    The format to write a file in, from its extension if not given
+    """
+    return (file_format or os.path.splitext(file_path)[1][1:] or 'png').lower()
+
+def chart_hash(tasks, team_colors, title, today_date, size, dpi, critical=False):
+    """
+    A hash of everything that goes into an exported chart
+
+    Parameters:
+    tasks (TaskStore): the tasks
+    team_colors (dict): team name -> color
+    title (string): chart title
+    today_date (date): date of the red "today" line
+    size (tuple): figure (width, height) in inches
+    dpi (float): resolution
+    critical (bool): whether the critical path is shown
+
+    Returns:
+    string: sha256, as hex
+    """
+    digest = hashlib.sha256()
+    for column in ('start', 'end', 'completion_frac'):
+        digest.update(np.ascontiguousarray(tasks[column]).tobytes())
+    digest.update(np.ascontiguousarray(tasks.team_codes).tobytes())
+    # \x1f and \x1e (unit/record separators) won't be in any name
+    digest.update('\x1f'.join(tasks['task']).encode())
+    digest.update('\x1e'.join('\x1f'.join(deps) for deps in tasks['dependencies']).encode())
+    digest.update(repr((tasks.teams, sorted(team_colors.items()), title, str(today_date),
+                        tuple(float(x) for x in size), float(dpi), bool(critical))).encode())
+    return digest.hexdigest()
+
+class ExportCache:
+    """
+    A size limited cache of exported charts, stored in a folder as
+    <chart hash>.<format> files.  A file's mtime is when it was last used,
+    the least recently used are evicted first.  There's no index, so
+    several processes (e.g. gantt_batch workers) can share the folder.
+    """
+    def __init__(self, directory=None, max_bytes=EXPORT_CACHE_BYTES):
+        """
+        Parameters:
+        directory (string): cache folder, defaults to exports/ in default_cache_dir()
+        max_bytes (int): total size of the cached files to keep
+        """
+        self.directory = directory or os.path.join(default_cache_dir(), 'exports')
+        self.max_bytes = max_bytes
+
+    def entry_path(self, key, file_format):
+        """
+        File holding a cached chart
+        """
+        return os.path.join(self.directory, f"{key}.{file_format}")
+
+    def lookup(self, key, file_format):
+        """
+        The cached chart for a hash and format, marking it as just used
+
+        Returns:
+        string: the cached file, or None if it isn't in the cache
+        """
+        entry = self.entry_path(key, file_format)
+        try:
+            os.utime(entry)
+        except OSError:
+            return None
+        return entry
+
+    def store(self, key, file_format, file_path):
+        """
+        Keep a copy of a chart that's just been written to file_path
+        """
+        entry = self.entry_path(key, file_format)
+        temp_path = entry + f'.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            shutil.copyfile(file_path, temp_path)
+            os.replace(temp_path, entry)
+            self.evict()
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def evict(self):
+        """
+        Remove the least recently used files until the cache fits in max_bytes
+        """
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+def export_chart(tasks, team_colors, title, today_date, outputs, size=(16, 9), dpi=100,
+                 schedule=None, cache=None, write=None, progress=None):
+    """
+    Export the chart to one or more files.  The chart is only drawn if one
+    of them isn't in the cache, and then only once for all of them.
+
+    Parameters:
+    tasks (TaskStore): the tasks
+    team_colors (dict): team name -> color
+    title (string): chart title
+    today_date (date): where to draw the red "today" line
+    outputs (list): (file path, format) to write, format None to go by the extension
+    size (tuple): figure (width, height) in inches
+    dpi (float): resolution of bitmap formats
+    schedule (Schedule): highlight the critical path from this schedule, if given
+    cache (ExportCache): where to look for and keep exported charts, None for no caching
+    write (function): write(file_path, save) to write each file, save(path)
+                      does the writing, e.g. to write via replace_file
+    progress (function): progress(fraction, message) as the files are written
+
+    Returns:
+    list: the files that came from the cache
+    """
+    write = write or (lambda file_path, save: save(file_path))
+    key = None
+    if cache is not None:
+        key = chart_hash(tasks, team_colors, title, today_date, size, dpi, schedule is not None)
+    figure = None
+    cached = []
+    for k, (file_path, file_format) in enumerate(outputs):
+        file_format = export_format(file_path, file_format)
+        if progress is not None:
+            progress(k / len(outputs), "Writing " + file_path)
+        entry = None if cache is None else cache.lookup(key, file_format)
+        if entry is not None:
+            write(file_path, lambda path, entry=entry: shutil.copyfile(entry, path))
+            cached.append(file_path)
+            continue
+        with timings.phase('export'):
+            if figure is None:
+                # matplotlib is slow to import, only do it if there's drawing to do
+                from gantt_chart import draw_figure # pylint: disable=import-outside-toplevel
+                figure = draw_figure(tasks, team_colors, title, today_date, size, dpi,
+                                     schedule)
+            write(file_path, lambda path, fmt=file_format: figure.savefig(path, format=fmt))
+        if cache is not None:
+            cache.store(key, file_format, file_path)
+    return cached
+
+def page_views(num_rows, left, right, rows_per_page=ROWS_PER_PAGE, days_per_page=None):
+    """
+    Split a plan into pages: rows_per_page tasks by days_per_page days each
+
+    Parameters:
+    num_rows (int): number of tasks
+    left, right (float): x range of the whole plan
+    rows_per_page (int): tasks on each page
+    days_per_page (float): days on each page, None for all of them
+
+    Returns:
+    list: (first row, last row, first x, last x) of each page, across then down
+    """
+    days_per_page = days_per_page or right - left
+    row_starts = range(0, max(num_rows, 1), rows_per_page)
+    x_starts = np.arange(left, right, days_per_page) if right > left else [left]
+    return [(first, first + rows_per_page, x, x + days_per_page)
+            for first in row_starts for x in x_starts]
+
+def tile_path(file_path, row_page, date_page):
+    """
+    File name of one tile, e.g. plan_r01_c02.png for the first rows, second dates
+    """
+    stem, ext = os.path.splitext(file_path)
+    return f"{stem}_r{row_page + 1:02d}_c{date_page + 1:02d}{ext}"
+
+def export_pages(tasks, team_colors, title, today_date, file_path, rows_per_page=ROWS_PER_PAGE,
+                 days_per_page=None, size=(11.69, 8.27), dpi=100, schedule=None, write=None,
+                 progress=None):
+    """
+    Export the chart a page at a time, each page a full chart (title, legend,
+    task names and dates) of rows_per_page tasks by days_per_page days.  A
+    .pdf file gets one page each, otherwise each page is written to its own
+    tile file (see tile_path).  Only one page-sized figure is drawn at a
+    time, so the memory used doesn't grow with the size of the plan.
+
+    Parameters:
+    tasks (TaskStore): the tasks
+    team_colors (dict): team name -> color
+    title (string): chart title
+    today_date (date): where to draw the red "today" line
+    file_path (string): the .pdf file, or the name the tiles are numbered from
+    rows_per_page (int): tasks on each page
+    days_per_page (float): days on each page, None for all of them
+    size (tuple): page (width, height) in inches
+    dpi (float): resolution of bitmap formats
+    schedule (Schedule): highlight the critical path from this schedule, if given
+    write (function): write(file_path, save) to write each file, see export_chart
+    progress (function): progress(fraction, message) as the pages are written
+
+    Returns:
+    list: the files written
+    """
+    # pylint: disable=import-outside-toplevel
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+    from gantt_chart import GanttChart
+    write = write or (lambda file_path, save: save(file_path))
+    figure = Figure(figsize=size, dpi=dpi)
+    chart = GanttChart(figure, figure.add_subplot())
+    chart.rebuild(tasks, team_colors, title, today_date, schedule)
+    _, _, left, right = chart.full_view()
+    views = page_views(len(tasks), left, right, rows_per_page, days_per_page)
+    across = len(views) // -(-max(len(tasks), 1) // rows_per_page)  # pages per row of pages
+
+    def draw_page(k):
+        if progress is not None:
+            progress(k / len(views), f"Drawing page {k + 1} of {len(views)}")
+        chart.set_view(views[k], clamp=False)
+        if len(views) > 1:
+            chart.set_title(f"{title} ({k + 1}/{len(views)})")
+        figure.tight_layout()  # each page has its own task names
+
+    if export_format(file_path) == 'pdf':
+        def save(path):
+            with PdfPages(path) as pdf:
+                for k in range(len(views)):
+                    draw_page(k)
+                    pdf.savefig(figure)
+        write(file_path, save)
+        return [file_path]
+    written = []
+    for k in range(len(views)):
+        draw_page(k)
+        path = tile_path(file_path, k // across, k % across)
+        write(path, figure.savefig)
+        written.append(path)
+    return written
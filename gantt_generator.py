@@ -1,14 +1,29 @@
 """
 FasttGantt: A Gantt Chart graphic generator
+
+matplotlib (and pandas) are slow to import, so they are only imported once
+the window is up, see GanttChartApp.init_chart.
 """
+import time
+STARTED = time.perf_counter()
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, PhotoImage
 import datetime as dt
-import matplotlib.pyplot as plt
-import matplotlib.patches as matplotptchs
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import pandas as pd
+import os
 import numpy as np
+from gantt_cache import PlanCache
+from gantt_export import EXPORT_PRESETS, ROWS_PER_PAGE, ExportCache, export_chart, export_pages
+from gantt_io import save_plan
+from gantt_load import TEAM_CAPACITY
+from gantt_redraw import CHART, DATA, LAYOUT, SELECTION, TREE, RedrawScheduler
+from gantt_schedule import CycleError, DependencyGraph, push_dependents, schedule
+from gantt_store import TaskStore
+from gantt_timing import start_profile, stop_profile, timed, timings
+from gantt_undo import HISTORY_LIMIT, Journal, ValueDelta
+from gantt_worker import BackgroundJob, replace_file
+
+STATUS_MS = 500  # how often the timings status bar is refreshed
+DANGLING_SHOWN = 10  # unknown dependencies listed when a plan is loaded
 
 # TODO: sort earliest dateto include the today date
 # TODO: subtask
@@ -146,6 +161,58 @@ class AboutDialog(tk.Toplevel):
         method to open a link in the dialog box.
         """
 
+class ProgressDialog(tk.Toplevel):
+    """
+    Shows the progress of a background job, with a button to cancel it.
+    The dialog grabs input, so the plan can't be edited while the job runs.
+    """
+    def __init__(self, parent, title, cancel):
+        """
+        Parameters:
+        parent : the root tk object
+        title (string): what the job is doing, e.g. "Saving"
+        cancel : function called when the Cancel button is clicked
+        """
+        super().__init__(parent)
+        self.title(title)
+        self.resizable(False, False)
+        self.transient(parent)
+        self.cancel = cancel
+        self.label = ttk.Label(self, text=title + "...")
+        self.label.pack(padx=20, pady=10)
+        self.bar = ttk.Progressbar(self, length=300, maximum=1.0, mode='indeterminate')
+        self.bar.pack(padx=20, pady=5)
+        self.bar.start()
+        self.cancel_button = ttk.Button(self, text="Cancel", command=self.cancel_clicked)
+        self.cancel_button.pack(pady=10)
+        self.protocol("WM_DELETE_WINDOW", self.cancel_clicked)
+        self.grab_set()
+
+    def set_progress(self, fraction, message=None):
+        """
+        Show how far the job has got
+
+        Parameters:
+        fraction (float): 0 to 1, or None if not known
+        message (string): what it's doing now
+        """
+        if message:
+            self.label.config(text=message + "...")
+        if fraction is None:
+            return
+        if str(self.bar['mode']) != 'determinate':
+            self.bar.stop()
+            self.bar.config(mode='determinate')
+        self.bar['value'] = fraction
+
+    def cancel_clicked(self):
+        """
+        Ask the job to stop, it closes the dialog once it has
+        """
+        self.label.config(text="Cancelling...")
+        self.cancel_button.state(['disabled'])
+        self.cancel()
+
 class GanttChartApp:
     """
     A Simple Gannt Chart creating program
@@ -162,27 +229,39 @@ class GanttChartApp:
         Create the window and setup
         """
         self.root = tkwin
+        self.startup_times = [('imports', time.perf_counter() - STARTED)]
+        phase_start = time.perf_counter()
+        self.chart = None  # created by init_chart once the window is showing
+        self.job = None    # the BackgroundJob running, if any
+        self.graph = None  # DependencyGraph of self.tasks, see dependency_graph
+        self.team_capacity = TEAM_CAPACITY  # tasks a team can have on at once
+        # handlers mark what needs refreshing, it's refreshed once when idle
+        self.redraw = RedrawScheduler(self.root, self.refresh)
+        # undo history of the plan, each handler commits its changes as a step
+        self.journal = Journal(int(os.environ.get('FASTTGANTT_UNDO_LIMIT', HISTORY_LIMIT)))
         self.selected_tasks = None
+        self.bulk_tasks = []  # names of the other tasks selected with Ctrl/Shift-click
         self.dependee = None
         self.pre_edit_name = None
-        self.task_was_start = None
         # Set up the window close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         # Set up the window
         self.root.title("Gantt Chart Generator")
         self.project_title = 'Project Management of an Example Project'
-        #self.df = pd.read_excel("./default_plan.ods", engine='odf', index_col=0)
+        self.plan_cache = PlanCache()
+        self.export_cache = ExportCache()
         try:
             self.load_file("./default_plan.ods")
         except FileNotFoundError:
             # handle exception
             tk.messagebox.showwarning(title="Unkonwn loading Error",
                                       message="Error loading default project")
-            self.df = pd.DataFrame()
+            self.set_plan(TaskStore())
             self.team = []
         self.recalculate_task_attributes()
         self.today_date = dt.date.today()
-        self.team_colors = self.assign_colors_for_team()
+        self.team_colors = {}
+        phase_start = self.startup_phase('load plan', phase_start)
 
         # Create menu
         self.menu = tk.Menu(self.root)
@@ -192,14 +271,64 @@ class GanttChartApp:
         file_menu.add_command(label="Save", command=self.save_file)
         file_menu.add_command(label="Export Image", command=self.export_image)
         file_menu.add_command(label="Export Graphic", command=self.save_plot)
+        file_menu.add_command(label="Export PNG, SVG and PDF", command=self.export_all)
+        file_menu.add_command(label="Export Pages", command=self.export_paged)
+        self.export_preset = tk.StringVar(self.root, value='Screen')
+        size_menu = tk.Menu(file_menu, tearoff=0)
+        for preset in EXPORT_PRESETS:
+            size_menu.add_radiobutton(label=preset, variable=self.export_preset, value=preset)
+        file_menu.add_cascade(label="Export Size", menu=size_menu)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.on_closing)
         self.menu.add_cascade(label="File", menu=file_menu)
         edit_menu = tk.Menu(self.menu, tearoff=0)
+        edit_menu.configure(postcommand=lambda: self.update_undo_menu(edit_menu))
+        edit_menu.add_command(label="Undo", command=self.undo, accelerator="Ctrl+Z")
+        edit_menu.add_command(label="Redo", command=self.redo, accelerator="Ctrl+Y")
+        # (with Caps Lock on the keys come as Z and Y, and Shift has to be
+        # asked for, or Ctrl+Z would redo)
+        for key in ("z", "Z"):
+            self.root.bind(f"<Control-{key}>", self.undo)
+            self.root.bind(f"<Control-Shift-{key}>", self.redo)
+        for key in ("y", "Y"):
+            self.root.bind(f"<Control-{key}>", self.redo)
+        edit_menu.add_separator()
         edit_menu.add_command(label="Set Title", command=self.set_title)
         edit_menu.add_command(label="Set Date Today" , command=self.set_current_date)
         edit_menu.add_command(label="Add/Remove Teams", command=self.show_team_manager)
+        edit_menu.add_separator()
+        self.show_critical = tk.BooleanVar(self.root, value=False)
+        edit_menu.add_checkbutton(label="Show Critical Path", variable=self.show_critical,
+                                  command=lambda: self.redraw.mark(LAYOUT))
+        # when on, editing a task moves the tasks that depend on it out of its way
+        self.auto_schedule = tk.BooleanVar(self.root, value=False)
+        edit_menu.add_checkbutton(label="Auto-schedule Dependents", variable=self.auto_schedule)
+        # panel under the chart of how many tasks each team has on each day
+        self.show_load = tk.BooleanVar(self.root, value=False)
+        edit_menu.add_checkbutton(label="Show Team Load", variable=self.show_load,
+                                  command=self.toggle_load)
+        edit_menu.add_command(label="Set Team Capacity", command=self.set_team_capacity)
+        edit_menu.add_separator()
+        # the mouse wheel scrolls the chart (shift: through time, control: zoom)
+        edit_menu.add_command(label="Zoom to Fit", command=self.zoom_to_fit)
+        edit_menu.add_separator()
+        self.show_timings = tk.BooleanVar(self.root, value=timings.enabled)
+        edit_menu.add_checkbutton(label="Show Timings", variable=self.show_timings,
+                                  command=self.toggle_timings)
         self.menu.add_cascade(label="Edit", menu=edit_menu)
+        # edits of all the selected tasks at once (Ctrl/Shift-click to select several)
+        tasks_menu = tk.Menu(self.menu, tearoff=0)
+        tasks_menu.add_command(label="Shift Dates", command=self.shift_selected)
+        team_menu = tk.Menu(tasks_menu, tearoff=0)
+        team_menu.configure(postcommand=lambda: self.fill_team_menu(team_menu))
+        tasks_menu.add_cascade(label="Set Team", menu=team_menu)
+        tasks_menu.add_command(label="Set Completion", command=self.set_selected_completion)
+        tasks_menu.add_separator()
+        tasks_menu.add_command(label="Move Up", command=self.move_task_up)
+        tasks_menu.add_command(label="Move Down", command=self.move_task_down)
+        tasks_menu.add_separator()
+        tasks_menu.add_command(label="Delete", command=self.delete_selected)
+        self.menu.add_cascade(label="Tasks", menu=tasks_menu)
         help_menu = tk.Menu(self.menu, tearoff=0)
         help_menu.add_separator()
         help_menu.add_command(label="About", command=lambda: AboutDialog(self.root))
@@ -221,7 +350,7 @@ class GanttChartApp:
         small_style.configure("Treeview.Heading", font=("Helvetica", 10, "bold"))
 
         # Create Treeview for task list
-        self.tree = ttk.Treeview(self.left_frame, selectmode='browse') # selectmode='extended')
+        self.tree = ttk.Treeview(self.left_frame, selectmode='extended')
         self.tree["columns"] = ( "start", "task_duration", "team", "dependencies")
         self.tree.column("#0", width=150, minwidth=150)
         self.tree.column("start", width=100, minwidth=100)
@@ -235,6 +364,11 @@ class GanttChartApp:
         self.tree.heading("dependencies", text="Depends")
         self.tree.grid(row=0, column=0, columnspan=2, pady=10, sticky='nsew')
         self.tree.bind("<Button-1>", self.select_task)
+        self.tree.bind("<Control-Button-1>", self.toggle_task_selection)
+        self.tree.bind("<Shift-Button-1>", self.extend_task_selection)
+        self.tree_items = {}   # task name -> treeview item
+        self.tree_values = {}  # task name -> the values shown in its row
+        self.tree_order = []   # task names in the order shown
 
         self.up_btn  = ttk.Button(self.left_frame, text="↑", command=self.move_task_up)
         self.up_btn.grid(row=1, column=0, pady=5)
@@ -295,21 +429,121 @@ class GanttChartApp:
         self.edit_task_btn.grid(row=8, column=1)
         self.edit_task_btn.state(['disabled'])
 
-        # Create matplotlib figure and canvas
-        self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvasTkAgg(self.figure, master=self.root)
-        self.canvas.get_tk_widget().grid(row=0, column=1, sticky="nsew")
         self.update_treeview()
-        self.draw_gantt_chart()
 
         # Configure grid weights
         self.root.columnconfigure(1, weight=1)
         self.root.rowconfigure(0, weight=1)
+        # status bar with the recent timings of the slow phases, see toggle_timings
+        self.status_bar = ttk.Label(self.root, anchor='w', font=("Helvetica", 9))
+        self.startup_end = self.startup_phase('widgets', phase_start)
+        self.toggle_timings()
+        # the chart is made once mainloop is running and the window is showing
+        self.root.after_idle(self.init_chart)
+
+    def startup_phase(self, name, phase_start):
+        """
+        Record how long a phase of startup took
+
+        Parameters:
+        name (string): the phase
+        phase_start (float): time.perf_counter() when the phase started
+
+        Returns:
+        float: the time now, i.e. the start of the next phase
+        """
+        now = time.perf_counter()
+        self.startup_times.append((name, now - phase_start))
+        return now
+
+    def init_chart(self):
+        """
+        Second half of startup: import matplotlib, create the chart canvas and
+        draw the chart for the first time.  The time taken by each phase of
+        startup is shown with the other timings (Edit > Show Timings).
+        """
+        # paint the window before the slow part (only idle tasks, no user
+        # events are handled before the chart exists)
+        self.root.update_idletasks()
+        phase_start = self.startup_phase('window', self.startup_end)
+        # pylint: disable=import-outside-toplevel
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from gantt_chart import GanttChart
+        phase_start = self.startup_phase('chart imports', phase_start)
+        # Create matplotlib figure and canvas
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.root)
+        self.canvas.get_tk_widget().grid(row=0, column=1, sticky="nsew")
+        self.chart = GanttChart(self.figure, self.ax)
+        self.chart.attach(self.canvas)
+        self.team_colors = self.assign_colors_for_team()
+        self.draw_gantt_chart()
+        self.root.update_idletasks()
+        self.startup_end = self.startup_phase('first render', phase_start)
+        self.record_startup()
+
+    def record_startup(self):
+        """
+        Add the startup phases to the timings (if they're on and startup has
+        finished), so the status bar shows them as "startup (imports, ...)"
+        """
+        if not timings.enabled or self.chart is None:
+            return
+        for name, seconds in self.startup_times:
+            timings.record('startup/' + name, seconds)
+        timings.record('startup', self.startup_end - STARTED)
+
+    def toggle_timings(self):
+        """
+        Called when the "Show Timings" menu is clicked, turns timing on (with
+        the status bar showing it) or off
+        """
+        timings.enabled = self.show_timings.get()
+        if timings.enabled:
+            self.status_bar.grid(row=1, column=0, columnspan=2, sticky="ew")
+            self.record_startup()
+            self.update_status()
+        else:
+            self.status_bar.grid_remove()
+            timings.clear()
+
+    def toggle_load(self):
+        """
+        Called when the "Show Team Load" menu is clicked, shows or hides the
+        team load panel
+        """
+        if self.chart is not None:
+            self.chart.show_load(self.team_capacity if self.show_load.get() else None)
+
+    def set_team_capacity(self):
+        """
+        Called when the "Set Team Capacity" menu is clicked, sets how many
+        tasks a team can have on at once before it's over-allocated
+        """
+        capacity = tk.simpledialog.askinteger(title="Set Team Capacity",
+                                              prompt="How many tasks can a team work on at once?",
+                                              initialvalue=self.team_capacity, minvalue=1)
+        if capacity is None:
+            return
+        self.team_capacity = capacity
+        self.toggle_load()
+
+    def update_status(self):
+        """
+        Show the latest timings in the status bar, every STATUS_MS while it's shown
+        """
+        if not timings.enabled:
+            return
+        self.status_bar.config(text=timings.status())
+        self.root.after(STATUS_MS, self.update_status)
 
     def edit_task(self):
         """
         Called when the "Edit Task" button is clicked
         """
+        changed = []
         try:
             task_name = self.task_name.get()
             if "[]" in task_name:
@@ -322,46 +556,36 @@ class GanttChartApp:
             task_assignee = self.team_var.get()
             completion = self.completion_var.get()
             row_index = self.get_task_id(self.pre_edit_name)
+            if self.auto_schedule.get():
+                # (before changing anything, so the task is left as it was)
+                graph = self.dependency_graph()
+                graph.check_cycles()
+            self.tasks.set_task(row_index, task=task_name, team=task_assignee,
+                                start=task_start,
+                                end=task_start+dt.timedelta(days=task_duration),
+                                completion_frac=completion)
             self.pre_edit_name = task_name
-            #print(task_name)
-            #print(self.df.loc[row_index])
-            self.df.loc[row_index, 'task'] = task_name
-            self.df.loc[row_index, 'team'] = task_assignee
-            self.df.loc[row_index, 'start']= pd.Timestamp(task_start)
-            self.df.loc[row_index, 'end']=pd.Timestamp(task_start+dt.timedelta(days=task_duration))
-            self.df.loc[row_index, 'completion_frac'] = completion
-            # if the start date got earlier, recalculate the 'days to start' values
-            if self.df['start'].min() == pd.Timestamp(task_start):
-                self.recalculate_task_attributes()
-            else:
-                self.df.loc[row_index,'days_to_start'] = (pd.Timestamp(task_start) - \
-                                                           self.df['start'].min()).days
-                self.df.loc[row_index,'days_to_end'] = (pd.Timestamp(task_start + \
-                                                         dt.timedelta(days=task_duration)) - \
-                                                         self.df['start'].min()).days
-                #N.B. +1 in task duration to include also the end date
-                self.df.loc[row_index,'task_duration'] = self.df.loc[row_index,'days_to_end'] - \
-                                                          self.df.loc[row_index,'days_to_start']+1
-                self.df.loc[row_index,'completion_days']=self.df.loc[row_index,'completion_frac']*\
-                                                          self.df.loc[row_index,'task_duration']
-
+            changed = [row_index]
+            if self.auto_schedule.get():
+                changed += push_dependents(self.tasks, graph, [row_index])
+
+        except CycleError as e:
+            messagebox.showerror("Dependency Cycle",
+                                 f"Can't auto-schedule the edit, the tasks have a {e}\n"
+                                 "(turn off 'Auto-schedule Dependents', or remove a dependency)")
         except ValueError as e:
             messagebox.showerror("Input Error", f"Invalid input: {e}")
-        self.update_treeview()
-        self.draw_gantt_chart()
+        self.journal.commit("Edit Task")
+        if changed:
+            self.redraw.mark(DATA, rows=changed)
 
+    @timed('recalculate')
     def recalculate_task_attributes(self):
         """
         Re-calculate the task attributes that depend on the start of the project
         (needed when the earliest date referenced changes)
         """
-        self.df['days_to_start'] = (self.df['start'] - \
-                                    self.df['start'].min()).dt.days
-        self.df['days_to_end'] = (self.df['end'] - self.df['start'].min()).dt.days
-        self.df['task_duration'] = self.df['days_to_end'] - \
-                                   self.df['days_to_start'] + 1  # to include also the end date
-        self.df['completion_days'] = self.df['completion_frac'] * self.df['task_duration']
-        self.df = self.df.sort_index()
+        self.tasks.recalculate()
 
     def add_task(self):
         """
@@ -373,64 +597,87 @@ class GanttChartApp:
                 raise ValueError('task name cannot contain the "[]" string')
             if "," in task_name:
                 raise ValueError('task name cannot contain the "," character')
-            if task_name in self.df["task"].values:
+            if task_name in self.tasks:
                 raise ValueError('task name must be unique (try selecting and using "edit")')
             task_duration = int(self.task_duration.get())
             task_start = dt.datetime.strptime(self.task_start.get(), '%Y-%m-%d')
             #task_assignee = self.task_assignee.get()
             task_assignee = self.team_var.get()
             completion = self.completion_var.get()
-
-            df_task = [ task_name, task_assignee, pd.Timestamp(task_start), \
-                        pd.Timestamp(task_start+dt.timedelta(days=task_duration)), completion, \
-                                self.process_column(float('NaN')), \
-                                #No Dependencies
-                                (task_start - self.df['start'].min()).days, \
-                                # calc days before start
-                                (task_start+dt.timedelta(days=task_duration) - \
-                                self.df['start'].min()).days, \
-                                # calc end
-                                task_duration, \
-                                # duration
-                                completion * task_duration,
-                                # days completed
-                            ]
-            self.df.loc[-1] = df_task
-            self.df.index = self.df.index + 1
-            self.df = self.df.sort_index()
-            # if the start date got earlier, recalculate the 'days to start' values
-            if self.df['start'].min() == pd.Timestamp(task_start) or self.task_was_start:
-                self.recalculate_task_attributes()
+            # (the store recalculates the 'days to start' values if the
+            # start date got earlier)
+            self.tasks.append(task_name, task_assignee, task_start,
+                              task_start+dt.timedelta(days=task_duration), completion,
+                              [])  #No Dependencies
+            self.journal.commit("Add Task")
+            self.redraw.mark(TREE, LAYOUT)
 
         except ValueError as e:
             messagebox.showerror("Input Error", f"Invalid input: {e}")
-        self.update_treeview()
-        self.draw_gantt_chart()
 
+    def refresh(self, regions, rows):
+        """
+        Bring the out of date parts of the window up to date, called by
+        self.redraw once Tk is idle
+
+        Parameters:
+        regions (set): the dirty regions, see gantt_redraw
+        rows (list): rows of the tasks whose bars changed
+        """
+        if TREE in regions:
+            self.update_treeview()
+        elif SELECTION in regions:
+            self.update_tree_selection()
+        if LAYOUT in regions:
+            self.draw_gantt_chart()
+        elif CHART in regions:
+            self.update_gantt_chart(rows)
+
+    @timed('treeview')
     def update_treeview(self):
         """
         Check and update the treeview (the list of tasks in the top LHS)
+
+        Rows are kept by task name (self.tree_items), so only the rows that
+        were added, removed, moved or changed since the last update are touched.
+        """
+        names = self.tasks['task'].tolist()
+        rows = zip(np.datetime_as_string(self.tasks['start'], unit='D'),
+                   self.tasks['task_duration'].tolist(), self.tasks['team'],
+                   map(tuple, self.tasks['dependencies']))
+        wanted = set(names)
+        for name in [name for name in self.tree_items if name not in wanted]:
+            self.tree.delete(self.tree_items.pop(name))
+            del self.tree_values[name]
+        self.tree_order = [name for name in self.tree_order if name in wanted]
+        # after each step the first i rows of the tree match the table
+        for i, (name, values) in enumerate(zip(names, rows)):
+            item = self.tree_items.get(name)
+            if item is None:
+                self.tree_items[name] = self.tree.insert("", i, text=name, values=values)
+                self.tree_order.insert(i, name)
+            else:
+                if self.tree_order[i] != name:
+                    self.tree.move(item, "", i)
+                    self.tree_order.remove(name)
+                    self.tree_order.insert(i, name)
+                if self.tree_values[name] != values:
+                    self.tree.item(item, values=values)
+            self.tree_values[name] = values
+        self.update_tree_selection()
+
+    def update_tree_selection(self):
+        """
+        Show the selected tasks (if any) as selected in the treeview
         """
-        self.tree.delete(*self.tree.get_children())
-        # Insert DataFrame items into Treeview
-        for idx, row in self.df.iterrows():
-            self.tree.insert("", "end", text=row['task'],
-                             values=(row['start'].strftime('%Y-%m-%d'),
-                             row['task_duration'], row['team'], row['dependencies']))
         if self.selected_tasks is not None:
             # update the selected tasks too
-            for item in self.tree.get_children():
-                #print(self.tree.item(item)['text'])
-                #if  self.tree.item(item)['text'] in self.df[self.df['task']] :
-                task_id = self.get_task_id(self.tree.item(item)['text'])
-                #print(self.selected_tasks)
-                if task_id == self.selected_tasks:
-                    #print("Got it!")
-                    self.tree.selection_set(item)
-        else:
-            for item in self.tree.get_children():
-                if item in self.tree.selection():
-                    self.tree.selection_remove(item)
+            names = [self.tasks.get(self.selected_tasks, 'task')] + self.bulk_tasks
+            items = tuple(self.tree_items[name] for name in names if name in self.tree_items)
+            if set(items) != set(self.tree.selection()):
+                self.tree.selection_set(items)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
 
     def remove_alpha(self, color):
         """
@@ -440,169 +687,238 @@ class GanttChartApp:
         Returns:
         tuple: RGB color.
         """
-        rgba_color = plt.cm.colors.to_rgba(color)  # Convert to RGBA tuple
+        from matplotlib.colors import to_rgba # pylint: disable=import-outside-toplevel
+        rgba_color = to_rgba(color)  # Convert to RGBA tuple
         return (rgba_color[0], rgba_color[1], rgba_color[2], 1.0)  # Return RGB with alpha set to 1
 
 
+    @timed('draw')
     def draw_gantt_chart(self):
         """
-        Uses Matplotlib to draw the Gantt Chart
-        """
-        #style:
-        bar_height = 0.65  # Adjust this value as needed
-        bar_spacing = 0.1
-        patches = []
-        task_hbar_coordinates = {}
-        for member, c in self.team_colors.items():
-            patches.append(matplotptchs.Patch(color=c))
-        self.ax.clear()
-        bar_coords = {}
-        for index, row in self.df.iterrows():
-            completed_bar = self.ax.barh(y=row['task'],
-                                         width=row['task_duration'],
-                                         left=row['days_to_start'] + 1,
-                                         color=self.team_colors[row['team']],
-                                         alpha=0.4, height=bar_height)
-            full_bar = self.ax.barh(y=row['task'],
-                                    width=row['task_duration'],
-                                    left=row['days_to_start'] + 1,
-                                    color=self.team_colors[row['team']],
-                                    alpha=0.4, linewidth=5, height=bar_height)
-            outline_bar = self.ax.barh(y=row['task'],
-                                       width=row['task_duration'],
-                                       left=row['days_to_start'] + 1,
-                                       color='none',
-                                       edgecolor=self.team_colors[row['team']],
-                                       linewidth=1.75,
-                                       height=bar_height )
-            self.ax.barh(y=row['task'],
-                         width=row['completion_days'],
-                         left=row['days_to_start'] + 1,
-                         color=self.team_colors[row['team']],
-                         height=bar_height)
-            # Coordinates for annotation
-            rect = full_bar.patches[0]  # bar.patches is a list of Rectangle objects
-            start = (rect.get_x()+rect.get_width(), rect.get_y() + rect.get_height() / 2)
-            end = (rect.get_x(), rect.get_y() )
-            bar_coords[row['task']] = [start, end]
-        plt.title(self.project_title, fontsize=18)
-        # 2
-        plt.gca().invert_yaxis()
-        # 3
-        #TODO: sort earliest date to include the today date
-        total_days = ( self.df['end'].max() - self.df['start'].min() ).days
-        xticks = np.arange(1, total_days, 7)
-        # 4
-        xticklabels = pd.date_range(start=self.df['start'].min() + dt.timedelta(days=0),
-                                    end=self.df['end'].max()).strftime("%d/%m")
-        # 5
-        num_tasks =  self.df.shape[0]
-        y_positions = np.arange(num_tasks)# * (bar_height + bar_spacing))
-        self.ax.set_yticks(y_positions)
-        #self.ax.set_yticklabels()
-        self.ax.set_xticks(xticks)
-
-        self.ax.set_xticklabels(xticklabels[::7])
-        # 6
-        self.ax.xaxis.grid(True, alpha=0.5)
-        # Adding a legend
-        self.ax.legend(handles=patches, labels=self.team_colors.keys(), fontsize=11)
-        # Marking the current date on the chart
-        horizontal_position = (self.today_date - (self.df['start'].min()).date() ).days
-        self.ax.axvline(x=horizontal_position, color='r', linestyle='dashed')
-        self.ax.text(x=horizontal_position + 0.5, y=11.5, s=self.today_date, color='r')
-
-        # Add annotation with an arrow
-        #print(bar_coords)
-        for index, row in self.df.iterrows():
-            if row['dependencies']:
-                if row['task'] in bar_coords:
-                    for dependency in row['dependencies']:
-                        # Coordinates for annotation
-                        not_used, end = bar_coords[row['task']]
-                        start, not_used = bar_coords[dependency]
-                        # if the arrow goes straight down, don't use a curvy arrow
-                        if start[0]==end[0]: #straight arrow
-                            self.ax.annotate(
-                                '', xy=end, xytext=start,
-                                arrowprops={"arrowstyle":'->',
-                                                "lw":2, "color":'black',
-                                                "alpha":0.65,
-                                                "connectionstyle":"arc3,rad=0."}
-                            )
-                        else: #(curvy arrow)
-                            self.ax.annotate(
-                                '', xy=end, xytext=start,
-                                arrowprops={"arrowstyle":'->',
-                                            "lw":2, "color":'black',
-                                            "alpha":0.65,
-                                            "connectionstyle":"angle,angleA=0,angleB=-90,rad=10"}
-                            )
-        # Adjust the subplot parameters to reduce the space on the RHS
-        self.figure.subplots_adjust(left=0.1, right=0.85, top=0.9, bottom=0.1)
-        # Increase the font size of the y-labels
-        self.ax.tick_params(axis='y', labelsize=18)  # Set the font size as desired
-
-        # Adjust the layout to have the graph area around the categories
-        self.ax.spines['left'].set_visible(False)  # Hide the left spine
-        self.ax.spines['right'].set_visible(False)  # Hide the right spine
-        self.ax.spines['top'].set_visible(False)  # Hide the top spine
-        self.ax.yaxis.tick_left()  # Move the y-ticks to the left side
-        # 'magic' command to make everything fit properly
-        plt.tight_layout()
-        self.canvas.draw()
+        Uses Matplotlib to draw the whole Gantt Chart from scratch
+        """
+        if self.chart is None:
+            return  # not started yet, init_chart will draw it
+        with timings.phase('draw/schedule'):
+            critical = self.critical_path()
+        self.chart.rebuild(self.tasks, self.team_colors, self.project_title, self.today_date,
+                           critical)
+        with timings.phase('draw/canvas'):
+            self.canvas.draw()
+
+    def dependency_graph(self):
+        """
+        The DependencyGraph of the tasks, only rebuilt when the dependencies
+        (or task names or order) have changed since it was last built
+        """
+        if self.graph is None or self.graph.version != self.tasks.graph_version:
+            self.graph = DependencyGraph(self.tasks)
+        return self.graph
+
+    def critical_path(self):
+        """
+        Schedule the tasks, if the critical path is to be shown
+
+        Returns:
+        Schedule: the earliest/latest dates and slack of the tasks, or None
+        """
+        if not self.show_critical.get():
+            return None
+        try:
+            return schedule(self.tasks, self.dependency_graph())
+        except CycleError as e:
+            self.show_critical.set(False)
+            messagebox.showerror("Input Error", f"Can't find the critical path, {e}")
+            return None
+
+    def update_gantt_chart(self, positions):
+        """
+        Redraw only the tasks in the given rows, falling back to a full redraw
+        when the edit changed the layout of the chart
+
+        Parameters:
+        positions (list): row positions of the tasks that changed
+        """
+        if self.chart is None:
+            return
+        with timings.phase('update'):
+            updated = self.chart.update_tasks(self.tasks, positions, self.team_colors)
+        if not updated:
+            self.draw_gantt_chart()
 
     def load_file_btn(self):
         """
         Called when the "Load" menu is clicked
         """
-        file_path = filedialog.askopenfilename(defaultextension=".ods")
+        file_path = filedialog.askopenfilename(
+            defaultextension=".ods",
+            filetypes=[
+                ("Project files", "*.ods *.fgantt"),
+                ("ODS files", "*.ods"),
+                ("FasttGantt files", "*.fgantt"),
+                ]
+            )
         if file_path:
-            self.load_file(file_path)
-            self.update_treeview()
-            self.draw_gantt_chart()
+            self.run_in_background("Loading",
+                                   lambda progress: self.plan_cache.load(file_path, progress),
+                                   self.show_plan)
 
     def load_file(self, file_path):
         """
-        Loads an ods file of the right format for the project
+        Loads a project file (.ods or .fgantt), on this thread
 
         Parameters:
         file_path (string): The file path
         """
-        # TODO: check for literals '[]' or ',' as these will do bad things!
-        self.df = pd.read_excel(file_path, engine='odf', index_col=0)
-        self.df['dependencies'] = self.df['dependencies'].apply(self.process_column)
-        self.recalculate_task_attributes()
-        unique_team_entries = self.df['team'].unique().tolist()
-        if len(unique_team_entries) != 0:
-            self.team = unique_team_entries
+        self.set_plan(self.plan_cache.load(file_path))
 
-    def process_column(self, cell):
+    def show_plan(self, tasks):
         """
-        Convert the empty list "[]" imported as a string back to an empty list 
+        Makes a newly loaded plan the current one and shows it
 
         Parameters:
-        cell (string): comma separated list as a string
+        tasks (TaskStore): the tasks
+        """
+        self.set_plan(tasks)
+        if self.chart is not None:
+            self.chart.view = None
+        self.redraw.mark(TREE, LAYOUT)
 
-        Returns:
-        list: a list of values or empty list
+    def zoom_to_fit(self):
+        """
+        Called when the "Zoom to Fit" menu is clicked, shows the whole plan
+        """
+        if self.chart is not None:
+            self.chart.set_view(None)
+
+    def set_plan(self, tasks):
         """
-        if pd.isna(cell):
-            return []
-        if "[]" in cell:
-            return []
-        return cell.split(',')
+        Makes a newly loaded plan the current one, with its teams
+
+        Parameters:
+        tasks (TaskStore): the tasks
+        """
+        self.tasks = tasks
+        self.tasks.journal = self.journal
+        self.journal.clear()
+        unique_team_entries = list(self.tasks.teams)
+        if len(unique_team_entries) != 0:
+            self.team = unique_team_entries
+        dangling = self.tasks.dangling()
+        if dangling:
+            listed = "\n".join(f"{task} -> {name}" for task, name in dangling[:DANGLING_SHOWN])
+            more = len(dangling) - DANGLING_SHOWN
+            if more > 0:
+                listed += f"\n... and {more} more"
+            messagebox.showwarning(title="Unknown Dependencies",
+                                   message="These dependencies don't name a task, "
+                                           f"they are ignored:\n{listed}")
 
     def save_file(self):
         """
         Called when the "Save" menu is clicked, dialog that exports to .ods
+        or to the (faster) native .fgantt format
         """
-        file_path = filedialog.asksaveasfilename(defaultextension=".ods")
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".ods",
+            filetypes=[
+                ("ODS files", "*.ods"),
+                ("FasttGantt files", "*.fgantt"),
+                ]
+            )
         if file_path:
-            with pd.ExcelWriter(file_path, engine="odf") as doc:
-                self.df.to_excel(doc, columns=['task', 'team', 'start',
-                                               'end', 'completion_frac','dependencies'],
-                                 sheet_name="Sheet1")
+            tasks = self.tasks.copy()  # edits are blocked anyway, but be safe
+            def save(progress):
+                progress(None, "Saving " + file_path)
+                replace_file(file_path, lambda path: save_plan(tasks, path), progress)
+                self.plan_cache.store(file_path, tasks)
+            self.run_in_background("Saving", save, lambda result: None)
+
+    def run_in_background(self, title, work, on_done):
+        """
+        Runs a slow job (load, save, export) on a worker thread, with a
+        progress dialog that blocks edits until it's finished or cancelled
+
+        Parameters:
+        title (string): what the job is doing, e.g. "Saving"
+        work (function): work(progress) does the job (on the worker thread)
+        on_done (function): on_done(result) is called (on the Tk thread) with the result
+        """
+        if self.job is not None:
+            messagebox.showwarning("Busy", "Please wait for the current operation to finish")
+            return
+        dialog = ProgressDialog(self.root, title, lambda: self.job.cancel())
+        def finished():
+            dialog.destroy()
+            self.job = None
+        def done(result):
+            finished()
+            on_done(result)
+        def failed(error):
+            finished()
+            messagebox.showerror("Error", f"{title} failed: {error}")
+        self.job = BackgroundJob(self.root, work, done, on_error=failed,
+                                 on_progress=dialog.set_progress, on_cancel=finished)
+        self.job.start()
+
+    def export_figure(self, outputs):
+        """
+        Exports the chart in the background, drawn off-screen from a copy of
+        the plan at the chosen Export Size (or the size of the chart on screen).
+        An unchanged chart is copied from the export cache instead.
+
+        Parameters:
+        outputs (list): (file path, format) to write, format None to go by the extension
+        """
+        preset = EXPORT_PRESETS[self.export_preset.get()]
+        if preset is None:
+            preset = (tuple(self.figure.get_size_inches()), self.figure.dpi)
+        tasks = self.tasks.copy()
+        options = (dict(self.team_colors), self.project_title, self.today_date, outputs,
+                   *preset, self.critical_path())
+        def export(progress):
+            return export_chart(tasks, *options, cache=self.export_cache, progress=progress,
+                                write=lambda file_path, save: replace_file(file_path, save,
+                                                                           progress))
+        self.run_in_background("Exporting", export, lambda result: None)
+
+    def export_paged(self):
+        """
+        Exports the chart split into pages of a number of tasks each, as a
+        multi-page .pdf or a set of .png tiles.  Called when the "Export
+        Pages" menu is clicked.
+        """
+        file_path = filedialog.asksaveasfilename(defaultextension=".pdf",
+                                                 filetypes=[("PDF files", "*.pdf"),
+                                                            ("PNG tiles", "*.png")])
+        if not file_path:
+            return
+        rows = tk.simpledialog.askinteger(title="Export Pages", prompt="Tasks per page:",
+                                          initialvalue=ROWS_PER_PAGE, minvalue=1)
+        if rows is None:
+            return
+        preset = EXPORT_PRESETS[self.export_preset.get()]
+        if preset is None:
+            preset = (tuple(self.figure.get_size_inches()), self.figure.dpi)
+        tasks = self.tasks.copy()
+        options = (dict(self.team_colors), self.project_title, self.today_date, file_path, rows,
+                   None, *preset, self.critical_path())
+        def export(progress):
+            return export_pages(tasks, *options, progress=progress,
+                                write=lambda file_path, save: replace_file(file_path, save,
+                                                                           progress))
+        self.run_in_background("Exporting", export, lambda result: None)
+
+    def export_all(self):
+        """
+        Exports the chart as .png, .svg and .pdf files with the same name.
+        Called when the "Export PNG, SVG and PDF" menu is clicked.
+        """
+        file_path = filedialog.asksaveasfilename(defaultextension=".png",
+                                                 filetypes=[("PNG files", "*.png")])
+        if file_path:
+            stem = os.path.splitext(file_path)[0]
+            self.export_figure([(f"{stem}.{fmt}", fmt) for fmt in ('png', 'svg', 'pdf')])
 
     def set_title(self):
         """
@@ -611,8 +927,11 @@ class GanttChartApp:
         text = tk.simpledialog.askstring(title = "Set Ttile:",
                                          prompt = "Enter the Title for the Gantt Chart:",
                                          initialvalue=self.project_title)
+        if text is None:
+            return
         self.project_title = text
-        self.draw_gantt_chart()
+        if self.chart is not None:
+            self.chart.set_title(text)
 
     def set_current_date(self):
         """
@@ -626,9 +945,7 @@ class GanttChartApp:
         elif dt.datetime.strptime(text, '%Y-%m-%d'):
             old_date = self.today_date
             self.today_date = dt.datetime.strptime(text, '%Y-%m-%d').date()
-            if self.df['start'].min() > old_date:
-                self.recalculate_task_attributes()
-            self.draw_gantt_chart()
+            self.redraw.mark(LAYOUT)
 
     def export_image(self):
         """
@@ -642,7 +959,7 @@ class GanttChartApp:
                 ]
             )
         if file_path:
-            self.figure.savefig(file_path)
+            self.export_figure([(file_path, None)])
 
     def save_plot(self):
         """
@@ -672,7 +989,7 @@ class GanttChartApp:
             if file_ext.lower() in ['png', 'svg', 'pdf', 'ps',
                                     'eps', 'jpg', 'jpeg', 'tiff',
                                     'bmp', 'raw', 'gif', 'pgf', 'webp']:
-                self.figure.savefig(file_path, format=file_ext.lower())
+                self.export_figure([(file_path, file_ext.lower())])
 
     def update_string_list(self, new_list):
         """
@@ -687,35 +1004,41 @@ class GanttChartApp:
         Called when "Add/Remove Team members" menu is clicked
         """
         assigned_list = []
+        assigned_teams = self.tasks.assigned_teams()
         for member in self.team:
-            if member in self.df['team'].values :
+            if member in assigned_teams:
                 assigned_list.append(member)
+        old_team = list(self.team)
         updated_list = TeamListManager(self.root, self.team, assigned_list, self.update_string_list)
         self.root.wait_window(updated_list)
         #self.team = updated_list
+        if self.team != old_team:
+            self.journal.record(ValueDelta(self.set_team_list, old_team, list(self.team)))
+            self.journal.commit("Edit Teams")
+        self.set_team_list(self.team)
+
+    def set_team_list(self, team):
+        """
+        Sets the team list, the assignee menu and the team colours
+
+        Parameters:
+        team (list): the team names
+        """
+        self.team = list(team)
         self.task_assignee['menu'].delete(0, 'end')  # Delete all options from the menu
         ## Update with new options
         for person in self.team:
             self.task_assignee['menu'].add_command(label=person,
                                                    command=tk._setit(self.team_var, person))
         self.team_colors = self.assign_colors_for_team()
+        self.redraw.mark(LAYOUT)  # with the new colours
 
     def assign_colors_for_team(self):
         """
         Sets a color for each member of the team
         """
-        #qualitative_colors = cm.Dark2.colors + cm.Set3.colors
-        qualitative_colors = plt.get_cmap('Dark2').colors + plt.get_cmap('Set3').colors
-        num_cols = len(qualitative_colors)
-        if len(self.team) >  num_cols:
-            print("warning: more team members than colors! Some will repeat")
-        offset = 0
-        team_colors = {}
-        #for i in range(len(self.team)):
-        #    team_colors[self.team[i]] = qualitative_colors[(i+offset)%num_cols]
-        for i, tm in enumerate(self.team):
-            team_colors[tm] = qualitative_colors[(i+offset)%num_cols]
-        return team_colors
+        from gantt_chart import assign_team_colors # pylint: disable=import-outside-toplevel
+        return assign_team_colors(self.team)
 
     def set_dependency(self):
         """
@@ -768,51 +1091,201 @@ class GanttChartApp:
 
     def move_task_up(self):
         """
-        Moves a task up in the df and tree.  Called when "up arrow" button is clicked
+        Moves the selected tasks up in the task list and tree.  Called when
+        "up arrow" button is clicked
         """
-        #TODO: DEBUG: Comments here are an attempt at multiple
-        # selection code that doesn't work because treeview won't select
-        # more than one item...
-        #if min(self.selected_tasks) == 0:
-        if self.selected_tasks == 0:
-            return
-        new_indices = self.selected_tasks-1 #[i-1 for i in self.selected_tasks]
-        temp_df = self.df.copy()
-        #for old, new in zip(self.selected_tasks, new_indices):
-        #    temp_df.iloc[new], temp_df.iloc[old] = self.df.iloc[old], self.df.iloc[new]
-        old = self.selected_tasks
-        new = new_indices
-        temp_df.iloc[new], temp_df.iloc[old] = self.df.iloc[old], self.df.iloc[new]
-        self.df = temp_df
-        self.selected_tasks = new_indices
-        # show the results
-        self.update_treeview()
-        self.draw_gantt_chart()
-        return
+        self.move_selected(-1)
 
     def move_task_down(self):
         """
-        Moves a task down in the df and tree.  Called when "down arrow" button is clicked
+        Moves the selected tasks down in the task list and tree.  Called when
+        "down arrow" button is clicked
+        """
+        self.move_selected(1)
+
+    def undo(self, event=None):
+        """
+        Undoes the last change.  Called from the "Undo" menu or Ctrl+Z
+        """
+        if self.journal.undo_label() is not None:
+            self.show_history_step(self.journal.undo(self.tasks))
+
+    def redo(self, event=None):
         """
-        if self.selected_tasks == len(self.df)-1:
+        Redoes the last change undone.  Called from the "Redo" menu or Ctrl+Y
+        """
+        if self.journal.redo_label() is not None:
+            self.show_history_step(self.journal.redo(self.tasks))
+
+    def show_history_step(self, rows):
+        """
+        Shows the plan after an undo or redo
+
+        Parameters:
+        rows (list): rows of the tasks that changed, None if the layout did
+        """
+        self.deselect_task()  # the selected rows may have moved or gone
+        if rows is None:
+            self.redraw.mark(TREE, LAYOUT)
+        else:
+            self.redraw.mark(DATA, rows=rows)
+
+    def update_undo_menu(self, menu):
+        """
+        Shows what Undo and Redo would do in the Edit menu, just before it's shown
+        """
+        for index, name, label in ((0, "Undo", self.journal.undo_label()),
+                                   (1, "Redo", self.journal.redo_label())):
+            menu.entryconfig(index, label=f"{name} {label}" if label else name,
+                             state="normal" if label else "disabled")
+
+    def selected_rows(self):
+        """
+        Rows of all the selected tasks
+
+        Returns:
+        array: the rows, in increasing order (empty if nothing is selected)
+        """
+        if self.selected_tasks is None:
+            return np.empty(0, dtype=np.int64)
+        rows = self.tasks.rows_of(self.bulk_tasks)
+        return np.union1d(rows[rows >= 0], [self.selected_tasks]).astype(np.int64)
+
+    def move_selected(self, offset):
+        """
+        Moves the selected tasks up (offset < 0) or down the task list as a block
+
+        Parameters:
+        offset (int): how many rows to move them by
+        """
+        rows = self.selected_rows()
+        if len(rows) == 0:
             return
-        new_indices = self.selected_tasks+1 #[i-1 for i in self.selected_tasks]
-        temp_df = self.df.copy()
-        #for old, new in zip(self.selected_tasks, new_indices):
-        #    temp_df.iloc[new], temp_df.iloc[old] = self.df.iloc[old], self.df.iloc[new]
-        old = self.selected_tasks
-        new = new_indices
-        temp_df.iloc[new], temp_df.iloc[old] = self.df.iloc[old], self.df.iloc[new]
-        self.df = temp_df
-        self.selected_tasks = new_indices
-        # show the results
-        self.update_treeview()
-        self.draw_gantt_chart()
-        return
+        new_rows = self.tasks.move_rows(rows, offset)
+        self.journal.commit("Move Tasks")
+        self.selected_tasks = int(new_rows[rows == self.selected_tasks][0])
+        # the tasks moved past are in the rows between
+        first = min(rows[0], new_rows[0])
+        last = max(rows[-1], new_rows[-1])
+        self.redraw.mark(DATA, rows=range(first, last + 1))
+
+    def shift_selected(self):
+        """
+        Moves the dates of the selected tasks.  Called when the "Shift Dates"
+        menu is clicked
+        """
+        rows = self.selected_rows()
+        if len(rows) == 0:
+            return
+        days = tk.simpledialog.askinteger(title="Shift Dates",
+                                          prompt=f"Move {len(rows)} task(s) by how many days?\n"
+                                                 "(negative for earlier)")
+        if not days:
+            return
+        shift = np.timedelta64(days, 'D')
+        self.tasks.set_tasks(rows, start=self.tasks['start'][rows] + shift,
+                             end=self.tasks['end'][rows] + shift)
+        changed = rows.tolist()
+        if self.auto_schedule.get():
+            try:
+                changed += push_dependents(self.tasks, self.dependency_graph(), rows)
+            except CycleError as e:
+                messagebox.showerror("Input Error", f"Can't auto-schedule, {e}")
+        self.journal.commit("Shift Dates")
+        self.redraw.mark(DATA, rows=changed)
+
+    def fill_team_menu(self, menu):
+        """
+        Lists the teams in the "Set Team" menu, just before it's shown
+        """
+        menu.delete(0, 'end')
+        for team in self.team:
+            menu.add_command(label=team, command=lambda team=team: self.set_selected_team(team))
+
+    def set_selected_team(self, team):
+        """
+        Assigns the selected tasks to a team.  Called from the "Set Team" menu
+
+        Parameters:
+        team (string): the team
+        """
+        rows = self.selected_rows()
+        if len(rows) == 0:
+            return
+        self.tasks.set_tasks(rows, team=team)
+        self.journal.commit("Set Team")
+        self.team_var.set(team)
+        self.redraw.mark(DATA, rows=rows)
+
+    def set_selected_completion(self):
+        """
+        Sets how complete the selected tasks are.  Called when the "Set
+        Completion" menu is clicked
+        """
+        rows = self.selected_rows()
+        if len(rows) == 0:
+            return
+        percent = tk.simpledialog.askinteger(title="Set Completion",
+                                             prompt=f"Completion of {len(rows)} task(s) (%):",
+                                             minvalue=0, maxvalue=100)
+        if percent is None:
+            return
+        self.tasks.set_tasks(rows, completion_frac=percent / 100)
+        self.journal.commit("Set Completion")
+        self.completion_var.set(percent / 100)
+        self.redraw.mark(DATA, rows=rows)
+
+    def delete_selected(self):
+        """
+        Deletes the selected tasks.  Called when the "Delete" menu is clicked
+        """
+        rows = self.selected_rows()
+        if len(rows) == 0:
+            return
+        if not messagebox.askyesno("Delete Tasks", f"Delete {len(rows)} task(s)?"):
+            return
+        self.tasks.delete(rows)
+        self.journal.commit("Delete Tasks")
+        self.deselect_task()
+        self.redraw.mark(TREE, LAYOUT)
+
+    def toggle_task_selection(self, event):
+        """
+        Called when the treeview is Ctrl-clicked, adds the task to the
+        selection or takes it out
+        """
+        item = self.tree.identify('item', event.x, event.y)
+        task_name = self.tree.item(item)['text'] if item else None
+        if self.selected_tasks is None or self.dependency_mode or self.subtask_mode or \
+           task_name == self.tasks.get(self.selected_tasks, 'task'):
+            self.select_task(event)
+        elif task_name in self.bulk_tasks:
+            self.bulk_tasks.remove(task_name)
+        elif task_name is not None:
+            self.bulk_tasks.append(task_name)
+        self.redraw.mark(SELECTION)
+        return "break"
+
+    def extend_task_selection(self, event):
+        """
+        Called when the treeview is Shift-clicked, selects the tasks from
+        the selected one to this one
+        """
+        item = self.tree.identify('item', event.x, event.y)
+        task_id = self.get_task_id(self.tree.item(item)['text']) if item else None
+        if self.selected_tasks is None or self.dependency_mode or self.subtask_mode or \
+           task_id is None:
+            self.select_task(event)
+        else:
+            first, last = sorted((self.selected_tasks, task_id))
+            self.bulk_tasks = [name for name in self.tasks['task'][first:last + 1]
+                               if name != self.tasks.get(self.selected_tasks, 'task')]
+        self.redraw.mark(SELECTION)
+        return "break"
 
     def get_task_id(self, name):
         """
-        Get index of the task with the same name in self.df
+        Get index of the task with the same name in self.tasks
 
         Parameters:
         name (string): Task name.
@@ -820,11 +1293,39 @@ class GanttChartApp:
         Returns:
         int: index of the task.
         """
-        result = self.df[self.df['task'] == name]
-        if not result.empty:
-            #return result.iloc[0]['id']
-            return result.index[0]
-        return None
+        return self.tasks.index_of(name)
+
+    def deselect_task(self):
+        """
+        Clears the selection and resets the GUI for adding a new task
+        """
+        self.selected_tasks = None
+        self.bulk_tasks = []
+        # Deselect items
+        selected_items = self.tree.selection()
+        if selected_items:
+            self.tree.selection_remove(selected_items)
+        self.up_btn.state(['disabled'])
+        self.dwn_btn.state(['disabled'])
+        self.dep_btn.state(['disabled'])
+        self.dependency_mode = False
+        self.subt_btn.state(['disabled'])
+        self.subtask_mode = False
+        self.task_name.state(['!disabled'])
+        self.task_duration.state(['!disabled'])
+        self.task_start.state(['!disabled'])
+        menu = self.task_assignee.nametowidget(self.task_assignee.menuname)
+        for i in range(len(self.team)):
+            menu.entryconfig(i, state="active")
+        self.completion_slider.state(['!disabled'])
+        self.new_task_btn.state(['!disabled'])
+        self.edit_task_btn.state(['disabled'])
+        self.task_name.delete(0, tk.END)
+        self.task_duration.delete(0, tk.END)
+        self.task_start.delete(0,tk.END)
+        self.task_start.insert(0, dt.date.today())
+        self.team_var.set(self.team[0])
+        self.completion_var.set(0.5)
 
     def select_task(self, event):
         """
@@ -845,11 +1346,22 @@ class GanttChartApp:
             reset_selected_tasks = False
             set_selected_tasks = False
             index_to_set = 0
+            changed = []
             if self.dependency_mode:
-                if task_name in self.df.at[self.dependee, 'dependencies']:
-                    self.df.at[self.dependee, 'dependencies'].remove(task_name)
+                dependencies = list(self.tasks.get(self.dependee, 'dependencies'))
+                if task_name in dependencies:
+                    dependencies.remove(task_name)
                 else:
-                    self.df.at[self.dependee, 'dependencies'].append(task_name)
+                    dependencies.append(task_name)
+                self.tasks.set_task(self.dependee, dependencies=dependencies)
+                changed = [self.dependee]
+                if self.auto_schedule.get() and task_name in dependencies:
+                    try:
+                        changed += push_dependents(self.tasks, self.dependency_graph(),
+                                                   [self.get_task_id(task_name)])
+                    except CycleError as e:
+                        messagebox.showerror("Input Error", f"Can't auto-schedule, {e}")
+                self.journal.commit("Set Dependency")
                 reset_selected_tasks = True
                 self.dependency_mode = False
                 self.subtask_mode = False
@@ -861,6 +1373,7 @@ class GanttChartApp:
                 self.subtask_mode = False
                 self.dependency_mode = False
             else:
+                self.bulk_tasks = []
                 #deselect if second click
                 if self.selected_tasks is not None:
                     if task_id == self.selected_tasks:
@@ -878,34 +1391,7 @@ class GanttChartApp:
                     index_to_set = task_id
 
             if reset_selected_tasks:
-                self.selected_tasks = None
-                # Deselect item
-                selected_items = self.tree.selection()
-                if selected_items:
-                    self.tree.selection_remove(selected_items[0])
-                self.update_treeview()
-                self.up_btn.state(['disabled'])
-                self.dwn_btn.state(['disabled'])
-                self.dep_btn.state(['disabled'])
-                self.dependency_mode = False
-                self.subt_btn.state(['disabled'])
-                self.subtask_mode = False
-                self.task_name.state(['!disabled'])
-                self.task_duration.state(['!disabled'])
-                self.task_start.state(['!disabled'])
-                menu = self.task_assignee.nametowidget(self.task_assignee.menuname)
-                for i in range(len(self.team)):
-                    menu.entryconfig(i, state="active")
-                self.completion_slider.state(['!disabled'])
-                self.new_task_btn.state(['!disabled'])
-                self.edit_task_btn.state(['disabled'])
-                self.task_name.delete(0, tk.END)
-                self.task_duration.delete(0, tk.END)
-                self.task_start.delete(0,tk.END)
-                self.task_start.insert(0, dt.date.today())
-                self.team_var.set(self.team[0])
-                self.completion_var.set(0.5)
-
+                self.deselect_task()
             elif set_selected_tasks:
                 self.selected_tasks = index_to_set
                 #disable "Add Task" enable othersup
@@ -927,25 +1413,23 @@ class GanttChartApp:
                 self.task_name.delete(0, tk.END)
                 self.task_duration.delete(0, tk.END)
                 self.task_start.delete(0,tk.END)
-                row = self.df.iloc[index_to_set]
+                row = self.tasks.row(index_to_set)
                 #keep this info in case it gets edited
                 self.pre_edit_name = row['task']
-                if self.df['start'].min() == pd.Timestamp(row['start']):
-                    # task keep a record that this was the first task so that
-                    # you can re-order ticks on the graph
-                    self.task_was_start = True
-                else:
-                    self.task_was_start = False
                 self.task_name.insert(0, row['task'])
                 self.task_duration.insert(0, row['task_duration'])
-                self.task_start.insert(0, row['start'].strftime('%Y-%m-%d'))
+                self.task_start.insert(0, str(row['start']))
                 self.team_var.set(row['team'])
                 self.completion_var.set(row['completion_frac'])
                 self.edit_task_btn.state(["!disabled"])
-            self.update_treeview()
-            self.draw_gantt_chart()
+            if changed:
+                self.redraw.mark(DATA, SELECTION, rows=changed)
+            else:
+                self.redraw.mark(SELECTION)  # the chart doesn't show the selection
 
 if __name__ == "__main__":
+    profiler = start_profile()  # if FASTTGANTT_PROFILE is set
     window = tk.Tk()
     app = GanttChartApp(window)
     window.mainloop()
+    stop_profile(profiler)
@@ -0,0 +1,279 @@
+"""
+FasttGantt: reading and writing project files
+
+Plans are saved either as an .ods spreadsheet (one row per task, the
+dependencies as a comma separated list of task names) or in the native
+.fgantt format: a compressed NumPy archive holding one typed array per
+column, with the dependencies encoded as integer rows (see save_native).
+The native format is much faster to load and save than ODS for large plans.
+"""
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+import numpy as np
+from gantt_store import COLUMNS, TaskStore
+from gantt_timing import timings
+
+NATIVE_EXTENSION = '.fgantt'
+NATIVE_VERSION = 1
+PROGRESS_ROWS = 1000
+
+# OpenDocument namespaces, as ElementTree spells them
+TABLE_NS = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+OFFICE_NS = '{urn:oasis:names:tc:opendocument:xmlns:office:1.0}'
+TEXT_NS = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+TABLE = TABLE_NS + 'table'
+ROW = TABLE_NS + 'table-row'
+CELLS = (TABLE_NS + 'table-cell', TABLE_NS + 'covered-table-cell')
+ROWS_REPEATED = TABLE_NS + 'number-rows-repeated'
+COLUMNS_REPEATED = TABLE_NS + 'number-columns-repeated'
+# which cell attribute holds the value of each column (None: the cell's text)
+ODS_VALUE = {
+    'task': None,
+    'team': None,
+    'start': OFFICE_NS + 'date-value',
+    'end': OFFICE_NS + 'date-value',
+    'completion_frac': OFFICE_NS + 'value',
+    'dependencies': None,
+}
+
+def process_column(cell):
+    """
+    Convert the empty list "[]" imported as a string back to an empty list
+
+    Parameters:
+    cell (string): comma separated list as a string
+
+    Returns:
+    list: a list of values or empty list
+    """
+    if not isinstance(cell, str):  # empty cell
+        return []
+    if "[]" in cell:
+        return []
+    return cell.split(',')
+
+def is_native(file_path):
+    """
+    True if a file name is for the native .fgantt format (otherwise ODS)
+    """
+    return os.path.splitext(file_path)[1].lower() == NATIVE_EXTENSION
+
+def load_plan(file_path, progress=None):
+    """
+    Loads a project file (.ods or .fgantt)
+
+    Parameters:
+    file_path (string): The file path
+    progress (function): progress(fraction) is called as an ods file is read
+
+    Returns:
+    TaskStore: the tasks in the file
+    """
+    with timings.phase('load'):
+        if is_native(file_path):
+            return load_native(file_path)
+        return load_ods(file_path, progress)
+
+def save_plan(tasks, file_path):
+    """
+    Saves the tasks to a project file, the format is picked by the extension
+
+    Parameters:
+    tasks (TaskStore): the tasks
+    file_path (string): The file path
+    """
+    with timings.phase('save'):
+        if is_native(file_path):
+            save_native(tasks, file_path)
+        else:
+            save_ods(tasks, file_path)
+
+def load_ods(file_path, progress=None):
+    """
+    Loads an ods file of the right format for the project
+
+    Parameters:
+    file_path (string): The file path
+    progress (function): progress(fraction) is called every so often as it's read
+
+    Returns:
+    TaskStore: the tasks in the file
+    """
+    # TODO: check for literals '[]' or ',' as these will do bad things!
+    task, team_codes, start, end, completion_frac, dependencies = [], [], [], [], [], []
+    teams = {}
+    for row in read_ods_rows(file_path, progress=progress):
+        if row['start'] is None or row['end'] is None:
+            raise ValueError(f"task {row['task']} needs a start and an end date")
+        task.append(row['task'])
+        team_codes.append(teams.setdefault(row['team'], len(teams)))
+        start.append(row['start'][:10])  # date-values may have a time too
+        end.append(row['end'][:10])
+        completion_frac.append(float(row['completion_frac'] or 0))
+        dependencies.append(process_column(row['dependencies']))
+    return TaskStore.from_columns(np.array(task, dtype=object), list(teams),
+                                  np.array(team_codes, dtype=np.int32),
+                                  np.array(start, dtype='datetime64[D]'),
+                                  np.array(end, dtype='datetime64[D]'),
+                                  np.array(completion_frac), dependencies)
+
+def cell_value(cell, attribute):
+    """
+    The value of an ODS table cell
+
+    Parameters:
+    cell (Element): a table:table-cell
+    attribute (string): the office: attribute holding the value, None for the text
+
+    Returns:
+    string: the value, or None if the cell is empty
+    """
+    if attribute is not None:
+        value = cell.get(attribute)
+        if value is not None:
+            return value
+    value = cell.get(OFFICE_NS + 'string-value')
+    if value is not None:
+        return value or None
+    paragraphs = cell.findall(TEXT_NS + 'p')
+    if not paragraphs:
+        return None
+    return '\n'.join(''.join(p.itertext()) for p in paragraphs) or None
+
+def read_ods_rows(file_path, columns=COLUMNS, progress=None):
+    """
+    Reads the first sheet of an ods file one row at a time, without building
+    the whole document in memory.  content.xml is parsed incrementally
+    straight out of the zip, each row is dropped once it's been read, and
+    only the wanted columns are looked at.  Repeated cells/rows
+    (number-columns-repeated/number-rows-repeated) are expanded as needed,
+    except blank rows which are skipped.
+
+    Parameters:
+    file_path (string): The file path
+    columns (list): names of the columns to read, from the header row
+    progress (function): progress(fraction) is called every PROGRESS_ROWS rows
+
+    Yields:
+    dict: column name -> value (string, or None for an empty cell)
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open('content.xml') as content:
+        content_size = archive.getinfo('content.xml').file_size or 1
+        rows_read = 0
+        wanted = None  # column number -> name, once the header has been read
+        table = None
+        for event, element in ET.iterparse(content, events=('start', 'end')):
+            if event == 'start':
+                if element.tag == TABLE and table is None:
+                    table = element
+                continue
+            if element.tag == TABLE and element is table:
+                break  # only the first sheet
+            if element.tag != ROW or table is None:
+                continue
+            cells = {}
+            column = 0
+            last = max(wanted) if wanted else None
+            for cell in element:
+                if cell.tag not in CELLS:
+                    continue
+                repeat = int(cell.get(COLUMNS_REPEATED, 1))
+                if wanted is None:
+                    value = cell_value(cell, None)
+                    if value is not None:
+                        cells[column] = value
+                else:
+                    for col in range(column, min(column + repeat, last + 1)):
+                        if col in wanted:
+                            value = cell_value(cell, ODS_VALUE.get(wanted[col]))
+                            if value is not None:
+                                cells[col] = value
+                column += repeat
+                if last is not None and column > last:
+                    break
+            table.clear()
+            rows_read += 1
+            if progress is not None and rows_read % PROGRESS_ROWS == 0:
+                progress(content.tell() / content_size)
+            if not cells:
+                continue
+            if wanted is None:
+                header = {name: col for col, name in cells.items()}
+                missing = [name for name in columns if name not in header]
+                if missing:
+                    raise ValueError(f"{file_path} has no {', '.join(missing)} column")
+                wanted = {header[name]: name for name in columns}
+                continue
+            row = {name: cells.get(col) for col, name in wanted.items()}
+            for _ in range(int(element.get(ROWS_REPEATED, 1))):
+                yield row
+
+def save_ods(tasks, file_path):
+    """
+    Saves the tasks to an ods file
+
+    Parameters:
+    tasks (TaskStore): the tasks
+    file_path (string): The file path
+    """
+    import pandas as pd  # slow to import, so only when saving ods
+    df = tasks.to_dataframe()
+    # same layout as load_ods reads: comma separated names, empty if none
+    df['dependencies'] = [','.join(deps) if deps else None for deps in df['dependencies']]
+    with pd.ExcelWriter(file_path, engine="odf") as doc:
+        df.to_excel(doc, columns=COLUMNS, sheet_name="Sheet1")
+
+def save_native(tasks, file_path):
+    """
+    Saves the tasks in the native format.  The dependency lists are stored
+    CSR style: the dependencies of task i are rows
+    dep_rows[dep_start[i]:dep_start[i+1]].  Names that don't match a task
+    are kept in dep_unknown and stored as negative rows (-1 - position).
+
+    Parameters:
+    tasks (TaskStore): the tasks
+    file_path (string): The file path
+    """
+    names = tasks['task']
+    # (the store's dangling dependencies are numbered the same way)
+    dep_start, dep_rows = tasks.dependency_rows()
+    with open(file_path, 'wb') as file:
+        np.savez_compressed(
+            file,
+            version=np.array(NATIVE_VERSION),
+            task=np.array(names.tolist(), dtype=str),
+            teams=np.array(tasks.teams, dtype=str),
+            team_codes=tasks.team_codes,
+            start=tasks['start'],
+            end=tasks['end'],
+            completion_frac=tasks['completion_frac'],
+            dep_start=dep_start,
+            dep_rows=dep_rows,
+            dep_unknown=np.array(tasks.dangling_names, dtype=str),
+        )
+
+def load_native(file_path):
+    """
+    Loads a plan saved by save_native
+
+    Parameters:
+    file_path (string): The file path
+
+    Returns:
+    TaskStore: the tasks in the file
+    """
+    with np.load(file_path, allow_pickle=False) as data:
+        version = int(data['version'])
+        if version > NATIVE_VERSION:
+            raise ValueError(f"{file_path} was saved by a newer version (format {version})")
+        names = data['task'].astype(object)
+        dep_start = data['dep_start']
+        dep_rows = data['dep_rows']
+        # rows >= 0 are tasks, negative rows index dep_unknown from the end
+        lookup = np.concatenate([names, data['dep_unknown'].astype(object)[::-1]])
+        dep_names = lookup[dep_rows] if len(dep_rows) else dep_rows.astype(object)
+        dependencies = np.split(dep_names, dep_start[1:-1])
+        return TaskStore.from_columns(names, data['teams'].tolist(), data['team_codes'],
+                                      data['start'], data['end'], data['completion_frac'],
+                                      dependencies)
@@ -0,0 +1,77 @@
+"""
+FasttGantt: how many tasks each team has on at each date
+
+The load of a team on a day is the number of its tasks running that day
+(from the start date to the end date, inclusive).  Rather than adding one
+to every day of every task, each task adds +1 on its start day and -1 on
+the day after its end in a difference array, and a running total along
+the days turns that into the load.  So working it out is
+O(tasks + days x teams) however long the tasks are, and a multi-year plan
+of thousands of tasks takes a few milliseconds.
+"""
+import numpy as np
+
+TEAM_CAPACITY = 1  # tasks a team can work on at once, unless set per team
+
+class TeamLoad:
+    """
+    Daily load of each team over the whole plan
+    """
+    def __init__(self, teams, first_day, load, capacity):
+        """
+        Parameters:
+        teams (list): team name of each row of load
+        first_day (int): day of column 0, in days from the start of the project
+        load (array): (teams, days) number of tasks each team has on each day
+        capacity (array): tasks each team can have on at once
+        """
+        self.teams = teams
+        self.first_day = first_day
+        self.load = load
+        self.capacity = capacity
+        self.over = load > capacity[:, None]  # over-allocated days
+
+    @property
+    def days(self):
+        """
+        Day of each column, in days from the start of the project
+        """
+        return np.arange(self.first_day, self.first_day + self.load.shape[1])
+
+    def over_allocated_days(self):
+        """
+        Returns:
+        array: the days (from the start of the project) any team is over-allocated
+        """
+        return self.days[self.over.any(axis=0)]
+
+def team_load(tasks, capacity=None):
+    """
+    Work out the daily load of each team
+
+    Parameters:
+    tasks (TaskStore): the tasks
+    capacity (int or dict): tasks a team can have on at once, or team name ->
+                            that (teams not in it get TEAM_CAPACITY)
+
+    Returns:
+    TeamLoad: the load
+    """
+    teams = list(tasks.teams)
+    if isinstance(capacity, dict):
+        capacity = np.array([capacity.get(team, TEAM_CAPACITY) for team in teams])
+    else:
+        capacity = np.full(len(teams), TEAM_CAPACITY if capacity is None else capacity)
+    if not len(tasks):
+        return TeamLoad(teams, 0, np.zeros((len(teams), 0), dtype=np.int64), capacity)
+    start = tasks['days_to_start']
+    end = np.maximum(tasks['days_to_end'], start - 1)  # (nothing on if it ends first)
+    first_day = int(start.min())
+    days = int(end.max()) - first_day + 1
+    # one spare column at the end of each row for the -1s after the last day
+    width = days + 1
+    codes = tasks.team_codes.astype(np.int64) * width
+    diff = np.bincount(codes + (start - first_day), minlength=len(teams) * width)
+    diff -= np.bincount(codes + (end - first_day + 1), minlength=len(teams) * width)
+    load = np.cumsum(diff.reshape(len(teams), width), axis=1)[:, :days]
+    return TeamLoad(teams, first_day, load, capacity)
@@ -0,0 +1,63 @@
+"""
+FasttGantt: coalesced refreshing of the task list and chart
+
+Event handlers don't refresh the widgets themselves, they mark what has
+become out of date (the dirty regions below) and the RedrawScheduler
+refreshes all of it once, when Tk is next idle.  So a handler that changes
+several things, or a burst of changes, costs one refresh, and a change of
+selection doesn't touch the chart at all.
+"""
+
+# the dirty regions
+DATA = 'data'            # tasks changed: the task list and their chart bars
+SELECTION = 'selection'  # only the selected task changed
+TREE = 'tree'            # the task list
+CHART = 'chart'          # the bars and arrows of some tasks (see mark's rows)
+LAYOUT = 'layout'        # the whole chart (colours, dates, title, number of tasks...)
+
+class RedrawScheduler:
+    """
+    Collects dirty regions and hands them to a refresh function once, from
+    after_idle
+    """
+    def __init__(self, root, refresh):
+        """
+        Parameters:
+        root (tk.Tk): the Tk root, for after_idle
+        refresh (function): refresh(regions, rows) brings the given regions
+                            (a set) up to date, rows being the changed chart rows
+        """
+        self.root = root
+        self.refresh = refresh
+        self.dirty = set()
+        self.rows = set()
+        self.pending = None
+
+    def mark(self, *regions, rows=()):
+        """
+        Mark regions as out of date, to be refreshed when Tk is idle
+
+        Parameters:
+        regions (string): DATA, SELECTION, TREE, CHART and/or LAYOUT
+        rows (iterable): rows of the tasks whose bars changed (DATA or CHART)
+        """
+        self.dirty.update(regions)
+        self.rows.update(rows)
+        if self.pending is None:
+            self.pending = self.root.after_idle(self.flush)
+
+    def flush(self):
+        """
+        Refresh everything that's out of date now (also called from after_idle)
+        """
+        if self.pending is not None:
+            self.root.after_cancel(self.pending)
+            self.pending = None
+        dirty, rows = self.dirty, self.rows
+        self.dirty, self.rows = set(), set()
+        if DATA in dirty:
+            dirty |= {TREE, CHART}
+        if LAYOUT in dirty:
+            dirty.discard(CHART)  # the whole chart is redrawn anyway
+        if dirty:
+            self.refresh(dirty, sorted(rows))
@@ -0,0 +1,252 @@
+"""
+FasttGantt: critical path scheduling over the task dependencies
+
+A dependency means the task can't start until the dependency has finished
+(finish-to-start).  Each task's planned start is treated as "start no
+earlier than", so for every task:
+
+    earliest start  = max(planned start, earliest finish of each dependency)
+    latest finish   = min(project end, latest start of each dependent task)
+    slack           = latest start - earliest start
+
+and the critical tasks are those with no slack.  All values are in days from
+the start of the project (TaskStore.origin); a task finishes at the start of
+the day after its end date.  The passes run level by level over the
+topological order, each level being one vectorized NumPy step.
+"""
+import heapq
+import numpy as np
+from gantt_store import expand_ranges
+
+class CycleError(ValueError):
+    """
+    The dependencies have a cycle, so the tasks can't be scheduled
+    """
+    def __init__(self, cycle, blocked):
+        """
+        Parameters:
+        cycle (list): task names around one cycle, each depending on the one before
+        blocked (list): names of all the tasks that can't be scheduled
+        """
+        super().__init__("dependency cycle: " + " -> ".join(cycle + cycle[:1]))
+        self.cycle = cycle
+        self.blocked = blocked
+
+class DependencyGraph:
+    """
+    The dependencies as integer edges between task rows, with the dependents
+    of each task (successors) and its dependencies (predecessors) in CSR form
+    and the tasks grouped into topological levels.  Build it once and reuse
+    it until the dependencies (or the order of the tasks) change, renaming
+    tasks doesn't change it.
+    """
+    def __init__(self, tasks):
+        """
+        Parameters:
+        tasks (TaskStore): the tasks
+        """
+        n = len(tasks)
+        self.version = tasks.graph_version
+        self.names = tasks['task']
+        dep_start, src = tasks.dependency_rows()
+        dst = np.repeat(np.arange(n, dtype=np.int64), np.diff(dep_start))
+        known = src >= 0
+        # (task, dependency) pairs naming no task, they are ignored
+        self.unknown = [] if known.all() else tasks.dangling()
+        self.src = src[known]  # the dependency of each edge
+        self.dst = dst[known]  # the dependent task of each edge
+        # the store keeps both directions, so there's nothing to sort
+        self.succ_start, self.succ = tasks.dependent_rows()
+        self.pred_start = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.dst, minlength=n), out=self.pred_start[1:])
+        self.pred = self.src
+        self.level = self.topological_levels()
+
+    def __len__(self):
+        return len(self.succ_start) - 1
+
+    def successors(self, rows):
+        """
+        The dependent tasks of some tasks (with repeats)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.succ_start[rows]
+        return self.succ[expand_ranges(starts, self.succ_start[rows + 1] - starts)]
+
+    def predecessors(self, row):
+        """
+        The dependencies of one task
+        """
+        return self.pred[self.pred_start[row]:self.pred_start[row + 1]]
+
+    def topological_levels(self):
+        """
+        Kahn's algorithm, a whole frontier at a time.  Tasks without
+        dependencies are level 0, otherwise a task's level is one more than
+        its deepest dependency.
+
+        Returns:
+        array: level of each task, -1 for tasks in (or after) a cycle
+        """
+        n = len(self)
+        remaining = np.bincount(self.dst, minlength=n)
+        level = np.full(n, -1, dtype=np.int64)
+        frontier = np.flatnonzero(remaining == 0)
+        depth = 0
+        while frontier.size:
+            level[frontier] = depth
+            targets = self.successors(frontier)
+            np.subtract.at(remaining, targets, 1)
+            targets = np.unique(targets)
+            frontier = targets[remaining[targets] == 0]
+            depth += 1
+        return level
+
+    def check_cycles(self):
+        """
+        Raise CycleError if the dependencies have a cycle
+        """
+        blocked = np.flatnonzero(self.level < 0)
+        if not blocked.size:
+            return
+        # every blocked task has a blocked dependency, so walking back through
+        # them must come round to a task already seen
+        seen = {}
+        row = int(blocked[0])
+        while row not in seen:
+            seen[row] = len(seen)
+            deps = self.predecessors(row)
+            row = int(deps[self.level[deps] < 0][0])
+        walk = list(seen)[seen[row]:]
+        cycle = [self.names[r] for r in reversed(walk)]
+        raise CycleError(cycle, [self.names[r] for r in blocked])
+
+    def edge_levels(self, by):
+        """
+        The edges grouped by the level of their dependency (by='src') or of
+        their dependent task (by='dst')
+
+        Returns:
+        tuple: (edge indices sorted by level, start of each level's edges)
+        """
+        levels = self.level[self.src if by == 'src' else self.dst]
+        order = np.argsort(levels, kind='stable')
+        bounds = np.searchsorted(levels[order], np.arange(self.level.max(initial=0) + 2))
+        return order, bounds
+
+class Schedule:
+    """
+    Result of the critical path passes, one array entry per task, in days
+    from the start of the project
+    """
+    def __init__(self, tasks, graph, earliest_start, latest_finish):
+        self.origin = tasks.origin
+        self.names = tasks['task']
+        self.graph = graph
+        self.duration = tasks['task_duration']
+        self.earliest_start = earliest_start
+        self.earliest_finish = earliest_start + self.duration
+        self.latest_finish = latest_finish
+        self.latest_start = latest_finish - self.duration
+        self.slack = self.latest_start - self.earliest_start
+        self.critical = self.slack <= 0
+        self.project_end = int(self.earliest_finish.max(initial=0))
+
+    def critical_path(self):
+        """
+        One chain of critical tasks, from the start of the project to its end
+
+        Returns:
+        list: the task rows, in order
+        """
+        if not len(self.names):
+            return []
+        row = int(np.argmax(self.earliest_finish))
+        path = [row]
+        while True:
+            deps = self.graph.predecessors(row)
+            # the dependency that stops this task starting any earlier
+            driving = deps[self.critical[deps] &
+                           (self.earliest_finish[deps] == self.earliest_start[row])]
+            if not driving.size:
+                break
+            row = int(driving[0])
+            path.append(row)
+        return path[::-1]
+
+    def dates(self, days):
+        """
+        Convert days from the start of the project to dates
+        """
+        return self.origin + np.asarray(days).astype('timedelta64[D]')
+
+def schedule(tasks, graph=None):
+    """
+    Work out the earliest and latest start, slack and critical tasks
+
+    Parameters:
+    tasks (TaskStore): the tasks
+    graph (DependencyGraph): the tasks' dependencies, built if not given
+
+    Returns:
+    Schedule: the results
+    """
+    if graph is None:
+        graph = DependencyGraph(tasks)
+    graph.check_cycles()
+    src, dst = graph.src, graph.dst
+    duration = tasks['task_duration']
+    # forward pass: a level's start dates are final once the levels before are done
+    earliest_start = tasks['days_to_start'].copy()
+    order, bounds = graph.edge_levels('src')
+    for depth in range(len(bounds) - 1):
+        edges = order[bounds[depth]:bounds[depth + 1]]
+        np.maximum.at(earliest_start, dst[edges],
+                      earliest_start[src[edges]] + duration[src[edges]])
+    project_end = (earliest_start + duration).max(initial=0)
+    # backward pass, from the last level
+    latest_finish = np.full(len(tasks), project_end, dtype=np.int64)
+    order, bounds = graph.edge_levels('dst')
+    for depth in range(len(bounds) - 2, 0, -1):
+        edges = order[bounds[depth]:bounds[depth + 1]]
+        np.minimum.at(latest_finish, src[edges],
+                      latest_finish[dst[edges]] - duration[dst[edges]])
+    return Schedule(tasks, graph, earliest_start, latest_finish)
+
+def push_dependents(tasks, graph, rows):
+    """
+    After some tasks have moved or grown, move the tasks that depend on them
+    (directly or not) later, just far enough that none starts before all its
+    dependencies have ended.  Only the tasks downstream of the changed ones
+    are visited: a dirty set of tasks to check, taken in topological order
+    so each is checked once, and a task's dependents only become dirty if it
+    actually moved.  Tasks are never moved earlier.
+
+    Parameters:
+    tasks (TaskStore): the tasks, already edited
+    graph (DependencyGraph): the tasks' dependencies
+    rows (list): rows of the tasks that changed
+
+    Returns:
+    list: rows of the tasks that were moved
+    """
+    graph.check_cycles()
+    start = tasks['start']
+    end = tasks['end']
+    one_day = np.timedelta64(1, 'D')
+    dirty = set(graph.successors(rows).tolist())
+    work = [(graph.level[row], row) for row in dirty]
+    heapq.heapify(work)
+    moved = []
+    while work:
+        _, row = heapq.heappop(work)
+        earliest = end[graph.predecessors(row)].max() + one_day
+        if start[row] >= earliest:
+            continue
+        tasks.set_task(row, start=earliest, end=end[row] + (earliest - start[row]))
+        moved.append(row)
+        for dependent in graph.successors([row]).tolist():
+            if dependent not in dirty:
+                dirty.add(dependent)
+                heapq.heappush(work, (graph.level[dependent], dependent))
+    return moved
@@ -0,0 +1,939 @@
+"""
+FasttGantt: array backed storage for the task table
+"""
+from itertools import chain, count, repeat
+import numpy as np
+from gantt_undo import CellsDelta, OrderDelta, RowsDelta
+
+# columns that are saved to / loaded from a project file
+COLUMNS = ['task', 'team', 'start', 'end', 'completion_frac', 'dependencies']
+# columns calculated from the dates and the start of the project
+DERIVED = ['days_to_start', 'days_to_end', 'task_duration', 'completion_days']
+DTYPES = {
+    'task': object,
+    'team': np.int32,           # code into TaskStore.teams
+    'start': 'datetime64[D]',
+    'end': 'datetime64[D]',
+    'completion_frac': np.float64,
+    'id': np.int64,             # stable id of the task, see TaskStore.row_of_id
+    'days_to_start': np.int64,
+    'days_to_end': np.int64,
+    'task_duration': np.int64,
+    'completion_days': np.float64,
+}
+# graph versions are unique across stores, see TaskStore.graph_version
+_graph_versions = count()
+
+def expand_ranges(starts, counts):
+    """
+    Concatenate the ranges start:start+count
+
+    Parameters:
+    starts, counts (array): first index and length of each range
+
+    Returns:
+    array: the indices in all the ranges, in order
+    """
+    ends = np.cumsum(counts)
+    return np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - counts - starts, counts)
+
+def csr_from_pairs(size, keys, values):
+    """
+    Group values by key, CSR style: the values of key k are
+    indices[indptr[k]:indptr[k+1]], in the order they were given
+
+    Parameters:
+    size (int): number of keys
+    keys, values (array): the key and value of each pair
+
+    Returns:
+    tuple: (indptr, indices) arrays
+    """
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=indptr[1:])
+    return indptr, values[np.argsort(keys, kind='stable')]
+
+def csr_replace(indptr, indices, key, values):
+    """
+    Replace the values of one key of a CSR pair, indptr is patched in place
+
+    Returns:
+    array: the new indices
+    """
+    first, last = indptr[key], indptr[key + 1]
+    indptr[key + 1:] += len(values) - (last - first)
+    return np.concatenate([indices[:first], values, indices[last:]])
+
+class TaskRow:
+    """
+    A view of one task in a TaskStore.  Reads go straight to the store's
+    arrays, so a view is only valid until the store is next changed.
+    """
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __getitem__(self, column):
+        return self.store.get(self.row, column)
+
+    def __repr__(self):
+        return f"TaskRow({self.row}, {self['task']!r})"
+
+class TaskStore:
+    """
+    The task table as one NumPy array per column.
+
+    The arrays are over-allocated so that appending is O(1) amortized, rows
+    can be swapped in place, and the derived columns (days_to_start etc.)
+    are updated in place for a single task or recalculated for all tasks in
+    one vectorized pass.  Team names are interned as small integer codes and
+    task names are indexed so that lookups by name are O(1).
+
+    Each task also has an integer id that stays the same when it's renamed
+    or moved, and its dependencies are stored as the ids of the tasks it
+    depends on, so renaming a task doesn't touch the tasks that depend on
+    it.  Names of dependencies that aren't tasks (e.g. a typo in a
+    spreadsheet) are kept in dangling_names, a dependency id of -1-k
+    standing for dangling_names[k].  The dependencies of each task id, and
+    the dependents of each (the reverse edges), are kept CSR style and
+    patched as they change, and as they're keyed by id moving the tasks
+    around doesn't touch them.
+
+    If a Journal is attached (self.journal), every change is recorded in
+    it as a delta so that it can be undone.
+    """
+    __slots__ = ('_columns', '_n', 'teams', '_team_codes', '_index', 'origin', 'graph_version',
+                 'journal', '_row_of_id', '_next_id', 'dangling_names', '_dangling_codes',
+                 '_dep_ptr', '_dep_ids', '_rdep_ptr', '_rdep_ids', '_dependency_rows',
+                 '_dependency_names')
+
+    def __init__(self, capacity=16):
+        """
+        Create an empty store
+
+        Parameters:
+        capacity (int): number of tasks to allocate space for up front
+        """
+        self._columns = {name: np.empty(capacity, dtype) for name, dtype in DTYPES.items()}
+        self._n = 0
+        self.teams = []        # team name of each team code
+        self._team_codes = {}  # team name -> team code
+        self._index = {}       # task name -> row
+        self.origin = None     # earliest start date, days are counted from here
+        self._row_of_id = np.full(capacity, -1, dtype=np.int64)  # -1 once deleted
+        self._next_id = 0
+        self.dangling_names = []    # dependency names that aren't tasks
+        self._dangling_codes = {}   # dangling name -> its position in dangling_names
+        # the ids each task id depends on are _dep_ids[_dep_ptr[id]:_dep_ptr[id+1]],
+        # and the ids depending on it _rdep_ids[_rdep_ptr[id]:_rdep_ptr[id+1]]
+        self._dep_ptr = np.zeros(capacity + 1, dtype=np.int64)
+        self._dep_ids = np.empty(0, dtype=np.int64)
+        self._rdep_ptr = np.zeros(capacity + 1, dtype=np.int64)
+        self._rdep_ids = np.empty(0, dtype=np.int64)
+        self._dependency_rows = None   # dependency_rows(), until the graph changes
+        self._dependency_names = None  # self['dependencies'], kept up to date once made
+        # changes whenever the dependency graph might have (task order or
+        # dependencies), so anything built from the graph knows to rebuild
+        self.graph_version = next(_graph_versions)
+        self.journal = None    # gantt_undo.Journal recording the changes, if any
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, column):
+        """
+        A whole column, as a read-only view (teams are decoded to their names,
+        dependencies to lists of names)
+        """
+        if column == 'team':
+            return np.array(self.teams, dtype=object)[self.team_codes]
+        if column == 'dependencies':
+            return self.dependency_names()
+        view = self._columns[column][:self._n]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def team_codes(self):
+        """
+        The team code of each task, see self.teams
+        """
+        view = self._columns['team'][:self._n]
+        view.flags.writeable = False
+        return view
+
+    def get(self, row, column):
+        """
+        The value in one cell of the table
+        """
+        if column == 'team':
+            return self.teams[self._columns['team'][row]]
+        if column == 'dependencies':
+            return self._names_of(self._dependency_ids(self._columns['id'][row]))
+        return self._columns[column][row]
+
+    def row_of_id(self, task_id):
+        """
+        Row of the task with a given id, -1 if it's been deleted
+        """
+        return self._row_of_id[task_id]
+
+    def _names_of(self, ids):
+        """
+        Names of the tasks with some dependency ids
+        """
+        names = self._columns['task']
+        return [names[self._row_of_id[i]] if i >= 0 else self.dangling_names[-1 - i]
+                for i in ids.tolist()]
+
+    def _ids_of(self, names):
+        """
+        Dependency ids of some task names, names that aren't tasks are dangling
+        """
+        rows = self.rows_of(names)
+        ids = np.where(rows >= 0, self._columns['id'][rows], -1)
+        for k in np.flatnonzero(rows < 0):
+            code = self._dangling_codes.setdefault(names[k], len(self.dangling_names))
+            if code == len(self.dangling_names):
+                self.dangling_names.append(names[k])
+            ids[k] = -1 - code
+        return ids
+
+    def _resolve_dangling(self, names):
+        """
+        Point the dangling dependencies on some names at the tasks now called
+        that, after they've been added or renamed to it
+
+        Parameters:
+        names (list): names of the new or renamed tasks
+        """
+        codes = {-1 - self._dangling_codes[name]: name for name in names
+                 if name in self._dangling_codes}
+        if not codes:
+            return
+        hit = np.flatnonzero(np.isin(self._dep_ids, list(codes)))
+        if not len(hit):
+            return
+        owner_ids = np.searchsorted(self._dep_ptr, hit, side='right') - 1
+        owners = np.unique(self._row_of_id[owner_ids])
+        old = [self.get(row, 'dependencies') for row in owners]
+        targets = self._columns['id'][self.rows_of([codes[code]
+                                                    for code in self._dep_ids[hit].tolist()])]
+        self._dep_ids[hit] = targets
+        for target in np.unique(targets).tolist():
+            mine = self._rdep_ids[self._rdep_ptr[target]:self._rdep_ptr[target + 1]]
+            self._rdep_ids = csr_replace(self._rdep_ptr, self._rdep_ids, target,
+                                         np.concatenate([mine, owner_ids[targets == target]]))
+        self._graph_changed()
+        self._patch_names(owners)
+        if self.journal is not None:
+            # recorded before the change adding the names, so undoing that
+            # first leaves these names dangling again
+            self.journal.record(CellsDelta(owners, {'dependencies': old},
+                                           {'dependencies': old}))
+
+    def _new_ids(self, num):
+        """
+        Allocate ids for new tasks
+        """
+        ids = np.arange(self._next_id, self._next_id + num)
+        self._next_id += num
+        if self._next_id > len(self._row_of_id):
+            grown = np.full(max(self._next_id, 2 * len(self._row_of_id)), -1, dtype=np.int64)
+            grown[:len(self._row_of_id)] = self._row_of_id
+            self._row_of_id = grown
+            # (the new ids have no dependencies or dependents yet)
+            spare = len(grown) + 1 - len(self._dep_ptr)
+            self._dep_ptr = np.append(self._dep_ptr, np.repeat(self._dep_ptr[-1], spare))
+            self._rdep_ptr = np.append(self._rdep_ptr, np.repeat(self._rdep_ptr[-1], spare))
+        return ids
+
+    def _dependency_ids(self, task_id):
+        """
+        Ids of the tasks one task depends on (negative for dangling names)
+        """
+        return self._dep_ids[self._dep_ptr[task_id]:self._dep_ptr[task_id + 1]]
+
+    def _set_dependency_ids(self, task_id, ids):
+        """
+        Change the dependencies of one task, patching the dependents of the
+        tasks it did and now does depend on
+        """
+        old = self._dependency_ids(task_id)
+        old = old[old >= 0]
+        self._dep_ids = csr_replace(self._dep_ptr, self._dep_ids, task_id, ids)
+        new = ids[ids >= 0]
+        for target in np.union1d(old, new).tolist():
+            mine = self._rdep_ids[self._rdep_ptr[target]:self._rdep_ptr[target + 1]]
+            mine = np.concatenate([mine[mine != task_id],
+                                   np.repeat(task_id, np.count_nonzero(new == target))])
+            self._rdep_ids = csr_replace(self._rdep_ptr, self._rdep_ids, target, mine)
+        self._graph_changed()
+
+    def _set_edges(self, owners, ids):
+        """
+        Replace all the dependencies at once
+
+        Parameters:
+        owners (array): id of the depending task of each dependency
+        ids (array): id depended on by each (negative for dangling names),
+                     the dependencies of a task in order
+        """
+        size = len(self._row_of_id)
+        self._dep_ptr, self._dep_ids = csr_from_pairs(size, owners, ids)
+        known = ids >= 0
+        self._rdep_ptr, self._rdep_ids = csr_from_pairs(size, ids[known], owners[known])
+        self._graph_changed()
+
+    def _edges(self):
+        """
+        All the dependencies, as _set_edges takes them
+        """
+        owners = np.repeat(np.arange(len(self._dep_ptr) - 1), np.diff(self._dep_ptr))
+        return owners, self._dep_ids
+
+    def dependency_rows(self):
+        """
+        The dependencies of every task as rows, CSR style: the dependencies of
+        task i are rows[start[i]:start[i+1]].  Dependencies that aren't tasks
+        are negative, -1-k for dangling_names[k].
+
+        Returns:
+        tuple: (start, rows) arrays
+        """
+        if self._dependency_rows is None:
+            self._dependency_rows = self._rows_csr(self._dep_ptr, self._dep_ids)
+        return self._dependency_rows
+
+    def dependent_rows(self):
+        """
+        The tasks depending on every task as rows, CSR style like dependency_rows
+
+        Returns:
+        tuple: (start, rows) arrays
+        """
+        return self._rows_csr(self._rdep_ptr, self._rdep_ids)
+
+    def _rows_csr(self, indptr, indices):
+        """
+        A CSR pair keyed by id turned into one keyed by row, with rows for values
+        """
+        n = self._n
+        ids = self._columns['id'][:n]
+        firsts = indptr[ids]
+        counts = indptr[ids + 1] - firsts
+        start = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=start[1:])
+        rows = indices[expand_ranges(firsts, counts)]
+        known = rows >= 0
+        rows[known] = self._row_of_id[rows[known]]
+        start.flags.writeable = False
+        rows.flags.writeable = False
+        return start, rows
+
+    def dependency_names(self):
+        """
+        The dependencies of every task as lists of names (self['dependencies']),
+        looked up in one pass and then patched as tasks are renamed, moved
+        or have their dependencies changed
+
+        Returns:
+        array: read-only array of lists of names
+        """
+        if self._dependency_names is None:
+            start, rows = self.dependency_rows()
+            # dangling (negative) rows index the end of the lookup
+            lookup = np.concatenate([self._columns['task'][:self._n],
+                                     np.array(self.dangling_names[::-1], dtype=object)])
+            names = lookup[rows].tolist()
+            bounds = start.tolist()
+            self._dependency_names = np.fromiter(
+                (names[bounds[k]:bounds[k + 1]] for k in range(self._n)),
+                dtype=object, count=self._n)
+        view = self._dependency_names.view()
+        view.flags.writeable = False
+        return view
+
+    def _patch_names(self, rows):
+        """
+        Look the dependency names of some tasks up again, if they're kept
+        """
+        if self._dependency_names is not None:
+            for row in np.asarray(rows).tolist():
+                self._dependency_names[row] = self.get(row, 'dependencies')
+
+    def dangling(self):
+        """
+        Dependencies that don't name a task
+
+        Returns:
+        list: (task name, dependency name) pairs
+        """
+        start, rows = self.dependency_rows()
+        bad = np.flatnonzero(rows < 0)
+        owners = np.searchsorted(start, bad, side='right') - 1
+        return [(self._columns['task'][owner], self.dangling_names[-1 - rows[k]])
+                for owner, k in zip(owners.tolist(), bad.tolist())]
+
+    def _graph_changed(self):
+        """
+        The order of the tasks or their dependencies changed
+        """
+        self.graph_version = next(_graph_versions)
+        self._dependency_rows = None
+
+    def row(self, row):
+        """
+        A TaskRow view of one task
+        """
+        if not 0 <= row < self._n:
+            raise IndexError(f"task row {row} out of range")
+        return TaskRow(self, row)
+
+    def index_of(self, name):
+        """
+        Row of the task with a given name, or None
+        """
+        return self._index.get(name)
+
+    def rows_of(self, names):
+        """
+        Rows of many tasks at once
+
+        Parameters:
+        names (list): task names
+
+        Returns:
+        array: the row of each task, -1 for names that aren't tasks
+        """
+        return np.fromiter(map(self._index.get, names, repeat(-1, len(names))),
+                           dtype=np.int64, count=len(names))
+
+    def team_code(self, team):
+        """
+        Code of a team name, interning it if it's new
+        """
+        code = self._team_codes.get(team)
+        if code is None:
+            code = len(self.teams)
+            self.teams.append(team)
+            self._team_codes[team] = code
+        return code
+
+    def assigned_teams(self):
+        """
+        Returns:
+        set: names of the teams with at least one task
+        """
+        return {self.teams[code] for code in np.unique(self.team_codes)}
+
+    def _reserve(self, capacity):
+        """
+        Grow the arrays (by doubling) to hold at least capacity tasks
+        """
+        size = len(self._columns['task'])
+        if capacity <= size:
+            return
+        size = max(capacity, 2 * size)
+        for name, old in self._columns.items():
+            new = np.empty(size, old.dtype)
+            new[:self._n] = old[:self._n]
+            self._columns[name] = new
+
+    def append(self, task, team, start, end, completion_frac, dependencies=None):
+        """
+        Add a task at the end of the table
+
+        Parameters:
+        task (string): unique task name
+        team (string): team the task is assigned to
+        start, end (date): first and last dates of the task
+        completion_frac (float): fraction of the task that is complete
+        dependencies (list): names of the tasks this one depends on
+
+        Returns:
+        int: row of the new task
+        """
+        if task in self._index:
+            raise ValueError('task name must be unique')
+        self._reserve(self._n + 1)
+        row = self._n
+        self._n += 1
+        cols = self._columns
+        cols['task'][row] = task
+        cols['team'][row] = self.team_code(team)
+        cols['start'][row] = np.datetime64(start, 'D')
+        cols['end'][row] = np.datetime64(end, 'D')
+        cols['completion_frac'][row] = completion_frac
+        cols['id'][row] = self._new_ids(1)[0]
+        self._row_of_id[cols['id'][row]] = row
+        self._index[task] = row
+        # (after indexing it, so depending on itself isn't left dangling)
+        self._set_dependency_ids(cols['id'][row], self._ids_of(list(dependencies or [])))
+        if self._dependency_names is not None:
+            names = np.empty(self._n, dtype=object)
+            names[:row] = self._dependency_names
+            names[row] = self.get(row, 'dependencies')
+            self._dependency_names = names
+        self._update_derived(row)
+        self._resolve_dangling([task])
+        if self.journal is not None:
+            rows = np.array([row])
+            self.journal.record(RowsDelta(rows, self._rows_data(rows), inserted=True))
+        return row
+
+    def set_task(self, row, **values):
+        """
+        Change some of the columns of one task, e.g.
+        store.set_task(3, start=date, end=date)
+
+        Parameters:
+        row (int): the task's row
+        values: new values for any of the columns in COLUMNS
+        """
+        cols = self._columns
+        unknown = set(values) - set(COLUMNS)
+        if unknown:
+            raise KeyError(f"unknown task columns: {sorted(unknown)}")
+        if self.journal is not None:
+            old = {column: [self.get(row, column)] for column in values}
+        if 'task' in values:
+            name = values['task']
+            old_name = cols['task'][row]
+            if name != old_name:
+                if name in self._index:
+                    raise ValueError('task name must be unique')
+                del self._index[old_name]
+                self._index[name] = row
+                cols['task'][row] = name
+                # the tasks depending on it refer to its id, so only their names change
+                dependents = self._rdep_ids[self._rdep_ptr[cols['id'][row]]:
+                                            self._rdep_ptr[cols['id'][row] + 1]]
+                self._patch_names(np.unique(self._row_of_id[dependents]))
+                self._resolve_dangling([name])
+        if 'team' in values:
+            cols['team'][row] = self.team_code(values['team'])
+        if 'completion_frac' in values:
+            cols['completion_frac'][row] = values['completion_frac']
+        if 'dependencies' in values:
+            self._set_dependency_ids(cols['id'][row], self._ids_of(list(values['dependencies'])))
+            self._patch_names([row])
+        old_start = cols['start'][row]
+        for column in ('start', 'end'):
+            if column in values:
+                cols[column][row] = np.datetime64(values[column], 'D')
+        self._update_derived(row, moved_from=old_start)
+        if self.journal is not None:
+            new = {column: [self.get(row, column)] for column in values}
+            self.journal.record(CellsDelta(np.array([row]), old, new))
+
+    def set_tasks(self, rows, **values):
+        """
+        Change some of the columns of many tasks at once, e.g.
+        store.set_tasks(rows, team='IT') or store.set_tasks(rows, start=starts, end=ends)
+
+        Parameters:
+        rows (array): the tasks' rows
+        values: a value, or an array with a value for each row, for any of
+                'team', 'start', 'end' and 'completion_frac'
+        """
+        cols = self._columns
+        unknown = set(values) - {'team', 'start', 'end', 'completion_frac'}
+        if unknown:
+            raise KeyError(f"can't set these columns of many tasks: {sorted(unknown)}")
+        rows = np.asarray(rows, dtype=np.int64)
+        if self.journal is not None:
+            old = self._cells(rows, values)
+        if 'team' in values:
+            teams = values['team']
+            if isinstance(teams, str):
+                cols['team'][rows] = self.team_code(teams)
+            else:
+                cols['team'][rows] = [self.team_code(team) for team in teams]
+        if 'completion_frac' in values:
+            cols['completion_frac'][rows] = values['completion_frac']
+        old_start = cols['start'][rows]
+        for column in ('start', 'end'):
+            if column in values:
+                cols[column][rows] = np.asarray(values[column]).astype('datetime64[D]')
+        self._update_derived(rows, moved_from=old_start)
+        if self.journal is not None:
+            self.journal.record(CellsDelta(rows, old, self._cells(rows, values)))
+
+    def _cells(self, rows, columns):
+        """
+        Copies of some of the columns of some tasks, teams by name
+        """
+        cols = self._columns
+        return {column: np.array(self.teams, dtype=object)[cols['team'][rows]]
+                        if column == 'team' else cols[column][rows].copy()
+                for column in columns}
+
+    def _rows_data(self, rows):
+        """
+        Copies of the COLUMNS and ids of some tasks, as insert takes them
+        """
+        data = {column: self._columns[column][rows].copy() for column in COLUMNS
+                if column != 'dependencies'}
+        data['id'] = self._columns['id'][rows].copy()
+        data['dependencies'] = np.fromiter((self._dependency_ids(task_id).copy()
+                                            for task_id in data['id'].tolist()),
+                                           dtype=object, count=len(rows))
+        return data
+
+    def insert(self, rows, data):
+        """
+        Insert tasks into the table, e.g. to put deleted tasks back
+
+        Parameters:
+        rows (array): rows the new tasks are to end up at, in increasing order
+        data (dict): column -> array of the new tasks' values for each of
+                     COLUMNS and 'id' (the team as its code, see self.teams,
+                     the dependencies as ids), e.g. from deleting them
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if not self._index.keys().isdisjoint(data['task']):
+            raise ValueError('task name must be unique')
+        n = self._n + len(rows)
+        self._reserve(n)
+        kept = np.ones(n, dtype=bool)
+        kept[rows] = False
+        for column in COLUMNS + ['id']:
+            if column == 'dependencies':
+                continue
+            values = self._columns[column]
+            values[:n][kept] = values[:self._n].copy()
+            values[rows] = data[column]
+        self._n = n
+        self._index = dict(zip(self._columns['task'][:n], range(n)))
+        self._row_of_id[self._columns['id'][:n]] = np.arange(n)
+        owners, ids = self._edges()
+        counts = np.fromiter(map(len, data['dependencies']), dtype=np.int64, count=len(rows))
+        self._set_edges(np.concatenate([owners, np.repeat(data['id'], counts)]),
+                        np.concatenate([ids, *data['dependencies']]))
+        if self._dependency_names is not None:
+            names = np.empty(n, dtype=object)
+            names[kept] = self._dependency_names
+            self._dependency_names = names
+            self._patch_names(rows)
+        self.recalculate()
+        self._resolve_dangling(list(data['task']))
+        if self.journal is not None:
+            self.journal.record(RowsDelta(rows, data, inserted=True))
+
+    def delete(self, rows):
+        """
+        Remove tasks, and the other tasks' dependencies on them
+
+        Parameters:
+        rows (array): rows of the tasks to remove
+        """
+        keep = np.ones(self._n, dtype=bool)
+        keep[rows] = False
+        rows = np.flatnonzero(~keep)
+        data = self._rows_data(rows)
+        # the tasks left that depend on the deleted ones
+        gone = data['id']
+        firsts = self._rdep_ptr[gone]
+        dependents = self._rdep_ids[expand_ranges(firsts, self._rdep_ptr[gone + 1] - firsts)]
+        dependents = np.unique(self._row_of_id[dependents])
+        dependents = dependents[keep[dependents]]
+        if self.journal is not None:
+            old = [self.get(row, 'dependencies') for row in dependents]
+        owners, ids = self._edges()
+        lost = np.zeros(len(self._row_of_id), dtype=bool)
+        lost[gone] = True
+        kept = ~lost[owners]
+        kept[ids >= 0] &= ~lost[ids[ids >= 0]]
+        self._set_edges(owners[kept], ids[kept])
+        self._take(np.flatnonzero(keep))
+        self.recalculate()  # in case the first task went
+        new_rows = np.cumsum(keep)[dependents] - 1
+        self._patch_names(new_rows)
+        if self.journal is not None:
+            # (rows from before the delete, the dependencies are put back after the tasks)
+            new = [self.get(row, 'dependencies') for row in new_rows]
+            dependents = CellsDelta(dependents, {'dependencies': old},
+                                    {'dependencies': new}) if len(dependents) else None
+            self.journal.record(RowsDelta(rows, data, inserted=False, dependents=dependents))
+
+    def move_rows(self, rows, offset):
+        """
+        Move a selection of tasks up (offset < 0) or down the table past
+        abs(offset) of the other tasks, keeping their order.  They stop at
+        the top or bottom of the table.
+
+        Parameters:
+        rows (array): rows of the tasks to move
+        offset (int): how many rows to move them by
+
+        Returns:
+        array: the new rows of the tasks
+        """
+        n = self._n
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0 or offset == 0:
+            return rows
+        if len(rows) == 1 and abs(offset) == 1 and 0 <= rows[0] + offset < n:
+            self.swap(rows[0], rows[0] + offset)
+            return rows + offset
+        # only the block from the first to the last row moved into or past changes
+        if offset < 0:
+            first, last = max(rows.min() + offset, 0), rows.max()
+        else:
+            first, last = rows.min(), min(rows.max() + offset, n - 1)
+        local = rows - first
+        moved = np.zeros(last - first + 1, dtype=bool)
+        moved[local] = True
+        # sort key of the tasks staying put: their order among themselves,
+        # the moved tasks go in just before the one they move up (down) to
+        keys = (np.cumsum(~moved) - ~moved).astype(np.float64)
+        keys[local] = np.clip(keys[local] + offset, 0, len(moved) - moved.sum()) - 0.5
+        order = np.argsort(keys, kind='stable')
+        self.reorder(first + order, first)
+        new_rows = np.empty(len(order), dtype=np.int64)
+        new_rows[order] = np.arange(len(order))
+        return first + new_rows[local]
+
+    def reorder(self, order, first=0):
+        """
+        Put the tasks in a new order
+
+        Parameters:
+        order (array): the current row of each task in the new order, from
+                       row first on (to the end of a block of the table)
+        first (int): the first row of the block being reordered
+        """
+        moved = np.flatnonzero(order != np.arange(first, first + len(order)))
+        if len(moved) == 0:
+            return
+        order = order[moved[0]:moved[-1] + 1]
+        first += moved[0]
+        if self.journal is not None:
+            self.journal.record(OrderDelta(first, order.copy()))
+        self._permute(first, order)
+
+    def _permute(self, first, order):
+        """
+        Reorder the block of rows from first on, leaving the rest of the table
+        (and the index entries of its tasks) alone
+        """
+        cols = self._columns
+        block = slice(first, first + len(order))
+        for column in cols.values():
+            column[block] = column[order]
+        if self._dependency_names is not None:
+            self._dependency_names[block] = self._dependency_names[order]
+        self._index.update(zip(cols['task'][block].tolist(), range(block.start, block.stop)))
+        self._row_of_id[cols['id'][block]] = np.arange(block.start, block.stop)
+        self._graph_changed()
+
+    def _take(self, order):
+        """
+        Keep only the given rows, in the given order
+        """
+        n = len(order)
+        self._row_of_id[self._columns['id'][:self._n]] = -1
+        for column in self._columns.values():
+            column[:n] = column[order]
+        if self._dependency_names is not None:
+            self._dependency_names = self._dependency_names[order]
+        self._n = n
+        self._index = dict(zip(self._columns['task'][:n], range(n)))
+        self._row_of_id[self._columns['id'][:n]] = np.arange(n)
+        self._graph_changed()
+
+    def swap(self, i, j):
+        """
+        Swap the rows of two tasks
+        """
+        for column in self._columns.values():
+            column[i], column[j] = column[j], column[i]
+        if self._dependency_names is not None:
+            names = self._dependency_names
+            names[i], names[j] = names[j], names[i]
+        cols = self._columns
+        self._index[cols['task'][i]] = i
+        self._index[cols['task'][j]] = j
+        self._row_of_id[cols['id'][i]] = i
+        self._row_of_id[cols['id'][j]] = j
+        self._graph_changed()
+        if self.journal is not None and i != j:
+            first, last = min(i, j), max(i, j)
+            order = np.arange(first, last + 1)
+            order[[0, -1]] = last, first
+            self.journal.record(OrderDelta(first, order))
+
+    def _update_derived(self, row, moved_from=None):
+        """
+        Update the derived columns after one task (or an array of them)
+        changed.  If the change moved the start of the project, everything
+        is recalculated.
+
+        Parameters:
+        row (int or array): the task(s) that changed
+        moved_from (datetime64 or array): the start(s) before the change
+        """
+        start = self._columns['start'][row]
+        if self.origin is None or np.any(start < self.origin) or \
+           (moved_from is not None and
+            np.any((moved_from == self.origin) & (start != moved_from))):
+            self.recalculate()
+            return
+        cols = self._columns
+        cols['days_to_start'][row] = (start - self.origin).astype(np.int64)
+        cols['days_to_end'][row] = (cols['end'][row] - self.origin).astype(np.int64)
+        #N.B. +1 in task duration to include also the end date
+        cols['task_duration'][row] = cols['days_to_end'][row] - cols['days_to_start'][row] + 1
+        cols['completion_days'][row] = cols['completion_frac'][row] * cols['task_duration'][row]
+
+    def recalculate(self):
+        """
+        Re-calculate the derived columns of every task from the start of the
+        project (needed when the earliest date referenced changes)
+        """
+        n = self._n
+        cols = self._columns
+        if n == 0:
+            self.origin = None
+            return
+        self.origin = cols['start'][:n].min()
+        np.subtract(cols['start'][:n], self.origin, out=cols['days_to_start'][:n],
+                    casting='unsafe')
+        np.subtract(cols['end'][:n], self.origin, out=cols['days_to_end'][:n],
+                    casting='unsafe')
+        np.subtract(cols['days_to_end'][:n], cols['days_to_start'][:n],
+                    out=cols['task_duration'][:n])
+        cols['task_duration'][:n] += 1  # to include also the end date
+        np.multiply(cols['completion_frac'][:n], cols['task_duration'][:n],
+                    out=cols['completion_days'][:n])
+
+    def copy(self):
+        """
+        An independent copy of the store, e.g. to save in the background
+
+        Returns:
+        TaskStore: the copy
+        """
+        return TaskStore.from_columns(self['task'], self.teams, self.team_codes, self['start'],
+                                      self['end'], self['completion_frac'], self['dependencies'])
+
+    def check_index(self):
+        """
+        Check the task name -> row lookup is in sync with the task column,
+        and the dependencies with the dependents
+
+        Returns:
+        bool: True if every task name maps to its own row and no row is
+              missing, no dangling dependency names a task, the dependents
+              are the dependencies the other way round and the dependency
+              names kept are up to date
+        """
+        dangling = self.dependency_rows()[1]
+        dangling = np.unique(dangling[dangling < 0])
+        owners, ids = self._edges()
+        known = ids >= 0
+        edges = np.stack([ids[known], owners[known]])
+        reverse = np.stack([np.repeat(np.arange(len(self._rdep_ptr) - 1),
+                                      np.diff(self._rdep_ptr)), self._rdep_ids])
+        return len(self._index) == self._n and \
+               not any(self.dangling_names[-1 - code] in self._index
+                       for code in dangling.tolist()) and \
+               self._index == dict(zip(self['task'], range(self._n))) and \
+               np.array_equal(self._row_of_id[self._columns['id'][:self._n]],
+                              np.arange(self._n)) and \
+               np.count_nonzero(self._row_of_id >= 0) == self._n and \
+               (self._row_of_id[edges] >= 0).all() and \
+               np.array_equal(edges[:, np.lexsort(edges[::-1])],
+                              reverse[:, np.lexsort(reverse[::-1])]) and \
+               (self._dependency_names is None or
+                self._dependency_names.tolist() ==
+                [self.get(row, 'dependencies') for row in range(self._n)])
+
+    @classmethod
+    def from_columns(cls, task, teams, team_codes, start, end, completion_frac, dependencies):
+        """
+        Build a store from whole columns
+
+        Parameters:
+        task (array): task names, in display order
+        teams (list): team names
+        team_codes (array): index into teams of each task's team
+        start, end (array): first and last dates of each task
+        completion_frac (array): fraction of each task that is complete
+        dependencies (iterable): list of dependency names for each task, names
+                                 that aren't tasks are kept in dangling_names
+
+        Returns:
+        TaskStore: the tasks
+        """
+        n = len(task)
+        store = cls(capacity=max(n, 16))
+        cols = store._columns
+        cols['task'][:n] = task
+        store.teams = list(teams)
+        store._team_codes = {team: code for code, team in enumerate(store.teams)}
+        cols['team'][:n] = team_codes
+        cols['start'][:n] = np.asarray(start).astype('datetime64[D]')
+        cols['end'][:n] = np.asarray(end).astype('datetime64[D]')
+        cols['completion_frac'][:n] = completion_frac
+        store._n = n
+        store._index = dict(zip(cols['task'][:n], range(n)))
+        if len(store._index) != n:
+            raise ValueError('task names must be unique')
+        cols['id'][:n] = store._new_ids(n)
+        store._row_of_id[:n] = np.arange(n)
+        # look all the dependency names up at once (ids are rows to start
+        # with), the names that aren't tasks become dangling ids
+        dependencies = [list(deps) for deps in dependencies]
+        counts = np.fromiter(map(len, dependencies), dtype=np.int64, count=n)
+        dep_names = list(chain.from_iterable(dependencies))
+        ids = store.rows_of(dep_names)
+        dangling = np.flatnonzero(ids < 0)
+        if len(dangling):
+            names, codes = np.unique(np.array(dep_names, dtype=object)[dangling],
+                                     return_inverse=True)
+            store.dangling_names = names.tolist()
+            store._dangling_codes = {name: code for code, name in enumerate(names)}
+            ids[dangling] = -1 - codes
+        store._set_edges(np.repeat(np.arange(n), counts), ids)
+        store.recalculate()
+        return store
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Build a store from a DataFrame with the COLUMNS of a project file
+        (dependencies already converted to lists)
+
+        Parameters:
+        df (DataFrame): the tasks, in display order
+
+        Returns:
+        TaskStore: the tasks
+        """
+        import pandas as pd  # only needed here, and it's slow to import
+        codes, teams = pd.factorize(df['team'])
+        return cls.from_columns(df['task'].to_numpy(dtype=object), teams, codes,
+                                df['start'].to_numpy(), df['end'].to_numpy(),
+                                df['completion_frac'].to_numpy(dtype=np.float64),
+                                df['dependencies'])
+
+    def to_dataframe(self):
+        """
+        Export the tasks (and derived columns) as a DataFrame
+
+        Returns:
+        DataFrame: one row per task, indexed 0..N-1
+        """
+        import pandas as pd
+        data = {name: self[name] for name in COLUMNS + DERIVED}
+        data['start'] = data['start'].astype('datetime64[ns]')
+        data['end'] = data['end'].astype('datetime64[ns]')
+        data['dependencies'] = [list(deps) for deps in data['dependencies']]
+        return pd.DataFrame(data)
@@ -0,0 +1,152 @@
+"""
+FasttGantt: lightweight timing of the slow phases (drawing the chart, the task
+list, recalculating, file I/O)
+
+Instrumented code wraps each phase in `with timings.phase(name):`.  Timing
+is off by default, and then phase() hands back a do-nothing context manager
+so the cost is a function call.  When it's on (FASTTGANTT_TIMING=1, or the
+app's Edit > Show Timings) the last WINDOW times of each phase are kept for
+the status bar.  Phases named 'draw/...' are parts of 'draw'.
+
+For a full profile of a session set FASTTGANTT_PROFILE to a file name: the
+session is run under cProfile and the stats are saved there (for pstats or
+snakeviz) and summarized on stdout when the app exits.
+"""
+import contextlib
+import cProfile
+import functools
+import os
+import pstats
+import threading
+import time
+from collections import deque
+
+WINDOW = 20
+PROFILE_LINES = 25
+_NOT_TIMED = contextlib.nullcontext()
+
+class Timings:
+    """
+    Rolling per-phase latencies, safe to record from the worker thread too
+    """
+    def __init__(self, enabled=False, window=WINDOW):
+        """
+        Parameters:
+        enabled (bool): record timings
+        window (int): number of recent times to keep for each phase
+        """
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}  # phase -> deque of seconds, in the order first seen
+        self.lock = threading.Lock()
+
+    def phase(self, name):
+        """
+        Context manager timing one phase, e.g.
+        with timings.phase('draw/layout'): ...
+        """
+        if not self.enabled:
+            return _NOT_TIMED
+        return self.timed(name)
+
+    @contextlib.contextmanager
+    def timed(self, name):
+        """
+        Time the body of a with statement as a phase (whether enabled or not)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        """
+        Add a time for a phase
+        """
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def clear(self):
+        """
+        Forget all the timings
+        """
+        with self.lock:
+            self.samples = {}
+
+    def summary(self):
+        """
+        Returns:
+        dict: phase -> (last, mean of the recent) times in seconds
+        """
+        with self.lock:
+            return {name: (samples[-1], sum(samples) / len(samples))
+                    for name, samples in self.samples.items()}
+
+    def status(self):
+        """
+        One line summary for a status bar, e.g.
+        "draw 180ms (artists 40, ticks 2, layout 60, canvas 75) | treeview 6ms"
+
+        Returns:
+        string: the mean of the recent times of each phase, in milliseconds
+        """
+        summary = self.summary()
+        parts = []
+        for name, (_, mean) in summary.items():
+            if '/' in name:
+                continue
+            subphases = [f"{sub.split('/', 1)[1]} {sub_mean * 1000:.0f}"
+                         for sub, (_, sub_mean) in summary.items()
+                         if sub.startswith(name + '/')]
+            part = f"{name} {mean * 1000:.0f}ms"
+            if subphases:
+                part += f" ({', '.join(subphases)})"
+            parts.append(part)
+        if not parts:
+            return "no timings yet"
+        return " | ".join(parts) + f"   (mean of last {self.window})"
+
+# the timings for the whole app
+timings = Timings(enabled=bool(os.environ.get('FASTTGANTT_TIMING')))
+
+def timed(name):
+    """
+    Decorator timing every call of a function as a phase
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timings.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def start_profile():
+    """
+    Start profiling the session, if FASTTGANTT_PROFILE is set
+
+    Returns:
+    cProfile.Profile: the running profiler, or None
+    """
+    if not os.environ.get('FASTTGANTT_PROFILE'):
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def stop_profile(profiler):
+    """
+    Stop a profiler from start_profile, save the stats to FASTTGANTT_PROFILE
+    and print the slowest functions
+    """
+    if profiler is None:
+        return
+    profiler.disable()
+    file_path = os.environ['FASTTGANTT_PROFILE']
+    profiler.dump_stats(file_path)
+    print(f"profile saved to {file_path}")
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(PROFILE_LINES)
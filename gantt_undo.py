@@ -0,0 +1,246 @@
+"""
+FasttGantt: undo and redo
+
+A TaskStore with a Journal attached records a small delta for each change
+made to it: the old and new values of the cells that changed, the rows a
+task was added or deleted at, or how a block of rows was reordered.  So
+the history takes memory in proportion to what was changed, not to the
+size of the plan.  The deltas recorded while handling one user action are
+committed together as one step, which Journal.undo and Journal.redo then
+apply backwards or forwards.
+"""
+from collections import deque
+import numpy as np
+
+HISTORY_LIMIT = 100  # steps kept for undo
+
+class CellsDelta:
+    """
+    Some of the columns of some tasks changed
+    """
+    __slots__ = ('rows', 'old', 'new')
+
+    def __init__(self, rows, old, new):
+        """
+        Parameters:
+        rows (array): the tasks' rows
+        old, new (dict): column -> array of the values of the rows before/after
+        """
+        self.rows = rows
+        self.old = old
+        self.new = new
+
+    def apply(self, tasks, undo):
+        """
+        Set the cells to their old (undo) or new values
+
+        Returns:
+        list: the rows that changed
+        """
+        values = self.old if undo else self.new
+        # names and dependency lists are set a task at a time (renames are
+        # only ever recorded for one task)
+        for k, row in enumerate(self.rows):
+            one_by_one = {column: values[column][k] for column in ('task', 'dependencies')
+                          if column in values}
+            if one_by_one:
+                tasks.set_task(row, **one_by_one)
+        bulk = {column: value for column, value in values.items()
+                if column not in ('task', 'dependencies')}
+        if bulk:
+            tasks.set_tasks(self.rows, **bulk)
+        return list(self.rows)
+
+class OrderDelta:
+    """
+    A block of rows was reordered
+    """
+    __slots__ = ('first', 'order')
+
+    def __init__(self, first, order):
+        """
+        Parameters:
+        first (int): the first row of the block
+        order (array): the old row of each row in the block
+        """
+        self.first = first
+        self.order = order
+
+    def apply(self, tasks, undo):
+        """
+        Put the rows back in their old (undo) or new order
+
+        Returns:
+        None: the layout changed
+        """
+        if undo:
+            order = np.empty_like(self.order)
+            order[self.order - self.first] = np.arange(self.first, self.first + len(self.order))
+        else:
+            order = self.order
+        tasks.reorder(order, self.first)
+        return None
+
+class RowsDelta:
+    """
+    Tasks were added (inserted) or deleted
+    """
+    __slots__ = ('rows', 'data', 'inserted', 'dependents')
+
+    def __init__(self, rows, data, inserted, dependents=None):
+        """
+        Parameters:
+        rows (array): rows of the tasks, in increasing order (after they
+                      were inserted, or before they were deleted)
+        data (dict): column -> array of the tasks' values, see TaskStore.insert
+        inserted (bool): True if the tasks were added, False if deleted
+        dependents (CellsDelta): the other tasks' dependencies on the
+                                 deleted tasks being removed
+        """
+        self.rows = rows
+        self.data = data
+        self.inserted = inserted
+        self.dependents = dependents
+
+    def apply(self, tasks, undo):
+        """
+        Add or delete the tasks again
+
+        Returns:
+        None: the layout changed
+        """
+        if undo == self.inserted:
+            tasks.delete(self.rows)
+        else:
+            tasks.insert(self.rows, self.data)
+            if self.dependents is not None:
+                self.dependents.apply(tasks, undo=True)
+        return None
+
+class ValueDelta:
+    """
+    Something other than the tasks changed, e.g. the team list
+    """
+    __slots__ = ('setter', 'old', 'new')
+
+    def __init__(self, setter, old, new):
+        """
+        Parameters:
+        setter (function): setter(value) changes it
+        old, new: the value before and after
+        """
+        self.setter = setter
+        self.old = old
+        self.new = new
+
+    def apply(self, tasks, undo):
+        """
+        Set the old (undo) or new value
+
+        Returns:
+        None: redraw everything
+        """
+        self.setter(self.old if undo else self.new)
+        return None
+
+class Journal:
+    """
+    The undo and redo history of a plan.  Deltas are recorded (see
+    TaskStore.journal) until commit makes them one step.
+    """
+    def __init__(self, limit=HISTORY_LIMIT):
+        """
+        Parameters:
+        limit (int): number of steps to keep, the oldest are forgotten
+        """
+        self.limit = limit
+        self.pending = []
+        self.undo_steps = deque(maxlen=limit)  # (label, deltas), most recent last
+        self.redo_steps = []
+
+    def record(self, delta):
+        """
+        Add a delta to the step being made
+        """
+        self.pending.append(delta)
+
+    def commit(self, label):
+        """
+        Make the deltas recorded since the last commit one step
+
+        Parameters:
+        label (string): what the step did, e.g. "Edit Task"
+        """
+        if self.pending:
+            self.undo_steps.append((label, self.pending))
+            self.pending = []
+            self.redo_steps = []
+
+    def clear(self):
+        """
+        Forget the history, e.g. when another plan is loaded
+        """
+        self.pending = []
+        self.undo_steps.clear()
+        self.redo_steps = []
+
+    def undo_label(self):
+        """
+        Label of the step undo would undo, or None
+        """
+        return self.undo_steps[-1][0] if self.undo_steps else None
+
+    def redo_label(self):
+        """
+        Label of the step redo would redo, or None
+        """
+        return self.redo_steps[-1][0] if self.redo_steps else None
+
+    def undo(self, tasks):
+        """
+        Undo the last step
+
+        Parameters:
+        tasks (TaskStore): the tasks the step was made to
+
+        Returns:
+        list: the rows that changed, None if the layout did (or there was
+              nothing to undo)
+        """
+        self.commit("Edit")  # anything not committed yet is undone first
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps.pop()
+        self.redo_steps.append(step)
+        return self.apply(tasks, reversed(step[1]), undo=True)
+
+    def redo(self, tasks):
+        """
+        Redo the last step undone
+
+        Returns:
+        list: the rows that changed, None if the layout did (or there was
+              nothing to redo)
+        """
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps.pop()
+        self.undo_steps.append(step)
+        return self.apply(tasks, step[1], undo=False)
+
+    def apply(self, tasks, deltas, undo):
+        """
+        Apply deltas without recording them again
+        """
+        rows = set()
+        journal, tasks.journal = tasks.journal, None
+        try:
+            for delta in deltas:
+                changed = delta.apply(tasks, undo)
+                if changed is None:
+                    rows = None
+                elif rows is not None:
+                    rows.update(changed)
+        finally:
+            tasks.journal = journal
+        return None if rows is None else sorted(rows)
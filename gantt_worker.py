@@ -0,0 +1,125 @@
+"""
+FasttGantt: run slow jobs (load, save, export) off the Tk event thread
+
+Tk isn't thread safe, so the worker thread never touches Tk: it puts its
+progress and result on a queue that the Tk thread polls with after().
+"""
+import os
+import queue
+import threading
+
+POLL_MS = 50
+
+class Cancelled(Exception):
+    """
+    Raised inside a job (by its progress callback) once it has been cancelled
+    """
+
+def replace_file(file_path, write, progress):
+    """
+    Write a file via a temporary file next to it, so that a cancelled or
+    failed job leaves any existing file untouched
+
+    Parameters:
+    file_path (string): the file to (over)write
+    write (function): write(path) writes the file to path
+    progress (function): the job's progress callback, checked before replacing
+    """
+    stem, ext = os.path.splitext(file_path)
+    temp_path = f"{stem}.partial{ext}"  # same extension, it can pick the format
+    try:
+        write(temp_path)
+        progress(1.0)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+class BackgroundJob:
+    """
+    Runs work(progress) on a worker thread.  The job calls progress(fraction,
+    message) from time to time; that's also where cancellation takes effect.
+    The callbacks are all called on the Tk thread.
+    """
+    def __init__(self, root, work, on_done, on_error=None, on_progress=None, on_cancel=None):
+        """
+        Parameters:
+        root (tk.Tk): the Tk root, used to poll for results with after()
+        work (function): work(progress) does the job and returns its result
+        on_done (function): on_done(result) when the job has finished
+        on_error (function): on_error(exception) if the job raised
+        on_progress (function): on_progress(fraction, message) as the job progresses
+        on_cancel (function): on_cancel() once a cancelled job has stopped
+        """
+        self.root = root
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.messages = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        """
+        Start the job and begin polling for its progress
+        """
+        self.thread.start()
+        self.root.after(POLL_MS, self.poll)
+
+    def cancel(self):
+        """
+        Ask the job to stop, at its next progress() call.  on_cancel is
+        called once it has.
+        """
+        self.cancelled.set()
+
+    def progress(self, fraction=None, message=None):
+        """
+        Called by the job (on the worker thread) to report progress
+
+        Parameters:
+        fraction (float): how much is done, 0 to 1, or None if unknown
+        message (string): what it's doing
+        """
+        if self.cancelled.is_set():
+            raise Cancelled()
+        self.messages.put(('progress', (fraction, message)))
+
+    def run(self):
+        """
+        Worker thread: do the job and queue its result
+        """
+        try:
+            result = self.work(self.progress)
+            if self.cancelled.is_set():
+                raise Cancelled()
+            self.messages.put(('done', result))
+        except Cancelled:
+            self.messages.put(('cancelled', None))
+        except Exception as e: # pylint: disable=broad-exception-caught
+            self.messages.put(('error', e))
+
+    def poll(self):
+        """
+        Tk thread: hand anything the job has queued to the callbacks
+        """
+        while True:
+            try:
+                kind, value = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                if self.on_progress is not None:
+                    self.on_progress(*value)
+                continue
+            if kind == 'done':
+                self.on_done(value)
+            elif kind == 'error' and self.on_error is not None:
+                self.on_error(value)
+            elif kind == 'cancelled' and self.on_cancel is not None:
+                self.on_cancel()
+            return
+        self.root.after(POLL_MS, self.poll)
@@ -0,0 +1,56 @@
+"""
+Shared fixtures: small plans whose schedules are easy to work out by hand
+"""
+import os
+os.environ.setdefault('MPLBACKEND', 'Agg')  # the chart tests draw off-screen
+import numpy as np
+import pytest
+from gantt_store import TaskStore
+
+def make_store(tasks):
+    """
+    A TaskStore from (name, team, start, end, completion, dependencies) tuples
+    """
+    store = TaskStore()
+    for task in tasks:
+        store.append(*task)
+    return store
+
+def snapshot(store):
+    """
+    Everything saved of a plan, to compare plans with
+    """
+    return [(store.get(row, 'task'), store.get(row, 'team'), str(store.get(row, 'start')),
+             str(store.get(row, 'end')), float(store.get(row, 'completion_frac')),
+             store.get(row, 'dependencies')) for row in range(len(store))]
+
+@pytest.fixture
+def plan():
+    """
+    A -> B -> D and C -> D, with D planned before B can finish:
+
+        A  01-01..01-03   critical
+        B  01-02..01-03   needs A, starts 01-04 at the earliest, critical
+        C  01-01..01-01   4 days of slack
+        D  01-04..01-05   needs B and C, starts 01-06 at the earliest, critical
+    """
+    return make_store([
+        ('A', 'R&D', '2024-01-01', '2024-01-03', 1.0, []),
+        ('B', 'IT', '2024-01-02', '2024-01-03', 0.5, ['A']),
+        ('C', 'IT', '2024-01-01', '2024-01-01', 0.0, []),
+        ('D', 'R&D', '2024-01-04', '2024-01-05', 0.0, ['B', 'C']),
+    ])
+
+@pytest.fixture
+def random_plan():
+    """
+    A larger plan of random tasks, each depending on a few earlier ones
+    """
+    rng = np.random.default_rng(0)
+    names = [f"task {i}" for i in range(200)]
+    start = np.datetime64('2024-01-01') + rng.integers(0, 300, len(names))
+    end = start + rng.integers(0, 30, len(names))
+    return make_store([
+        (name, f"team {rng.integers(0, 5)}", s, e, float(rng.random()),
+         [names[j] for j in sorted(set(rng.integers(0, i, min(i, 3)).tolist()))] if i else [])
+        for i, (name, s, e) in enumerate(zip(names, start, end))])
@@ -0,0 +1,20 @@
+"""
+Moving the dependent tasks out of the way of an edited task
+"""
+from gantt_schedule import DependencyGraph, push_dependents
+
+def test_push_dependents(plan):
+    graph = DependencyGraph(plan)
+    plan.set_task(0, end='2024-01-05')  # A now ends on 01-05
+    moved = push_dependents(plan, graph, [0])
+    assert sorted(moved) == [1, 3]
+    assert [str(date) for date in plan['start']] == \
+           ['2024-01-01', '2024-01-06', '2024-01-01', '2024-01-08']
+    assert plan['task_duration'].tolist() == [5, 2, 1, 2]  # moved, not stretched
+
+def test_push_never_earlier(plan):
+    graph = DependencyGraph(plan)
+    plan.set_task(3, start='2024-02-01', end='2024-02-02')
+    plan.set_task(2, end='2024-01-03')  # C still ends before D starts
+    assert push_dependents(plan, graph, [2]) == []
+    assert str(plan.get(3, 'start')) == '2024-02-01'
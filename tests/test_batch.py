@@ -0,0 +1,33 @@
+"""
+gantt_batch: every plan gets its own charts
+"""
+import os
+import pytest
+from gantt_batch import output_names, render_all
+from gantt_io import save_plan
+
+def test_output_names():
+    names = output_names(['big.ods', 'big.fgantt', 'a/plan.ods', 'b/plan.ods', 'other.ods'])
+    assert names == {'big.ods': 'big_ods', 'big.fgantt': 'big_fgantt',
+                     'a/plan.ods': 'a_plan_ods', 'b/plan.ods': 'b_plan_ods',
+                     'other.ods': 'other'}
+
+def test_output_name_clash():
+    with pytest.raises(ValueError):
+        output_names(['plan_ods.ods', 'plan.ods', 'plan.fgantt'])
+
+def test_same_stem_rendered_separately(plan, tmp_path):
+    files = []
+    for folder in ('a', 'b'):
+        os.makedirs(tmp_path / folder)
+        files.append(str(tmp_path / folder / 'plan.ods'))
+        save_plan(plan, files[-1])
+    files.append(str(tmp_path / 'a' / 'plan.fgantt'))
+    save_plan(plan, files[-1])
+    options = {'out_dir': str(tmp_path / 'out'), 'formats': ['svg'], 'cache': False}
+    os.makedirs(options['out_dir'])
+    results = list(render_all(files + files[:1], options, jobs=1))
+    assert len(results) == 3  # the repeated file is rendered once
+    assert [error for _, _, _, error in results] == [None] * 3
+    assert sorted(os.listdir(options['out_dir'])) == \
+           ['a_plan_fgantt.svg', 'a_plan_ods.svg', 'b_plan_ods.svg']
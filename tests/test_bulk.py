@@ -0,0 +1,74 @@
+"""
+Editing, moving and deleting many tasks at once
+"""
+import numpy as np
+import pytest
+from tests.conftest import snapshot
+
+def test_delete_strips_dependencies(plan):
+    plan.delete([1])
+    assert plan['task'].tolist() == ['A', 'C', 'D']
+    assert plan.get(2, 'dependencies') == ['C']
+    assert plan.check_index()
+    plan.delete([0, 1])
+    assert plan['task'].tolist() == ['D']
+    assert plan.get(0, 'dependencies') == []
+    assert plan.origin == np.datetime64('2024-01-04')
+    assert plan.check_index()
+
+def test_move_rows(random_plan):
+    before = snapshot(random_plan)
+    rows = np.array([0, 5, 6, 199])
+    new_rows = random_plan.move_rows(rows, 2)
+    assert new_rows.tolist() == [2, 7, 8, 199]  # the last can't go any lower
+    assert random_plan.check_index()
+    assert [before[row] for row in rows] == [snapshot(random_plan)[row] for row in new_rows]
+    new_rows = random_plan.move_rows(new_rows, -10)
+    assert new_rows.tolist() == [0, 1, 2, 189]
+    assert random_plan.check_index()
+    assert sorted(snapshot(random_plan)) == sorted(before)
+
+def test_set_tasks(random_plan):
+    rows = np.array([3, 4, 50])
+    random_plan.set_tasks(rows, team='New', completion_frac=1.0)
+    assert random_plan['team'][rows].tolist() == ['New'] * 3
+    assert (random_plan['completion_days'][rows] == random_plan['task_duration'][rows]).all()
+    with pytest.raises(KeyError):
+        random_plan.set_tasks(rows, task='x')
+
+def moved_order(n, rows, offset):
+    """
+    The whole new order of the table after moving some rows, worked out
+    the slow way
+    """
+    rest = [row for row in range(n) if row not in rows]
+    keys = {row: rest.index(row) for row in rest}
+    for row in rows:
+        keys[row] = min(max(sum(r < row for r in rest) + offset, 0), len(rest)) - 0.5
+    return sorted(range(n), key=lambda row: (keys[row], row))
+
+@pytest.mark.parametrize('offset', [-1, 1, -3, 4, -50, 50])
+def test_move_rows_matches_whole_table_order(random_plan, offset):
+    from gantt_undo import Journal
+    rng = np.random.default_rng(offset + 100)
+    random_plan.journal = Journal()
+    for size in (1, 2, 5):
+        rows = np.sort(rng.choice(len(random_plan), size, replace=False))
+        before = random_plan['task'].tolist()
+        order = moved_order(len(random_plan), rows.tolist(), offset)
+        new_rows = random_plan.move_rows(rows, offset)
+        random_plan.journal.commit("Move")
+        assert random_plan['task'].tolist() == [before[row] for row in order]
+        assert random_plan['task'][new_rows].tolist() == [before[row] for row in rows]
+        assert random_plan.check_index()
+        random_plan.journal.undo(random_plan)
+        assert random_plan['task'].tolist() == before and random_plan.check_index()
+        random_plan.journal.redo(random_plan)
+        assert random_plan['task'].tolist() == [before[row] for row in order]
+
+def test_move_one_row_records_only_the_two_rows(random_plan):
+    from gantt_undo import Journal
+    random_plan.journal = Journal()
+    assert random_plan.move_rows(np.array([10]), 1).tolist() == [11]
+    (delta,) = random_plan.journal.pending
+    assert delta.first == 10 and delta.order.tolist() == [11, 10]
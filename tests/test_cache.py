@@ -0,0 +1,43 @@
+"""
+PlanCache: parsed plans kept on disk by the content of the file
+"""
+import os
+from gantt_cache import PlanCache
+from gantt_io import save_ods
+from tests.conftest import snapshot
+
+def test_plan_cache(plan, tmp_path):
+    path = str(tmp_path / 'plan.ods')
+    save_ods(plan, path)
+    cache = PlanCache(str(tmp_path / 'cache'))
+    assert snapshot(cache.load(path)) == snapshot(plan)
+    assert len(cache.entries) == 1
+    # a new cache reads the index, and loads the cached copy
+    cache = PlanCache(str(tmp_path / 'cache'))
+    key = cache.key(path)
+    assert key in cache.entries
+    assert snapshot(cache.load(path)) == snapshot(plan)
+    # a broken entry is parsed again
+    with open(cache.entry_path(key), 'wb') as file:
+        file.write(b'not a plan')
+    assert snapshot(cache.load(path)) == snapshot(plan)
+
+def test_plan_cache_evicts(plan, random_plan, tmp_path):
+    cache = PlanCache(str(tmp_path / 'cache'), max_bytes=1)
+    for name, tasks in (('a.ods', plan), ('b.ods', random_plan)):
+        path = str(tmp_path / name)
+        save_ods(tasks, path)
+        cache.load(path)
+    assert len(cache.entries) <= 1
+    assert len([name for name in os.listdir(cache.directory)
+                if name.endswith('.fgantt')]) == len(cache.entries)
+
+def test_changed_file_parsed_again(plan, tmp_path):
+    path = str(tmp_path / 'plan.ods')
+    save_ods(plan, path)
+    cache = PlanCache(str(tmp_path / 'cache'))
+    cache.load(path)
+    plan.set_task(0, task='renamed')
+    save_ods(plan, path)
+    os.utime(path, ns=(1, 1))  # (a new mtime even on a coarse clock)
+    assert cache.load(path)['task'].tolist()[0] == 'renamed'
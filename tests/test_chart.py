@@ -0,0 +1,83 @@
+"""
+GanttChart: editing tasks in place
+"""
+import datetime as dt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from gantt_chart import GanttChart
+from tests.conftest import make_store
+
+def draw(tasks):
+    """
+    Draw a chart of the tasks on an off-screen canvas
+    """
+    figure = Figure(figsize=(16, 9))
+    canvas = FigureCanvasAgg(figure)
+    chart = GanttChart(figure, figure.add_subplot())
+    chart.attach(canvas)
+    chart.rebuild(tasks, {team: 'C0' for team in tasks.teams}, 'Test', dt.date(2024, 1, 2))
+    canvas.draw()
+    return chart
+
+def test_edit_task_with_dangling_dependency():
+    tasks = make_store([('A', 'IT', '2024-01-01', '2024-01-03', 0.0, []),
+                        ('B', 'IT', '2024-01-04', '2024-01-05', 0.0, ['A', 'missing']),
+                        ('C', 'IT', '2024-01-02', '2024-01-06', 0.0, ['B'])])
+    chart = draw(tasks)
+    assert chart.arrow_keys == [('A', 'B'), ('B', 'C')]
+    tasks.set_task(1, end=np.datetime64('2024-01-05'), completion_frac=0.5)
+    assert chart.update_tasks(tasks, [1], chart.team_colors)
+    tasks.set_task(1, dependencies=['missing'])
+    assert chart.update_tasks(tasks, [1], chart.team_colors)
+    assert chart.arrow_keys == [('B', 'C')]
+
+def test_ticks_include_today():
+    tasks = make_store([('A', 'IT', '2024-01-01', '2024-01-20', 0.0, []),
+                        ('B', 'IT', '2024-02-01', '2024-05-10', 0.0, ['A'])])
+    figure = Figure(figsize=(16, 9))
+    chart = GanttChart(figure, figure.add_subplot())
+    # today long after the plan stretches the time axis to about 900 days
+    chart.rebuild(tasks, {'IT': 'C0'}, 'Test', dt.date(2026, 6, 1))
+    left, right = chart.ax.get_xlim()
+    assert right - left > 800
+    ticks = chart.ax.get_xticks()
+    assert ticks[0] >= left and ticks[-1] <= right
+    spacing = np.diff(ticks).min() / (right - left) * chart.ax.bbox.width
+    assert spacing >= 40  # not piled up
+    assert len(ticks) < 25
+
+def test_ticks_follow_resize():
+    tasks = make_store([('A', 'IT', '2024-01-01', '2024-12-31', 0.0, [])])
+    figure = Figure(figsize=(16, 9))
+    canvas = FigureCanvasAgg(figure)
+    chart = GanttChart(figure, figure.add_subplot())
+    chart.attach(canvas)
+    chart.rebuild(tasks, {'IT': 'C0'}, 'Test', dt.date(2024, 6, 1))
+    wide = len(chart.ax.get_xticks())
+    figure.set_size_inches(4, 9)
+    from matplotlib.backend_bases import ResizeEvent
+    ResizeEvent('resize_event', canvas)._process()
+    assert len(chart.ax.get_xticks()) < wide
+
+def test_delete_every_task_and_redraw(plan, tmp_path):
+    from gantt_chart import draw_figure
+    from gantt_export import export_chart, export_pages
+    chart = draw(plan)
+    chart.show_load(1)
+    plan.delete(np.arange(len(plan)))
+    chart.rebuild(plan, {}, 'Test', dt.date(2024, 1, 2))
+    chart.canvas.draw()
+    assert chart.names == [] and not chart.layers
+    chart.set_view((0, 5, 0, 10))
+    assert not chart.update_tasks(plan, [], {})
+    today = dt.date(2024, 1, 2)
+    draw_figure(plan, {}, 'Test', today).savefig(str(tmp_path / 'empty.png'))
+    export_chart(plan, {}, 'Test', today, [(str(tmp_path / 'empty.svg'), None)])
+    assert export_pages(plan, {}, 'Test', today, str(tmp_path / 'empty.pdf')) == \
+           [str(tmp_path / 'empty.pdf')]
+    # and tasks can be added again
+    plan.append('New', 'IT', '2024-02-01', '2024-02-03', 0.0)
+    chart.rebuild(plan, {'IT': 'C0'}, 'Test', today)
+    chart.canvas.draw()
+    assert chart.names == ['New'] and chart.load_layers
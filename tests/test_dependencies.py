@@ -0,0 +1,135 @@
+"""
+Dependencies kept as task ids: renames, moves and names that aren't tasks
+"""
+import pytest
+from gantt_io import load_native, load_ods, save_native, save_ods
+from gantt_schedule import schedule
+from gantt_undo import Journal
+from tests.conftest import make_store, snapshot
+
+def test_swap(plan):
+    plan.swap(0, 3)
+    assert plan['task'].tolist() == ['D', 'B', 'C', 'A']
+    assert plan.check_index()
+    # dependencies follow the tasks, not the rows
+    assert plan.get(0, 'dependencies') == ['B', 'C']
+    start, rows = plan.dependency_rows()
+    assert rows[start[1]:start[2]].tolist() == [3]
+
+def test_rename_keeps_dependencies(plan):
+    version = plan.graph_version
+    plan.set_task(1, task='B2')
+    assert plan.get(3, 'dependencies') == ['B2', 'C']
+    assert plan.graph_version == version  # the graph is the same
+    assert plan.check_index()
+    with pytest.raises(ValueError):
+        plan.set_task(1, task='A')
+
+def test_dangling_dependencies():
+    store = make_store([('A', 'IT', '2024-01-01', '2024-01-02', 0.0, ['missing']),
+                        ('B', 'IT', '2024-01-01', '2024-01-02', 0.0, ['A', 'missing'])])
+    assert store.dangling() == [('A', 'missing'), ('B', 'missing')]
+    assert store['dependencies'].tolist() == [['missing'], ['A', 'missing']]
+    start, rows = store.dependency_rows()
+    assert rows.tolist() == [-1, 0, -1]
+
+def test_dangling_resolved_by_new_task(plan):
+    plan.set_task(2, dependencies=['E'])
+    version = plan.graph_version
+    plan.append('E', 'IT', '2023-12-28', '2023-12-30', 0.0)
+    assert plan.dangling() == []
+    assert plan.graph_version != version
+    start, rows = plan.dependency_rows()
+    assert rows[start[2]:start[3]].tolist() == [4]
+    assert plan.check_index()
+
+def test_dangling_resolved_by_rename(plan):
+    plan.set_task(3, dependencies=['B', 'Z'])
+    plan.set_task(2, task='Z')
+    assert plan.dangling() == []
+    assert plan.get(3, 'dependencies') == ['B', 'Z']
+    # renaming it again takes the edge with it
+    plan.set_task(2, task='Y')
+    assert plan.get(3, 'dependencies') == ['B', 'Y']
+    assert plan.check_index()
+
+def test_schedule_after_dangling_resolved(plan, tmp_path):
+    plan.set_task(2, dependencies=['E'])
+    plan.append('E', 'IT', '2024-01-01', '2024-01-04', 0.0)
+    path = str(tmp_path / 'plan.fgantt')
+    save_native(plan, path)
+    # the same schedule before and after a save
+    assert schedule(plan).earliest_start.tolist() == [0, 3, 4, 5, 0]
+    assert schedule(load_native(path)).earliest_start.tolist() == [0, 3, 4, 5, 0]
+
+def test_dangling_saved(plan, tmp_path):
+    plan.set_task(2, dependencies=['unknown'])
+    for name, save, load in (('plan.ods', save_ods, load_ods),
+                             ('plan.fgantt', save_native, load_native)):
+        save(plan, str(tmp_path / name))
+        assert load(str(tmp_path / name)).dangling() == [('C', 'unknown')]
+
+def test_undo_dangling_resolution(random_plan):
+    journal = Journal()
+    random_plan.journal = journal
+    states = [snapshot(random_plan)]
+    for step in (lambda s: s.set_task(1, dependencies=['task 3', 'nowhere']),
+                 lambda s: s.append('nowhere', 'team 1', '2024-03-01', '2024-03-02', 0.0),
+                 lambda s: s.set_task(2, dependencies=['elsewhere']),
+                 lambda s: s.set_task(3, task='elsewhere'),
+                 lambda s: s.delete([3])):
+        step(random_plan)
+        journal.commit("Edit")
+        states.append((snapshot(random_plan), random_plan.dangling()))
+    assert states[-1][1] == []
+    for state in reversed(states[1:-1]):
+        journal.undo(random_plan)
+        assert (snapshot(random_plan), random_plan.dangling()) == state
+        assert random_plan.check_index()
+    for state in states[2:]:
+        journal.redo(random_plan)
+        assert (snapshot(random_plan), random_plan.dangling()) == state
+
+def test_dependents(plan):
+    start, rows = plan.dependent_rows()
+    assert [sorted(rows[start[k]:start[k + 1]].tolist()) for k in range(4)] == \
+           [[1], [3], [3], []]
+    plan.set_task(3, dependencies=['A'])
+    plan.move_rows([0], 3)  # B C D A
+    start, rows = plan.dependent_rows()
+    assert rows[start[3]:start[4]].tolist() == [0, 2]
+    assert plan.check_index()
+
+def test_dependencies_kept_through_edits(random_plan):
+    """
+    The dependents and the dependency names kept stay in step with the
+    dependencies through every kind of change and its undo
+    """
+    random_plan.journal = Journal()
+    before = snapshot(random_plan)
+    random_plan['dependencies']  # from here on the names are kept
+    version = random_plan.graph_version
+    rows = random_plan.dependency_rows()
+    random_plan.set_task(40, task='renamed')
+    assert random_plan.dependency_rows() is rows  # the graph didn't change
+    assert random_plan.graph_version == version
+    edits = [
+        lambda s: s.set_task(50, dependencies=['task 1', 'renamed', 'nothing', 'task 1']),
+        lambda s: s.set_task(60, task='nothing'),
+        lambda s: s.append('new', 'IT', '2024-02-01', '2024-02-02', 0.0, ['task 3', 'new']),
+        lambda s: s.move_rows([3, 10, 11], 5),
+        lambda s: s.swap(0, 150),
+        lambda s: s.delete([1, 40, 99]),
+        lambda s: s.set_task(0, dependencies=[]),
+    ]
+    for edit in edits:
+        edit(random_plan)
+        random_plan.journal.commit("Edit")
+        assert random_plan.check_index()
+    assert random_plan['dependencies'].tolist() == \
+           [random_plan.get(row, 'dependencies') for row in range(len(random_plan))]
+    while random_plan.journal.undo_label():
+        random_plan.journal.undo(random_plan)
+        assert random_plan.check_index()
+    assert snapshot(random_plan) == before
+    assert random_plan['dependencies'].tolist() == [deps for *_, deps in before]
@@ -0,0 +1,38 @@
+"""
+The export pipeline: several formats from one drawing, and the export cache
+"""
+import datetime as dt
+import os
+from gantt_export import ExportCache, chart_hash, export_chart
+
+def test_export_cache(plan, tmp_path):
+    key = chart_hash(plan, {'R&D': 'red', 'IT': 'blue'}, 'Title', '2024-01-02', (16, 9), 100)
+    assert key != chart_hash(plan, {'R&D': 'red', 'IT': 'green'}, 'Title', '2024-01-02',
+                             (16, 9), 100)
+    cache = ExportCache(str(tmp_path / 'exports'))
+    assert cache.lookup(key, 'png') is None
+    chart = tmp_path / 'chart.png'
+    chart.write_bytes(b'x' * 100)
+    cache.store(key, 'png', str(chart))
+    assert open(cache.lookup(key, 'png'), 'rb').read() == b'x' * 100
+    cache.max_bytes = 10
+    cache.store('other', 'png', str(chart))
+    assert len(os.listdir(cache.directory)) <= 1
+
+def test_export_formats_and_cache(plan, tmp_path):
+    colors = {'R&D': 'red', 'IT': 'blue'}
+    cache = ExportCache(str(tmp_path / 'exports'))
+    outputs = [(str(tmp_path / 'chart.png'), None), (str(tmp_path / 'chart.svg'), None),
+               (str(tmp_path / 'chart.pdf'), None)]
+    today = dt.date(2024, 1, 2)
+    assert export_chart(plan, colors, 'Title', today, outputs, dpi=30, cache=cache) == []
+    assert open(outputs[0][0], 'rb').read(4) == b'\x89PNG'
+    assert open(outputs[2][0], 'rb').read(4) == b'%PDF'
+    # the same chart again comes from the cache
+    again = [(str(tmp_path / 'again.svg'), None)]
+    assert export_chart(plan, colors, 'Title', today, again, dpi=30, cache=cache) == \
+           [again[0][0]]
+    assert open(again[0][0], 'rb').read() == open(outputs[1][0], 'rb').read()
+    # a changed plan doesn't
+    plan.set_task(0, completion_frac=0.5)
+    assert export_chart(plan, colors, 'Title', today, again, dpi=30, cache=cache) == []
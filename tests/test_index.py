@@ -0,0 +1,43 @@
+"""
+TaskStore.check_index: the name and id lookups stay in sync with the table
+through every kind of change
+"""
+import numpy as np
+import pytest
+from tests.conftest import snapshot
+
+def test_index_after_append(plan):
+    plan.append('E', 'Sales', '2023-12-30', '2024-01-02', 0.0, ['D'])
+    assert plan.check_index()
+    assert plan.index_of('E') == 4
+    with pytest.raises(ValueError):
+        plan.append('A', 'IT', '2024-01-01', '2024-01-01', 0.0)
+    assert plan.check_index()
+
+def test_index_after_delete_and_insert(random_plan):
+    rows = np.array([0, 17, 18, 150, 199])
+    data = random_plan._rows_data(rows)
+    random_plan.delete(rows)
+    assert random_plan.check_index()
+    assert random_plan.index_of('task 17') is None
+    assert random_plan.index_of('task 19') == 16
+    random_plan.insert(rows, data)
+    assert random_plan.check_index()
+    assert random_plan.rows_of(['task 17', 'task 199', 'nope']).tolist() == [17, 199, -1]
+
+def test_index_after_move_and_swap(random_plan):
+    before = snapshot(random_plan)
+    new_rows = random_plan.move_rows(np.array([3, 4, 90]), -2)
+    assert random_plan.check_index()
+    assert [random_plan.index_of(f"task {k}") for k in (3, 4, 90)] == new_rows.tolist()
+    random_plan.swap(0, 120)
+    assert random_plan.check_index()
+    assert sorted(snapshot(random_plan)) == sorted(before)
+
+def test_index_after_rename(plan):
+    plan.set_task(1, task='B2')
+    assert plan.check_index()
+    assert plan.index_of('B') is None and plan.index_of('B2') == 1
+    with pytest.raises(ValueError):
+        plan.set_task(1, task='A')
+    assert plan.check_index()
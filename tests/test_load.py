@@ -0,0 +1,40 @@
+"""
+Team load: the daily number of tasks each team has on
+"""
+import numpy as np
+from gantt_load import team_load
+from gantt_store import TaskStore
+from tests.conftest import make_store
+
+def test_team_load(plan):
+    load = team_load(plan)
+    assert load.teams == ['R&D', 'IT']
+    assert load.first_day == 0
+    assert load.load.tolist() == [[1, 1, 1, 1, 1],   # A then D
+                                  [1, 1, 1, 0, 0]]   # C then B
+    assert not load.over.any()
+
+def test_over_allocated():
+    store = make_store([('A', 'IT', '2024-01-01', '2024-01-04', 0.0, []),
+                        ('B', 'IT', '2024-01-03', '2024-01-05', 0.0, []),
+                        ('C', 'IT', '2024-01-04', '2024-01-04', 0.0, []),
+                        ('D', 'Ops', '2024-01-02', '2024-01-03', 0.0, [])])
+    load = team_load(store)
+    assert load.load.tolist() == [[1, 1, 2, 3, 1], [0, 1, 1, 0, 0]]
+    assert load.over_allocated_days().tolist() == [2, 3]
+    load = team_load(store, capacity={'IT': 2, 'Ops': 0})
+    assert load.over.tolist() == [[False, False, False, True, False],
+                                  [False, True, True, False, False]]
+
+def test_matches_counting(random_plan):
+    load = team_load(random_plan, capacity=3)
+    counted = np.zeros_like(load.load)
+    for start, end, team in zip(random_plan['days_to_start'], random_plan['days_to_end'],
+                                random_plan.team_codes):
+        counted[team, start - load.first_day:end - load.first_day + 1] += 1
+    assert np.array_equal(load.load, counted)
+    assert np.array_equal(load.over, counted > 3)
+
+def test_empty():
+    load = team_load(TaskStore())
+    assert load.load.shape == (0, 0)
@@ -0,0 +1,29 @@
+"""
+The native .fgantt format, and picking the format by the file's extension
+"""
+import numpy as np
+from gantt_io import load_native, load_plan, save_native, save_plan
+from gantt_store import TaskStore
+from tests.conftest import snapshot
+
+def test_native_round_trip(random_plan, tmp_path):
+    random_plan.set_task(7, dependencies=['task 1', 'unknown'])
+    path = str(tmp_path / 'plan.fgantt')
+    save_native(random_plan, path)
+    loaded = load_native(path)
+    assert snapshot(loaded) == snapshot(random_plan)
+    assert loaded.teams == random_plan.teams
+    assert loaded.check_index()
+
+def test_format_by_extension(plan, tmp_path):
+    for name in ('plan.ods', 'plan.fgantt'):
+        path = str(tmp_path / name)
+        save_plan(plan, path)
+        assert snapshot(load_plan(path)) == snapshot(plan)
+
+def test_empty_plan(tmp_path):
+    path = str(tmp_path / 'empty.fgantt')
+    save_native(TaskStore(), path)
+    loaded = load_native(path)
+    assert len(loaded) == 0 and loaded.origin is None
+    assert np.array_equal(loaded.dependency_rows()[0], [0])
@@ -0,0 +1,33 @@
+"""
+The streaming ODS reader
+"""
+import pandas as pd
+import pytest
+from gantt_io import load_ods, read_ods_rows, save_ods
+from tests.conftest import snapshot
+
+def test_ods_round_trip(plan, tmp_path):
+    path = str(tmp_path / 'plan.ods')
+    save_ods(plan, path)
+    loaded = load_ods(path)
+    assert snapshot(loaded) == snapshot(plan)
+
+def test_only_needed_columns(tmp_path):
+    path = str(tmp_path / 'extra.ods')
+    df = pd.DataFrame({'notes': ['x', 'y'], 'task': ['A', 'B'], 'team': ['IT', 'IT'],
+                       'start': ['2024-01-01', '2024-01-02'], 'end': ['2024-01-03', '2024-01-04'],
+                       'completion_frac': [0.5, None], 'dependencies': [None, 'A']})
+    with pd.ExcelWriter(path, engine='odf') as doc:
+        df.to_excel(doc, index=False, sheet_name='Sheet1')
+    rows = list(read_ods_rows(path, columns=['task', 'dependencies']))
+    assert rows == [{'task': 'A', 'dependencies': None}, {'task': 'B', 'dependencies': 'A'}]
+    tasks = load_ods(path)
+    assert tasks['dependencies'].tolist() == [[], ['A']]
+    assert tasks['completion_frac'].tolist() == [0.5, 0.0]
+
+def test_missing_column(tmp_path):
+    path = str(tmp_path / 'missing.ods')
+    with pd.ExcelWriter(path, engine='odf') as doc:
+        pd.DataFrame({'task': ['A']}).to_excel(doc, index=False, sheet_name='Sheet1')
+    with pytest.raises(ValueError):
+        load_ods(path)
@@ -0,0 +1,29 @@
+"""
+Critical path scheduling, checked against the plan worked out in conftest
+"""
+import pytest
+from gantt_schedule import CycleError, DependencyGraph, schedule
+
+def test_schedule(plan):
+    result = schedule(plan)
+    assert result.earliest_start.tolist() == [0, 3, 0, 5]
+    assert result.earliest_finish.tolist() == [3, 5, 1, 7]
+    assert result.latest_start.tolist() == [0, 3, 4, 5]
+    assert result.slack.tolist() == [0, 0, 4, 0]
+    assert result.critical.tolist() == [True, True, False, True]
+    assert result.project_end == 7
+    assert result.critical_path() == [0, 1, 3]
+    assert str(result.dates(result.earliest_start)[3]) == '2024-01-06'
+
+def test_graph(plan):
+    graph = DependencyGraph(plan)
+    assert graph.level.tolist() == [0, 1, 0, 2]
+    assert sorted(graph.successors([0, 2]).tolist()) == [1, 3]
+    assert sorted(graph.predecessors(3).tolist()) == [1, 2]
+
+def test_cycle(plan):
+    plan.set_task(0, dependencies=['D'])
+    with pytest.raises(CycleError) as error:
+        schedule(plan)
+    assert sorted(error.value.blocked) == ['A', 'B', 'D']
+    assert set(error.value.cycle) == {'A', 'B', 'D'}
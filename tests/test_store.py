@@ -0,0 +1,41 @@
+"""
+TaskStore: the columns, and the derived columns kept up to date in place
+"""
+import numpy as np
+
+def test_derived_columns(plan):
+    assert plan.origin == np.datetime64('2024-01-01')
+    assert plan['days_to_start'].tolist() == [0, 1, 0, 3]
+    assert plan['task_duration'].tolist() == [3, 2, 1, 2]
+    assert plan['completion_days'].tolist() == [3.0, 1.0, 0.0, 0.0]
+
+def test_append_moves_origin(plan):
+    assert plan.append('E', 'Sales', '2023-12-30', '2024-01-02', 0.0, ['D']) == 4
+    assert plan.origin == np.datetime64('2023-12-30')  # moved the start of the project
+    assert plan['days_to_start'].tolist() == [2, 3, 2, 5, 0]
+    assert plan.get(4, 'team') == 'Sales'
+    assert plan.teams == ['R&D', 'IT', 'Sales']
+
+def test_set_task(plan):
+    plan.set_task(1, start='2024-01-05', end='2024-01-09', completion_frac=0.25)
+    assert plan.get(1, 'task_duration') == 5
+    assert plan.get(1, 'completion_days') == 1.25
+    # moving the first task later moves the start of the project
+    plan.set_task(0, start='2024-01-02')
+    plan.set_task(2, start='2024-01-03', end='2024-01-03')
+    assert plan.origin == np.datetime64('2024-01-02')
+    assert plan['days_to_start'].tolist() == [0, 3, 1, 2]
+
+def test_copy_is_independent(plan):
+    copy = plan.copy()
+    copy.set_task(0, completion_frac=0.0)
+    assert plan.get(0, 'completion_frac') == 1.0
+    assert copy['task'].tolist() == plan['task'].tolist()
+
+def test_dataframe_round_trip(plan):
+    from gantt_store import TaskStore
+    df = plan.to_dataframe()
+    assert df['task_duration'].tolist() == [3, 2, 1, 2]
+    again = TaskStore.from_dataframe(df)
+    assert again['dependencies'].tolist() == plan['dependencies'].tolist()
+    assert again['start'].tolist() == plan['start'].tolist()
@@ -0,0 +1,92 @@
+"""
+Journal: undoing and redoing steps gives back exactly the plans before and after
+"""
+import numpy as np
+from gantt_undo import Journal, ValueDelta
+from tests.conftest import snapshot
+
+def history(store, steps):
+    """
+    Make each step (a function of the store) a step of undo history
+
+    Returns:
+    tuple: (journal, snapshots of the plan before the first and after each step)
+    """
+    journal = Journal()
+    store.journal = journal
+    states = [snapshot(store)]
+    for label, step in steps:
+        step(store)
+        journal.commit(label)
+        states.append(snapshot(store))
+    return journal, states
+
+def test_round_trip(random_plan):
+    one_day = np.timedelta64(1, 'D')
+    rows = np.array([10, 11, 150])
+    journal, states = history(random_plan, [
+        ("Edit Task", lambda s: s.set_task(5, task='renamed', end=s.get(5, 'end') + one_day)),
+        ("Shift Dates", lambda s: s.set_tasks(rows, start=s['start'][rows] - 400 * one_day,
+                                              end=s['end'][rows] - 400 * one_day)),
+        ("Add Task", lambda s: s.append('new', 'team 9', '2024-02-01', '2024-02-03', 0.0,
+                                        ['renamed', 'task 0'])),
+        ("Move Up", lambda s: s.move_rows(rows, -3)),
+        ("Swap", lambda s: s.swap(0, 100)),
+        ("Delete", lambda s: s.delete([0, 5, 20])),
+        ("Set Dependency", lambda s: s.set_task(1, dependencies=['task 3', 'nowhere'])),
+    ])
+    for k in range(len(states) - 1, 0, -1):
+        assert journal.undo_label() is not None
+        journal.undo(random_plan)
+        assert snapshot(random_plan) == states[k - 1]
+        assert random_plan.check_index()
+    assert journal.undo(random_plan) is None
+    for k in range(1, len(states)):
+        journal.redo(random_plan)
+        assert snapshot(random_plan) == states[k]
+        assert random_plan.check_index()
+    assert journal.redo_label() is None
+
+def test_changed_rows(plan):
+    journal, _ = history(plan, [("Set Completion",
+                                 lambda s: s.set_tasks([1, 2], completion_frac=1.0))])
+    assert journal.undo(plan) == [1, 2]
+    assert journal.redo(plan) == [1, 2]
+    plan.delete([0])
+    journal.commit("Delete")
+    assert journal.undo(plan) is None  # the layout changed
+
+def test_new_step_clears_redo(plan):
+    journal, _ = history(plan, [("Edit", lambda s: s.set_task(0, completion_frac=0.0))])
+    journal.undo(plan)
+    assert journal.redo_label() == "Edit"
+    plan.set_task(1, completion_frac=0.0)
+    journal.commit("Edit")
+    assert journal.redo_label() is None
+
+def test_limit_and_values(plan):
+    journal = Journal(limit=2)
+    plan.journal = journal
+    teams = ['IT']
+    def set_teams(value):
+        teams[:] = value
+    for team in ('Sales', 'Ops', 'Legal'):
+        journal.record(ValueDelta(set_teams, list(teams), teams + [team]))
+        set_teams(teams + [team])
+        journal.commit("Teams")
+    journal.undo(plan)
+    journal.undo(plan)
+    assert teams == ['IT', 'Sales']  # the oldest step was forgotten
+    assert journal.undo(plan) is None
+
+def test_insert(plan):
+    data = plan._rows_data(np.array([1, 2]))
+    plan.delete([1, 2])
+    assert plan.check_index()
+    plan.insert([1, 2], data)
+    assert plan.check_index()
+    assert plan['task'].tolist() == ['A', 'B', 'C', 'D']
+    # the tasks come back with their own dependencies, the journal puts
+    # back the ones on them (see test_undo)
+    assert plan['dependencies'].tolist() == [[], ['A'], [], []]
+    assert plan['days_to_start'].tolist() == [0, 1, 0, 3]